@@ -45,6 +45,10 @@ class EnvironmentInteractingAgent(abc.ABC):
   specific approach.
   """
 
+  # Parts of the observation the agent reads; applied to its env so that
+  # `get_state` skips capturing the others until they are read.
+  observation_mask: interface.ObservationMask = interface.ObservationMask()
+
   def __init__(
       self,
       env: interface.AsyncEnv,
@@ -56,16 +60,18 @@ class EnvironmentInteractingAgent(abc.ABC):
     Args:
       env: The environment.
       name: The agent name.
-      transition_pause: The pause before grabbing the state. This is required
-        because typically the agent is grabbing state immediatley after an
-        action and the screen is still changing. If `None` is provided, then it
-        uses "auto" mode which dynamically adjusts the wait time based on
-        environmental feedback.
+      transition_pause: The longest pause before grabbing the state. This is
+        required because typically the agent is grabbing state immediatley
+        after an action and the screen is still changing; the state is grabbed
+        as soon as the env reports the transition settled. If `None` is
+        provided, then it uses "auto" mode which dynamically adjusts the wait
+        time based on environmental feedback.
 
     Raises:
       ValueError: If the transition pause is negative.
     """
     self._env = env
+    self._env.observation_mask = self.observation_mask
     self._name = name
     if transition_pause is not None and transition_pause < 0:
       raise ValueError(
@@ -90,6 +96,7 @@ class EnvironmentInteractingAgent(abc.ABC):
   @env.setter
   def env(self, env: interface.AsyncEnv) -> None:
     self._env = env
+    self._env.observation_mask = self.observation_mask
 
   def set_max_steps(self, max_steps: int) -> None:
     self._max_steps = max_steps
@@ -107,13 +114,31 @@ class EnvironmentInteractingAgent(abc.ABC):
       logging.info('Fetched after %.1f seconds.', time.time() - start)
       return state
     else:
-      time.sleep(self._transition_pause)
       logging.info(
-          'Pausing {:2.1f} seconds before grabbing state.'.format(
+          'Pausing up to {:2.1f} seconds before grabbing state.'.format(
               self._transition_pause
           )
       )
-      return self.env.get_state(wait_to_stabilize=False)
+      return self.env.wait_for_transition(timeout=self._transition_pause)
+
+  async def areset(self, go_home: bool = False) -> None:
+    """Coroutine version of `reset`; runs it in the env executor."""
+    await self.env.run_blocking(self.reset, go_home=go_home)
+
+  async def aget_post_transition_state(self) -> interface.State:
+    """Coroutine version of `get_post_transition_state`."""
+    if self._transition_pause is None:
+      logging.info('Waiting for screen to stabilize before grabbing state...')
+      start = time.time()
+      state = await self.env.aget_state(wait_to_stabilize=True)
+      logging.info('Fetched after %.1f seconds.', time.time() - start)
+      return state
+    logging.info(
+        'Pausing up to {:2.1f} seconds before grabbing state.'.format(
+            self._transition_pause
+        )
+    )
+    return await self.env.await_for_transition(timeout=self._transition_pause)
 
   @abc.abstractmethod
   def step(self, goal: str) -> AgentInteractionResult:
@@ -126,6 +151,21 @@ class EnvironmentInteractingAgent(abc.ABC):
       Done and agent & observation data.
     """
 
+  async def astep(self, goal: str) -> AgentInteractionResult:
+    """Coroutine version of `step`.
+
+    By default runs `step` in the env executor. Agents that wait on model
+    calls should override it to await them, using the coroutine API of the
+    env, so that other work can run meanwhile.
+
+    Args:
+      goal: The goal.
+
+    Returns:
+      Done and agent & observation data.
+    """
+    return await self.env.run_blocking(self.step, goal)
+
   @property
   def name(self) -> str:
     return self._name
@@ -14,8 +14,6 @@
 
 """A Multimodal Autonomous Agent for Android (M3A)."""
 
-import time
-
 from absl import logging
 from android_world.agents import agent_utils
 from android_world.agents import base_agent
@@ -249,24 +247,45 @@ def _generate_ui_element_description(
 
 def _generate_ui_elements_description_list(
     ui_elements: list[representation_utils.UIElement],
-    screen_width_height_px: tuple[int, int],
+    valid_indices: list[int],
 ) -> str:
   """Generate concise information for a list of UIElement.
 
   Args:
     ui_elements: UI elements for the current screen.
-    screen_width_height_px: The height and width of the screen in pixels.
+    valid_indices: The indices of the elements to describe, from
+      `_valid_ui_element_indices`.
 
   Returns:
-    Concise information for each UIElement.
+    Concise information for each valid UIElement.
   """
   tree_info = ''
-  for index, ui_element in enumerate(ui_elements):
-    if m3a_utils.validate_ui_element(ui_element, screen_width_height_px):
-      tree_info += _generate_ui_element_description(ui_element, index) + '\n'
+  for index in valid_indices:
+    tree_info += (
+        _generate_ui_element_description(ui_elements[index], index) + '\n'
+    )
   return tree_info
 
 
+def _valid_ui_element_indices(
+    ui_elements: list[representation_utils.UIElement],
+    screen_width_height_px: tuple[int, int],
+) -> list[int]:
+  """Returns the indices of the elements `m3a_utils.validate_ui_element` keeps.
+
+  Computed once per screen, for both the prompt and the set-of-mark screenshot.
+
+  Args:
+    ui_elements: UI elements for the current screen.
+    screen_width_height_px: The width and height of the screen in pixels.
+  """
+  return [
+      index
+      for index, ui_element in enumerate(ui_elements)
+      if m3a_utils.validate_ui_element(ui_element, screen_width_height_px)
+  ]
+
+
 def _action_selection_prompt(
     goal: str,
     history: list[str],
@@ -347,8 +366,8 @@ class M3A(base_agent.EnvironmentInteractingAgent):
       env: The environment.
       llm: The multimodal LLM wrapper.
       name: The agent name.
-      wait_after_action_seconds: Seconds to wait for the screen to stablize
-        after executing an action
+      wait_after_action_seconds: Maximum seconds to wait for the screen to
+        stablize after executing an action
     """
     super().__init__(env, name)
     self.llm = llm
@@ -383,27 +402,30 @@ class M3A(base_agent.EnvironmentInteractingAgent):
     logging.info('----------step %s----------', str(len(self.history) + 1))
 
     state = self.get_post_transition_state()
-    logical_screen_size = self.env.logical_screen_size
-    orientation = self.env.orientation
-    physical_frame_boundary = self.env.physical_frame_boundary
+    geometry = state.geometry or self.env.geometry
+    logical_screen_size = geometry.logical_screen_size
+    orientation = geometry.orientation
+    physical_frame_boundary = geometry.physical_frame_boundary
 
     before_ui_elements = state.ui_elements
     step_data['before_ui_elements'] = before_ui_elements
-    before_ui_elements_list = _generate_ui_elements_description_list(
+    before_valid_indices = _valid_ui_element_indices(
         before_ui_elements, logical_screen_size
     )
+    before_ui_elements_list = _generate_ui_elements_description_list(
+        before_ui_elements, before_valid_indices
+    )
     step_data['raw_screenshot'] = state.pixels.copy()
     before_screenshot = state.pixels.copy()
-    for index, ui_element in enumerate(before_ui_elements):
-      if m3a_utils.validate_ui_element(ui_element, logical_screen_size):
-        m3a_utils.add_ui_element_mark(
-            before_screenshot,
-            ui_element,
-            index,
-            logical_screen_size,
-            physical_frame_boundary,
-            orientation,
-        )
+    for index in before_valid_indices:
+      m3a_utils.add_ui_element_mark(
+          before_screenshot,
+          before_ui_elements[index],
+          index,
+          logical_screen_size,
+          physical_frame_boundary,
+          orientation,
+      )
     step_data['before_screenshot_with_som'] = before_screenshot.copy()
 
     action_prompt = _action_selection_prompt(
@@ -533,27 +555,30 @@ Action: {{"action_type": "status", "goal_status": "infeasible"}}"""
           step_data,
       )
 
-    time.sleep(self.wait_after_action_seconds)
-
-    state = self.env.get_state(wait_to_stabilize=False)
-    logical_screen_size = self.env.logical_screen_size
-    orientation = self.env.orientation
-    physical_frame_boundary = self.env.physical_frame_boundary
+    state = self.env.wait_for_transition(
+        converted_action, timeout=self.wait_after_action_seconds
+    )
+    geometry = state.geometry or self.env.geometry
+    logical_screen_size = geometry.logical_screen_size
+    orientation = geometry.orientation
+    physical_frame_boundary = geometry.physical_frame_boundary
     after_ui_elements = state.ui_elements
-    after_ui_elements_list = _generate_ui_elements_description_list(
+    after_valid_indices = _valid_ui_element_indices(
         after_ui_elements, logical_screen_size
     )
+    after_ui_elements_list = _generate_ui_elements_description_list(
+        after_ui_elements, after_valid_indices
+    )
     after_screenshot = state.pixels.copy()
-    for index, ui_element in enumerate(after_ui_elements):
-      if m3a_utils.validate_ui_element(ui_element, logical_screen_size):
-        m3a_utils.add_ui_element_mark(
-            after_screenshot,
-            ui_element,
-            index,
-            logical_screen_size,
-            physical_frame_boundary,
-            orientation,
-        )
+    for index in after_valid_indices:
+      m3a_utils.add_ui_element_mark(
+          after_screenshot,
+          after_ui_elements[index],
+          index,
+          logical_screen_size,
+          physical_frame_boundary,
+          orientation,
+      )
 
     m3a_utils.add_screenshot_label(
         step_data['before_screenshot_with_som'], 'before'
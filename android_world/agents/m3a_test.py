@@ -18,6 +18,7 @@ from absl.testing import absltest
 from android_world.agents import infer
 from android_world.agents import m3a
 from android_world.env import adb_utils
+from android_world.env import representation_utils
 from android_world.utils import test_utils
 import numpy as np
 
@@ -131,5 +132,28 @@ class M3AInteractionTest(absltest.TestCase):
     self.assertLen(agent.history, 2)
 
 
+class ValidUIElementIndicesTest(absltest.TestCase):
+
+  def test_keeps_visible_elements_on_screen(self):
+    bbox = representation_utils.BoundingBox
+    ui_elements = [
+        representation_utils.UIElement(
+            bbox_pixels=bbox(0, 10, 0, 10), is_visible=True
+        ),
+        representation_utils.UIElement(
+            bbox_pixels=bbox(0, 10, 0, 10), is_visible=False
+        ),
+        representation_utils.UIElement(
+            bbox_pixels=bbox(200, 300, 0, 10), is_visible=True
+        ),
+        representation_utils.UIElement(is_visible=True),
+        representation_utils.UIElement(is_visible=None),
+    ]
+
+    self.assertEqual(
+        m3a._valid_ui_element_indices(ui_elements, (100, 100)), [0, 3]
+    )
+
+
 if __name__ == '__main__':
   absltest.main()
@@ -245,6 +245,8 @@ def encode_image_for_html(image: np.ndarray) -> str:
   Returns:
     Encoded image to be used in html.
   """
+  # Episodes loaded from a checkpoint hold lazily loaded image refs.
+  image = np.asarray(image)
   return base64.b64encode(
       cv2.imencode('.jpeg', cv2.cvtColor(image, cv2.COLOR_BGR2RGB))[1]
   ).decode('utf-8')
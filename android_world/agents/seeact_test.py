@@ -82,6 +82,9 @@ class TestSeeAct(absltest.TestCase):
         ),
     ]
     self.mock_env.get_state.return_value.ui_elements = mock_ui_elements
+    self.mock_env.wait_for_transition.return_value = (
+        self.mock_env.get_state.return_value
+    )
 
     goal = 'Test goal'
     result = self.seeact.step(goal)
@@ -19,6 +19,11 @@ import os
 class SimpleClaude(base_agent.EnvironmentInteractingAgent):
     """Simple agent using ClaudeSDKClient."""
 
+    # Claude takes its own screenshots through tools, so the state is unused.
+    observation_mask = interface.ObservationMask(
+        pixels=False, ui_elements=False
+    )
+
     def __init__(
         self,
         env: interface.AsyncEnv,
@@ -232,7 +237,7 @@ MINDSET: This benchmark is intentionally difficult. No shortcuts. Explore exhaus
                                             action_type=json_action.ANSWER,
                                             text=answer_text
                                         )
-                                        self.env.execute_action(answer_action)
+                                        await self.env.aexecute_action(answer_action)
                                         print(f"\n🔧 [ANSWER] Executed answer action: {answer_text}", flush=True)
                                 print(f"\n🔧 [ToolUse] {block.name} input={block.input}", flush=True)
                             elif isinstance(block, ToolResultBlock):
@@ -263,25 +268,53 @@ MINDSET: This benchmark is intentionally difficult. No shortcuts. Explore exhaus
         return response_text, is_done, has_error
 
     def step(self, goal: str) -> base_agent.AgentInteractionResult:
-        """Perform a single step with Claude."""
+        """Perform a single step with Claude.
+
+        Runs `astep` in a new event loop, so it must be called from synchronous
+        code: from a coroutine, await `astep` instead. It cannot run in the env
+        executor either, e.g. through `run_blocking`, since the coroutine API
+        of the env used by `astep` would wait on that same thread.
+
+        Raises:
+            RuntimeError: If called from a running event loop or from the env
+                executor.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                "SimpleClaude.step cannot be called from a running event loop;"
+                " await astep instead."
+            )
+        if self.env.in_executor:
+            raise RuntimeError(
+                "SimpleClaude.step cannot run in the env executor, where the"
+                " env calls it makes would deadlock; await astep instead."
+            )
+        return asyncio.run(self.astep(goal))
+
+    async def astep(self, goal: str) -> base_agent.AgentInteractionResult:
+        """Perform a single step with Claude, without blocking the event loop."""
         self._step_count += 1
         print(f"\n🚀 [STEP START] Step {self._step_count} beginning", flush=True)
 
         # Get current state
-        state = self.get_post_transition_state()
+        state = await self.aget_post_transition_state()
 
         # Create query with goal and state information
         query = f"""Goal: {goal}
 
 Current step: {self._step_count}
 Please analyze the current Android screen state and take the next appropriate action to accomplish the goal. If you need to see the screen, use available tools to take a screenshot first."""
-        claude_output, is_done, has_error = asyncio.run(self._process_claude_query(query))
+        claude_output, is_done, has_error = await self._process_claude_query(query)
 
         # If Usage Policy violation detected, retry with Sonnet 4
         if has_error:
             print(f"\n🔄 [FALLBACK] Retrying with Sonnet 4...", flush=True)
             # Temporarily switch to Sonnet 4 for this query
-            claude_output, is_done, has_error = asyncio.run(self._process_claude_query(query, use_sonnet_4=True))
+            claude_output, is_done, has_error = await self._process_claude_query(query, use_sonnet_4=True)
 
         # Return result
         print(f"\n🏁 [STEP END] Step {self._step_count} completed. Done: {is_done}, Error: {has_error}", flush=True)
@@ -18,7 +18,6 @@ from android_world.agents import agent_utils
 from android_world.agents import base_agent
 from android_world.agents import infer
 from android_world.agents import m3a_utils
-from android_world.env import adb_utils
 from android_world.env import interface
 from android_world.env import json_action
 from android_world.env import representation_utils
@@ -314,7 +313,8 @@ class T3A(base_agent.EnvironmentInteractingAgent):
     print('----------step ' + str(len(self.history) + 1))
 
     state = self.get_post_transition_state()
-    logical_screen_size = self.env.logical_screen_size
+    geometry = state.geometry or self.env.geometry
+    logical_screen_size = geometry.logical_screen_size
 
     ui_elements = state.ui_elements
     before_element_list = _generate_ui_elements_description_list_full(
@@ -406,8 +406,8 @@ Action: {{"action_type": "status", "goal_status": "infeasible"}}"""
             ui_elements[converted_action.index],
             converted_action.index,
             logical_screen_size,
-            adb_utils.get_physical_frame_boundary(self.env.controller),
-            adb_utils.get_orientation(self.env.controller),
+            geometry.physical_frame_boundary,
+            geometry.orientation,
         )
 
     if converted_action.action_type == 'status':
@@ -447,7 +447,7 @@ Action: {{"action_type": "status", "goal_status": "infeasible"}}"""
 
     after_element_list = _generate_ui_elements_description_list_full(
         ui_elements,
-        self.env.logical_screen_size,
+        (state.geometry or self.env.geometry).logical_screen_size,
     )
 
     # Save screenshot only for result visualization.
@@ -0,0 +1,270 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compression codecs for checkpoint files.
+
+Files written with a codec start with a short header naming the codec:
+
+  b'AWCK' | version (1 byte) | len(name) (1 byte) | name
+
+Version 1 files (`dump`) follow it with a single compressed pickle stream.
+Version 2 files (`dump_sections`) hold several independently decodable
+sections, so a reader can decode e.g. the metadata of an episode without its
+screenshots:
+
+  count (4 bytes) | count x [length (8 bytes) | compressed pickle]
+
+Files without the header are legacy gzipped pickles. Pickles are streamed
+through the compressor, without holding the pickled bytes in memory.
+
+gzip is always available. zstd and lz4 need the optional `zstandard` and `lz4`
+packages: `pip install zstandard lz4`.
+"""
+
+import abc
+from collections.abc import Sequence
+import gzip
+import io
+import pickle
+import struct
+from typing import Any, BinaryIO
+
+MAGIC = b'AWCK'
+_VERSION = 1
+_SECTIONED_VERSION = 2
+_SECTION_COUNT = struct.Struct('>I')
+_SECTION_LENGTH = struct.Struct('>Q')
+_GZIP_MAGIC = b'\x1f\x8b'
+# Objects in episodes can be large; pickle them with the fastest protocol.
+_PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+
+class Codec(abc.ABC):
+  """Wraps a file object in a streaming compressor or decompressor."""
+
+  name: str
+
+  @abc.abstractmethod
+  def writer(self, fileobj: BinaryIO) -> BinaryIO:
+    """Returns a stream that compresses into fileobj and leaves it open."""
+
+  @abc.abstractmethod
+  def reader(self, fileobj: BinaryIO) -> BinaryIO:
+    """Returns a stream that decompresses from fileobj."""
+
+
+class GzipCodec(Codec):
+  """gzip; compatible with the files written before codecs existed."""
+
+  name = 'gzip'
+
+  def __init__(self, level: int = 5):
+    self.level = level
+
+  def writer(self, fileobj: BinaryIO) -> BinaryIO:
+    return gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=self.level)
+
+  def reader(self, fileobj: BinaryIO) -> BinaryIO:
+    return gzip.GzipFile(fileobj=fileobj, mode='rb')
+
+
+class ZstdCodec(Codec):
+  """Zstandard; much faster than gzip at a similar or better ratio."""
+
+  name = 'zstd'
+
+  def __init__(self, level: int = 3):
+    self.level = level
+
+  def _zstandard(self):
+    try:
+      import zstandard  # pylint: disable=g-import-not-at-top
+    except ImportError as e:
+      raise ImportError(
+          'The zstd codec requires zstandard: `pip install zstandard`.'
+      ) from e
+    return zstandard
+
+  def writer(self, fileobj: BinaryIO) -> BinaryIO:
+    zstandard = self._zstandard()
+    return zstandard.ZstdCompressor(level=self.level).stream_writer(
+        fileobj, closefd=False
+    )
+
+  def reader(self, fileobj: BinaryIO) -> BinaryIO:
+    zstandard = self._zstandard()
+    return zstandard.ZstdDecompressor().stream_reader(fileobj, closefd=False)
+
+
+class Lz4Codec(Codec):
+  """LZ4 frames; the fastest codec, with the lowest ratio."""
+
+  name = 'lz4'
+
+  def _lz4_frame(self):
+    try:
+      from lz4 import frame  # pylint: disable=g-import-not-at-top
+    except ImportError as e:
+      raise ImportError('The lz4 codec requires lz4: `pip install lz4`.') from e
+    return frame
+
+  def writer(self, fileobj: BinaryIO) -> BinaryIO:
+    return self._lz4_frame().LZ4FrameFile(fileobj, mode='wb')
+
+  def reader(self, fileobj: BinaryIO) -> BinaryIO:
+    return self._lz4_frame().LZ4FrameFile(fileobj, mode='rb')
+
+
+CODECS: dict[str, Codec] = {
+    codec.name: codec for codec in (GzipCodec(), ZstdCodec(), Lz4Codec())
+}
+
+
+def get_codec(name: str) -> Codec:
+  """Returns the codec registered under name.
+
+  Args:
+    name: One of `CODECS`.
+
+  Raises:
+    ValueError: If there is no codec with that name.
+  """
+  try:
+    return CODECS[name]
+  except KeyError:
+    raise ValueError(
+        f'Unknown codec {name!r}; expected one of {sorted(CODECS)}.'
+    ) from None
+
+
+def write_header(
+    fileobj: BinaryIO, codec: Codec, version: int = _VERSION
+) -> None:
+  name = codec.name.encode()
+  fileobj.write(MAGIC + bytes([version, len(name)]) + name)
+
+
+def _read_header(fileobj: BinaryIO) -> tuple[int, Codec]:
+  """Returns the version and codec of a file; see `read_header`."""
+  prefix = fileobj.read(len(MAGIC))
+  if prefix[: len(_GZIP_MAGIC)] == _GZIP_MAGIC:
+    fileobj.seek(-len(prefix), 1)
+    return _VERSION, CODECS[GzipCodec.name]
+  if prefix != MAGIC:
+    raise ValueError('Not a checkpoint file.')
+  version, name_length = fileobj.read(2)
+  if version not in (_VERSION, _SECTIONED_VERSION):
+    raise ValueError(f'Unsupported checkpoint version {version}.')
+  return version, get_codec(fileobj.read(name_length).decode())
+
+
+def read_header(fileobj: BinaryIO) -> Codec:
+  """Reads the header of a checkpoint file and returns its codec.
+
+  Args:
+    fileobj: File positioned at the start; left positioned at the payload.
+
+  Returns:
+    The codec of the file. Legacy files without a header are gzip.
+
+  Raises:
+    ValueError: If the file has an unknown format, version or codec.
+  """
+  return _read_header(fileobj)[1]
+
+
+def dump(data: Any, fileobj: BinaryIO, codec: Codec) -> None:
+  """Pickles data into fileobj through codec, preceded by the header."""
+  write_header(fileobj, codec)
+  with codec.writer(fileobj) as stream:
+    pickle.dump(data, stream, protocol=_PICKLE_PROTOCOL)
+
+
+def dump_sections(
+    sections: Sequence[Any], fileobj: BinaryIO, codec: Codec
+) -> None:
+  """Pickles each section into fileobj so it can be decoded on its own.
+
+  Args:
+    sections: The objects to store, one per section.
+    fileobj: A seekable file; section lengths are filled in after each section
+      is streamed.
+    codec: The codec that compresses every section.
+  """
+  write_header(fileobj, codec, _SECTIONED_VERSION)
+  fileobj.write(_SECTION_COUNT.pack(len(sections)))
+  for section in sections:
+    length_offset = fileobj.tell()
+    fileobj.write(_SECTION_LENGTH.pack(0))
+    with codec.writer(fileobj) as stream:
+      pickle.dump(section, stream, protocol=_PICKLE_PROTOCOL)
+    end = fileobj.tell()
+    length = end - length_offset - _SECTION_LENGTH.size
+    fileobj.seek(length_offset)
+    fileobj.write(_SECTION_LENGTH.pack(length))
+    fileobj.seek(end)
+
+
+def read_index(
+    fileobj: BinaryIO,
+) -> tuple[Codec, list[tuple[int, int]] | None]:
+  """Reads the header and, for sectioned files, the section offsets.
+
+  Args:
+    fileobj: File positioned at the start.
+
+  Returns:
+    The codec and, for files written by `dump_sections`, the (offset, length)
+    of each section; None for single-stream files, in which case fileobj is
+    left positioned at the payload.
+
+  Raises:
+    ValueError: If the file has an unknown format, version or codec.
+  """
+  version, codec = _read_header(fileobj)
+  if version == _VERSION:
+    return codec, None
+  (count,) = _SECTION_COUNT.unpack(fileobj.read(_SECTION_COUNT.size))
+  index = []
+  for _ in range(count):
+    (length,) = _SECTION_LENGTH.unpack(fileobj.read(_SECTION_LENGTH.size))
+    index.append((fileobj.tell(), length))
+    fileobj.seek(length, 1)
+  return codec, index
+
+
+def load_section(
+    fileobj: BinaryIO, codec: Codec, offset: int, length: int
+) -> Any:
+  """Decodes the section at offset, as listed by `read_index`."""
+  fileobj.seek(offset)
+  # Decoders may read past the end of their stream; bound them to the section.
+  with codec.reader(io.BytesIO(fileobj.read(length))) as stream:
+    return pickle.load(stream)
+
+
+def load(fileobj: BinaryIO) -> Any:
+  """Loads data written by `dump` or `dump_sections`, or a legacy pickle.
+
+  Args:
+    fileobj: File positioned at the start.
+
+  Returns:
+    The pickled data; for sectioned files, the list of all sections.
+  """
+  codec, index = read_index(fileobj)
+  if index is not None:
+    return [load_section(fileobj, codec, *section) for section in index]
+  with codec.reader(fileobj) as stream:
+    return pickle.load(stream)
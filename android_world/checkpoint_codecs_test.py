@@ -0,0 +1,121 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import io
+import os
+import pickle
+import tempfile
+
+from absl.testing import absltest
+from absl.testing import parameterized
+from android_world import checkpoint_codecs
+from android_world import checkpointer
+import numpy as np
+
+_DATA = [{
+    'goal': 'Turn off wifi',
+    'is_successful': 1.0,
+    'episode_data': {'step_number': [0, 1], 'pixels': [np.arange(12)] * 2},
+}]
+
+
+def _get_codec_or_skip(test: absltest.TestCase, name: str):
+  codec = checkpoint_codecs.get_codec(name)
+  try:
+    codec.writer(io.BytesIO()).close()
+  except ImportError as e:
+    test.skipTest(str(e))
+  return codec
+
+
+class CheckpointCodecsTest(parameterized.TestCase):
+
+  @parameterized.parameters('gzip', 'zstd', 'lz4')
+  def test_round_trip(self, name):
+    codec = _get_codec_or_skip(self, name)
+    buffer = io.BytesIO()
+    checkpoint_codecs.dump(_DATA, buffer, codec)
+
+    buffer.seek(0)
+    self.assertIs(checkpoint_codecs.read_header(buffer), codec)
+    buffer.seek(0)
+    loaded = checkpoint_codecs.load(buffer)
+
+    self.assertEqual(loaded[0]['goal'], _DATA[0]['goal'])
+    np.testing.assert_array_equal(
+        loaded[0]['episode_data']['pixels'][1], np.arange(12)
+    )
+
+  @parameterized.parameters('gzip', 'zstd', 'lz4')
+  def test_sections_decode_independently(self, name):
+    codec = _get_codec_or_skip(self, name)
+    buffer = io.BytesIO()
+    checkpoint_codecs.dump_sections(
+        ['head', {'big': [1] * 1000}], buffer, codec
+    )
+
+    buffer.seek(0)
+    read_codec, index = checkpoint_codecs.read_index(buffer)
+    self.assertIs(read_codec, codec)
+    self.assertLen(index, 2)
+    self.assertEqual(
+        {'big': [1] * 1000},
+        checkpoint_codecs.load_section(buffer, codec, *index[1]),
+    )
+    self.assertEqual(
+        'head', checkpoint_codecs.load_section(buffer, codec, *index[0])
+    )
+    buffer.seek(0)
+    self.assertEqual(
+        ['head', {'big': [1] * 1000}], checkpoint_codecs.load(buffer)
+    )
+
+  def test_load_legacy_gzip_pickle(self):
+    legacy = io.BytesIO(gzip.compress(pickle.dumps(_DATA), compresslevel=5))
+    self.assertEqual(checkpoint_codecs.load(legacy)[0]['goal'], 'Turn off wifi')
+
+  def test_unknown_codec_raises_value_error(self):
+    with self.assertRaises(ValueError):
+      checkpoint_codecs.get_codec('brotli')
+
+  def test_not_a_checkpoint_raises_value_error(self):
+    with self.assertRaises(ValueError):
+      checkpoint_codecs.load(io.BytesIO(b'not a checkpoint'))
+
+
+class CheckpointerCodecTest(parameterized.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.temp_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self.temp_dir.cleanup)
+
+  @parameterized.parameters('gzip', 'zstd', 'lz4')
+  def test_mixed_codecs_load_transparently(self, name):
+    _get_codec_or_skip(self, name)
+    checkpointer.IncrementalCheckpointer(
+        self.temp_dir.name, codec=name
+    ).save_episodes([{'key': 'new'}], 'task_1')
+    # Written before codecs existed.
+    with open(os.path.join(self.temp_dir.name, 'task_0.pkl.gz'), 'wb') as f:
+      f.write(checkpointer._gzip_pickle([{'key': 'legacy'}]))
+
+    loaded = checkpointer.IncrementalCheckpointer(self.temp_dir.name).load()
+
+    self.assertCountEqual([{'key': 'new'}, {'key': 'legacy'}], loaded)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -15,17 +15,46 @@
 """Checkpointer class."""
 
 import abc
+import collections
+from collections.abc import Iterator, Sequence
+from concurrent import futures
 import datetime
 import gzip
 import io
+import itertools
+import json
 import os
 import pickle
-from typing import Any
+import struct
+import tempfile
+import threading
+from typing import Any, Callable
 
 from absl import logging
+from android_world import checkpoint_codecs
+from android_world import constants
+from android_world import episode_runner
+from android_world import image_store
+
+try:
+  import fcntl  # pylint: disable=g-import-not-at-top
+except ImportError:  # Not available on Windows.
+  fcntl = None
 
 INSTANCE_SEPARATOR = '_'
 
+# Append-only index of per-episode metadata, written next to the episode blobs.
+MANIFEST_FILENAME = 'manifest.jsonl'
+_MANIFEST_LOCK_FILENAME = 'manifest.lock'
+_EPISODES_SUFFIX = '.pkl.gz'
+# Heavy episode fields, stored apart from the metadata so they can be skipped.
+_PAYLOAD_FIELDS = (constants.EpisodeConstants.EPISODE_DATA,)
+_STEPS_SUFFIX = '.steps'
+# Each record in a step log is prefixed by its length.
+_STEP_RECORD_HEADER = struct.Struct('>Q')
+# Larger values are only kept in the episode blobs.
+_MAX_MANIFEST_VALUE_BYTES = 16 * 1024
+
 Episode = dict[str, Any]
 
 
@@ -59,33 +88,393 @@ def _gzip_pickle(data: Any) -> bytes:
   Returns:
       A bytes object containing the gzipped pickled data.
   """
-  pickled_data = io.BytesIO()
-  pickle.dump(data, pickled_data)
+  return gzip.compress(pickle.dumps(data), compresslevel=5)
 
-  pickled_data.seek(0)  # Reset the stream position to the beginning
-  compressed_data = io.BytesIO()
-  with gzip.GzipFile(
-      fileobj=compressed_data, mode='wb', compresslevel=5
-  ) as f_out:
-    f_out.write(pickled_data.getvalue())
 
-  return compressed_data.getvalue()
+def _unzip_and_read_pickle(file_path: str) -> Any:
+  """Reads and unpickles a checkpoint file, streaming it through its codec.
 
+  Args:
+      file_path: The path to a file written by `checkpoint_codecs.dump`, by
+        `_dump_episodes`, or to a legacy gzipped pickle.
+
+  Returns:
+      The original Python object that was pickled.
+  """
+  return _read_episodes(file_path)
+
+
+def _dump_episodes(
+    task_episodes: list[Episode],
+    fileobj: Any,
+    codec: checkpoint_codecs.Codec,
+) -> None:
+  """Writes episodes with their payload fields in separate sections.
+
+  The first section lists, per episode, its metadata (all fields except
+  `_PAYLOAD_FIELDS`) and its key order. It is followed by one section per
+  episode holding that episode's payload fields.
+
+  Args:
+    task_episodes: The episodes to write.
+    fileobj: A seekable binary file.
+    codec: The codec that compresses the sections.
+  """
+  heads = []
+  payloads = []
+  for episode in task_episodes:
+    metadata = {k: v for k, v in episode.items() if k not in _PAYLOAD_FIELDS}
+    heads.append((metadata, tuple(episode)))
+    payloads.append({k: episode[k] for k in _PAYLOAD_FIELDS if k in episode})
+  checkpoint_codecs.dump_sections([heads] + payloads, fileobj, codec)
+
+
+def _read_episodes(
+    filename: str, fields: list[str] | None = None, lazy: bool = False
+) -> Any:
+  """Reads the episodes in a checkpoint file.
+
+  Payload sections are only decoded if a requested field needs them.
+
+  Args:
+    filename: A file written by `_dump_episodes`, `checkpoint_codecs.dump` or a
+      legacy gzipped pickle.
+    fields: If provided, only these fields of each episode are returned.
+    lazy: If True and fields is None, episodes of sectioned files are returned
+      as `LazyEpisode`s that decode their payload on first access.
+
+  Returns:
+    The episodes; for single-stream files, the pickled object as is unless
+    fields is given.
+  """
+  with open(filename, 'rb') as f:
+    codec, index = checkpoint_codecs.read_index(f)
+    if index is None:
+      with codec.reader(f) as stream:
+        episodes = pickle.load(stream)
+    else:
+      heads = checkpoint_codecs.load_section(f, codec, *index[0])
+      episodes = []
+      for (metadata, keys), section in zip(heads, index[1:]):
+        payload_keys = [k for k in keys if k not in metadata]
+        wanted = keys if fields is None else fields
+        if not any(k in payload_keys for k in wanted):
+          episodes.append({k: metadata[k] for k in keys if k in metadata})
+        elif lazy and fields is None:
+          episodes.append(
+              LazyEpisode(metadata, keys, filename, section, codec.name)
+          )
+        else:
+          payload = checkpoint_codecs.load_section(f, codec, *section)
+          episode = metadata | payload
+          episodes.append({k: episode[k] for k in keys})
+  if fields is not None:
+    episodes = [
+        {field: episode[field] for field in fields} for episode in episodes
+    ]
+  return episodes
+
+
+def read_episode_metadata(
+    filename: str, fields: Sequence[str]
+) -> list[Episode]:
+  """Reads fields of every episode in a task group file.
+
+  Payload sections are not decoded unless a payload field is requested.
+
+  Args:
+    filename: A task group blob, e.g. `{run_dir}/{task_name}.pkl.gz`.
+    fields: The fields to read. Fields an episode does not have are None.
+
+  Returns:
+    One dict of fields per episode.
+  """
+  episodes = _read_episodes(filename, lazy=True)
+  return [
+      {field: episode.get(field) for field in fields} for episode in episodes
+  ]
 
-def _unzip_and_read_pickle(file_path: str) -> Any:
-  """Reads a gzipped pickle file using 'with open', unzips, and unpickles it.
+
+class LazyEpisode(collections.abc.MutableMapping):
+  """An episode whose payload fields are read from disk on first access.
+
+  Metadata fields (e.g. `goal`, `is_successful`, `run_time`) are held in memory.
+  Accessing any payload field (e.g. `episode_data`) decodes that episode's
+  payload section of its checkpoint file once. Otherwise behaves like the dict
+  that was saved; `to_dict` materializes it.
+  """
+
+  def __init__(
+      self,
+      metadata: Episode,
+      keys: Sequence[str],
+      filename: str,
+      section: tuple[int, int],
+      codec_name: str,
+  ) -> None:
+    self._metadata = metadata
+    self._keys = list(keys)
+    self._filename = filename
+    self._section = section
+    self._codec_name = codec_name
+    self._payload: Episode | None = None
+    self._images: image_store.ImageStore | None = None
+    self._resolve_images = False
+
+  @property
+  def payload_loaded(self) -> bool:
+    return self._payload is not None
+
+  def bind_images(
+      self, images: image_store.ImageStore, resolve: bool = False
+  ) -> None:
+    """Sets the store that image refs in the payload are read from.
+
+    Args:
+      images: The image store.
+      resolve: Whether to replace the refs with their images when the payload
+        is decoded, instead of reading each on first access.
+    """
+    self._images = images
+    self._resolve_images = resolve
+    if self._payload is not None:
+      self._payload = self._bind_payload(self._payload)
+
+  def _bind_payload(self, payload: Episode) -> Episode:
+    if self._resolve_images:
+      return self._images.resolve(payload)
+    self._images.bind(payload)
+    return payload
+
+  def _load_payload(self) -> Episode:
+    if self._payload is None:
+      with open(self._filename, 'rb') as f:
+        self._payload = checkpoint_codecs.load_section(
+            f, checkpoint_codecs.get_codec(self._codec_name), *self._section
+        )
+      if self._images is not None:
+        self._payload = self._bind_payload(self._payload)
+    return self._payload
+
+  def __getitem__(self, key: str) -> Any:
+    if key in self._metadata:
+      return self._metadata[key]
+    if key in self._keys:
+      return self._load_payload()[key]
+    raise KeyError(key)
+
+  def __setitem__(self, key: str, value: Any) -> None:
+    if key in self._keys and key not in self._metadata:
+      self._load_payload()[key] = value
+    else:
+      self._metadata[key] = value
+      if key not in self._keys:
+        self._keys.append(key)
+
+  def __delitem__(self, key: str) -> None:
+    if key in self._metadata:
+      del self._metadata[key]
+    elif key in self._keys:
+      del self._load_payload()[key]
+    else:
+      raise KeyError(key)
+    self._keys.remove(key)
+
+  def __iter__(self) -> Iterator[str]:
+    return iter(list(self._keys))
+
+  def __len__(self) -> int:
+    return len(self._keys)
+
+  def __contains__(self, key: object) -> bool:
+    # Avoids decoding the payload, unlike the `Mapping` default.
+    return key in self._keys
+
+  def __repr__(self) -> str:
+    state = 'loaded' if self.payload_loaded else 'not loaded'
+    return f'LazyEpisode({self._metadata!r}, payload {state})'
+
+  def to_dict(self) -> Episode:
+    return {k: self[k] for k in self._keys}
+
+
+def _read_task_group(
+    filename: str, fields: list[str] | None, lazy: bool = False
+) -> tuple[list[Episode] | None, str | None]:
+  """Reads a task group and projects it onto fields.
+
+  Runs in `IncrementalCheckpointer.load` worker processes, so errors are
+  returned rather than raised.
 
   Args:
-      file_path: The path to the gzipped pickle file.
+    filename: The task group's blob.
+    fields: If provided, only these fields of each episode are kept.
+    lazy: Whether to return `LazyEpisode`s; see `_read_episodes`.
 
   Returns:
-      The original Python object that was pickled and gzipped.
+    The task group, or None, and the error that prevented reading it, if any.
   """
-  with open(file_path, 'rb') as f:
-    compressed = f.read()
+  try:
+    task_group = _read_episodes(filename, fields, lazy)
+  except FileNotFoundError:
+    logging.info(
+        'File not readable: %s. It may not exist. Starting from empty state.',
+        filename,
+    )
+    return [], None
+  except Exception as e:  # pylint: disable=broad-exception-caught
+    return None, repr(e)
+  return task_group, None
+
+
+def _is_json_value(value: Any) -> bool:
+  """Returns whether a value survives a JSON round trip unchanged."""
+  if value is None or isinstance(value, (bool, int, float, str)):
+    return True
+  if isinstance(value, list):
+    return all(_is_json_value(v) for v in value)
+  if isinstance(value, dict):
+    return all(
+        isinstance(k, str) and _is_json_value(v) for k, v in value.items()
+    )
+  return False
+
+
+def _manifest_fields(episode: Episode) -> Episode:
+  """Returns the small, JSON-serializable fields of an episode."""
+  fields = {}
+  for key, value in episode.items():
+    if not _is_json_value(value):
+      continue
+    try:
+      encoded = json.dumps(value)
+    except (TypeError, ValueError):
+      continue
+    if len(encoded) <= _MAX_MANIFEST_VALUE_BYTES:
+      fields[key] = value
+  return fields
+
+
+def _write_temp_file(filename: str, write_fn: Callable[[Any], None]) -> str:
+  """Writes a temporary file next to filename, to be renamed over it.
+
+  Args:
+    filename: The file that the temporary file will replace.
+    write_fn: Called with the open, binary temporary file.
+
+  Returns:
+    The name of the temporary file, synced to disk.
+  """
+  directory, basename = os.path.split(filename)
+  fd, tmp_filename = tempfile.mkstemp(
+      prefix=f'.{basename}.', suffix='.tmp', dir=directory
+  )
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      write_fn(f)
+      f.flush()
+      os.fsync(f.fileno())
+  except BaseException:
+    os.remove(tmp_filename)
+    raise
+  return tmp_filename
+
+
+class StepLog:
+  """Appends the steps of a single episode to a file as they are produced.
+
+  Used as the `step_sink` of `episode_runner.run_episode`, so the steps of an
+  episode survive a crash before the episode is saved. Each step is stored as
+  a length-prefixed pickle, compressed with `codec` and preceded by its header
+  (see `checkpoint_codecs.dump`); `read_step_log` reads them back.
+
+  Attributes:
+    filename: The file the steps are written to.
+  """
+
+  def __init__(
+      self,
+      filename: str,
+      images: image_store.ImageStore | None = None,
+      codec: checkpoint_codecs.Codec = checkpoint_codecs.GzipCodec(),
+      return_refs: bool = False,
+  ) -> None:
+    """Initializes the log.
+
+    Args:
+      filename: The file to write the steps to.
+      images: If provided, images in steps are written to this store, and the
+        log keeps refs to them.
+      codec: The codec that compresses each step.
+      return_refs: Whether to return the steps with their images replaced by
+        refs, so that the caller keeps the refs instead of the arrays. Off by
+        default, since callers of `run_episode` expect arrays in its step data.
+    """
+    self.filename = filename
+    self._images = images
+    self._codec = codec
+    self._return_refs = return_refs
+    self._file = open(filename, 'wb')
+
+  def __call__(self, step: dict[str, Any]) -> dict[str, Any] | None:
+    """Appends a step to the log.
+
+    Args:
+      step: The data of one step.
+
+    Returns:
+      With `return_refs`, the step as written, with its images replaced by
+      refs, so the caller does not need to keep the arrays in memory.
+      Otherwise None, so the caller keeps step unchanged.
+    """
+    written = step
+    if self._images is not None:
+      written = self._images.externalize(step)
+    buffer = io.BytesIO()
+    checkpoint_codecs.dump(written, buffer, self._codec)
+    record = buffer.getvalue()
+    self._file.write(_STEP_RECORD_HEADER.pack(len(record)) + record)
+    self._file.flush()
+    os.fsync(self._file.fileno())
+    return written if self._return_refs else None
+
+  def close(self) -> None:
+    self._file.close()
+
+  def discard(self) -> None:
+    """Closes the log and removes its file, e.g. for a rejected episode."""
+    self.close()
+    try:
+      os.remove(self.filename)
+    except FileNotFoundError:
+      pass
+
 
-  with gzip.open(io.BytesIO(compressed), 'rb') as f_in:
-    return pickle.load(f_in)
+def read_step_log(filename: str) -> list[dict[str, Any]]:
+  """Reads the steps written by a `StepLog`.
+
+  A record cut short by a crash ends the log; the steps before it are returned.
+
+  Args:
+    filename: The step log to read.
+
+  Returns:
+    The steps in the order they were written.
+  """
+  steps = []
+  with open(filename, 'rb') as f:
+    while True:
+      header = f.read(_STEP_RECORD_HEADER.size)
+      if len(header) < _STEP_RECORD_HEADER.size:
+        break
+      (length,) = _STEP_RECORD_HEADER.unpack(header)
+      record = f.read(length)
+      if len(record) < length:
+        logging.info('Ignoring truncated step record in %s', filename)
+        break
+      # Logs written before step records had headers are plain gzip.
+      steps.append(checkpoint_codecs.load(io.BytesIO(record)))
+  return steps
 
 
 class Checkpointer(abc.ABC):
@@ -99,6 +488,15 @@ class Checkpointer(abc.ABC):
   def load(self, fields: list[str] | None = None) -> list[Episode]:
     """Loads all episodes from disk."""
 
+  def open_step_log(self, task_name: str) -> StepLog | None:
+    """Returns a sink for the steps of an episode in progress, if supported.
+
+    Args:
+      task_name: The task group the episode will be saved to.
+    """
+    del task_name
+    return None
+
 
 class IncrementalCheckpointer(Checkpointer):
   """Saves and loads the results of an evaluation run.
@@ -107,13 +505,111 @@ class IncrementalCheckpointer(Checkpointer):
   checkpointer to save the results of an evaluation run task by task, rather
   than saving the entire dataset at once.
 
+  Each task group is stored as its own `{task_name}.pkl.gz` blob, written with
+  an atomic rename. Alongside the blobs, an append-only `manifest.jsonl` keeps
+  the small, JSON-serializable fields of every saved episode. Loading a subset
+  of fields (e.g. to resume a run) is served from the manifest without
+  decompressing the blobs; task groups missing from the manifest, or whose blob
+  changed after its manifest record was written, are read from the blob.
+
+  Blobs are pickles streamed through `codec` (see `checkpoint_codecs`); the
+  codec is recorded in each file's header, so directories that mix codecs, or
+  hold blobs written before codecs existed, load transparently.
+
+  With `store_images`, image arrays in episodes (e.g. screenshots in
+  `episode_data`) are moved to a content-addressed `ImageStore` under
+  `images/`, so identical frames are written once as lossless PNGs, and the
+  blobs keep `ImageRef`s. Loading turns the refs back into arrays, unless
+  `image_refs` is passed to keep them as refs that read their image on first
+  access.
+
+  With `stream_steps`, `open_step_log` returns a `StepLog` that appends each
+  step of a running episode to `{task_name}.steps`. The log is removed once
+  the episode is saved; if the run crashes first, `load_steps` recovers the
+  steps that were completed. The episode's step data keeps its arrays unless
+  `step_image_refs` is set, in which case the images written to the log are
+  replaced by refs as each step completes, to save memory.
+
+  Blob replacement and the manifest append happen under an exclusive file lock,
+  so several processes can write to the same directory. On platforms without
+  `fcntl` the lock only covers threads of the current process.
+
   Attributes:
       directory: The directory to store the task data.
   """
 
-  def __init__(self, directory: str) -> None:
+  def __init__(
+      self,
+      directory: str,
+      store_images: bool = True,
+      stream_steps: bool = False,
+      codec: str = checkpoint_codecs.GzipCodec.name,
+      step_image_refs: bool = False,
+  ) -> None:
     self.directory = directory
+    self._codec = checkpoint_codecs.get_codec(codec)
     os.makedirs(directory, exist_ok=True)
+    self._thread_lock = threading.Lock()
+    self._store_images = store_images
+    self._stream_steps = stream_steps
+    self._step_image_refs = step_image_refs
+    self._image_store = image_store.ImageStore(
+        os.path.join(directory, image_store.IMAGES_DIRNAME)
+    )
+
+  def _blob_filename(self, task_name: str) -> str:
+    return os.path.join(self.directory, f'{task_name}{_EPISODES_SUFFIX}')
+
+  def _steps_filename(self, task_name: str) -> str:
+    return os.path.join(self.directory, f'{task_name}{_STEPS_SUFFIX}')
+
+  def open_step_log(self, task_name: str) -> StepLog | None:
+    """Starts a new step log for task_name if streaming steps is enabled."""
+    if not self._stream_steps:
+      return None
+    return StepLog(
+        self._steps_filename(task_name),
+        self._image_store if self._store_images else None,
+        codec=self._codec,
+        return_refs=self._step_image_refs,
+    )
+
+  def load_steps(
+      self, task_name: str, image_refs: bool = False
+  ) -> dict[str, list[Any]]:
+    """Loads the streamed steps of an episode that was not saved.
+
+    Args:
+      task_name: The task group of the episode.
+      image_refs: Whether to return stored images as `ImageRef`s instead of
+        arrays.
+
+    Returns:
+      The step data, laid out like `EpisodeResult.step_data`; empty if there is
+      no step log for task_name.
+    """
+    try:
+      steps = read_step_log(self._steps_filename(task_name))
+    except FileNotFoundError:
+      return {}
+    if image_refs:
+      self._image_store.bind(steps)
+    else:
+      steps = self._image_store.resolve(steps)
+    return episode_runner.transpose_lod_to_dol(steps)
+
+  def _write_locked(self, fn: Callable[[], None]) -> None:
+    """Calls fn while holding the directory's exclusive write lock."""
+    with self._thread_lock:
+      lock_filename = os.path.join(self.directory, _MANIFEST_LOCK_FILENAME)
+      with open(lock_filename, 'a') as lock_file:
+        if fcntl is not None:
+          fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+          fn()
+        finally:
+          if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
   def save_episodes(self, task_episodes: list[Episode], task_name: str):
     """Saves a task group to disk.
@@ -122,45 +618,177 @@ class IncrementalCheckpointer(Checkpointer):
         task_episodes: The task's episodes to save.
         task_name: The unique identifier for the task group.
     """
-    filename = os.path.join(self.directory, f'{task_name}.pkl.gz')
-    with open(filename, 'wb') as f:
-      compressed = _gzip_pickle(task_episodes)
-      f.write(compressed)
+    filename = self._blob_filename(task_name)
+    if self._store_images:
+      task_episodes = self._image_store.externalize(task_episodes)
+    # Compress outside of the lock; only the rename is serialized.
+    tmp_filename = _write_temp_file(
+        filename,
+        lambda f: _dump_episodes(task_episodes, f, self._codec),
+    )
+    episode_fields = [_manifest_fields(episode) for episode in task_episodes]
+
+    def write():
+      os.replace(tmp_filename, filename)
+      stat = os.stat(filename)
+      record = {
+          'task_name': task_name,
+          'size': stat.st_size,
+          'mtime_ns': stat.st_mtime_ns,
+          'episodes': episode_fields,
+      }
+      line = (json.dumps(record) + '\n').encode()
+      manifest = os.path.join(self.directory, MANIFEST_FILENAME)
+      fd = os.open(manifest, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+      try:
+        # Terminate a line left incomplete by a crashed writer, so it does not
+        # swallow this record.
+        end = os.lseek(fd, 0, os.SEEK_END)
+        if end and os.lseek(fd, -1, os.SEEK_END) and os.read(fd, 1) != b'\n':
+          line = b'\n' + line
+        os.write(fd, line)
+      finally:
+        os.close(fd)
+
+    try:
+      self._write_locked(write)
+    finally:
+      if os.path.exists(tmp_filename):
+        os.remove(tmp_filename)
     logging.info('Wrote task episodes for %s to %s', task_name, filename)
+    # The saved episodes supersede the steps streamed while they ran.
+    try:
+      os.remove(self._steps_filename(task_name))
+    except FileNotFoundError:
+      pass
 
-  def load(self, fields: list[str] | None = None) -> list[Episode]:
-    """Loads all task groups from disk."""
-    # Keep same order as runtime.
+  def load_manifest(self) -> dict[str, dict[str, Any]]:
+    """Loads the latest manifest record of each task group.
+
+    Returns:
+      A mapping from task group to its most recent manifest record. Records
+      that cannot be parsed, e.g. a line truncated by a crash, are skipped.
+    """
+    records = {}
+    try:
+      with open(os.path.join(self.directory, MANIFEST_FILENAME), 'rb') as f:
+        for line in f:
+          try:
+            record = json.loads(line)
+          except ValueError:
+            logging.info(
+                'Skipping unreadable manifest line in %s', self.directory
+            )
+            continue
+          records[record['task_name']] = record
+    except FileNotFoundError:
+      pass
+    return records
+
+  def _load_from_manifest(
+      self,
+      task_group_id: str,
+      record: dict[str, Any] | None,
+      fields: list[str],
+  ) -> list[Episode] | None:
+    """Returns the fields of a task group from its manifest record, if valid."""
+    if record is None:
+      return None
+    try:
+      stat = os.stat(self._blob_filename(task_group_id))
+    except FileNotFoundError:
+      return None
+    if (stat.st_size, stat.st_mtime_ns) != (record['size'], record['mtime_ns']):
+      # The blob was rewritten without a matching manifest record.
+      return None
+    episodes = record['episodes']
+    if not all(field in episode for episode in episodes for field in fields):
+      return None
+    return [{field: episode[field] for field in fields} for episode in episodes]
+
+  def load(
+      self,
+      fields: list[str] | None = None,
+      workers: int = 1,
+      lazy: bool = False,
+      image_refs: bool = False,
+  ) -> list[Episode]:
+    """Loads all task groups from disk.
+
+    Args:
+      fields: If provided, only these fields of each episode are returned. They
+        are read from the manifest when it has them.
+      workers: Number of processes that decode task groups. With more than one,
+        blobs are decompressed and unpickled in a process pool, and `fields` is
+        applied in the workers so only the projected data is sent back.
+      lazy: If True, episodes are returned as `LazyEpisode`s whose payload
+        (`episode_data`) is decoded on first access, so e.g. success rates can
+        be computed without decompressing screenshots. Episodes saved before
+        payloads were stored separately are returned as dicts.
+      image_refs: Whether to return images saved to the image store as
+        `ImageRef`s, which read their image on first access, instead of arrays.
+
+    Returns:
+      The episodes of all task groups, in run order.
+    """
+    # Keep same order as runtime. The instance number is only parsed without
+    # the extension.
     directories = os.listdir(self.directory)
-    directories.sort(key=sort_key)
+    directories.sort(key=lambda f: sort_key(f.removesuffix(_EPISODES_SUFFIX)))
+    manifest = self.load_manifest() if fields is not None else {}
 
-    data = []
+    task_groups: list[list[Episode] | None] = []
+    pending: list[tuple[int, str]] = []
     for filename in directories:
-      if filename.endswith('.pkl.gz'):
-        try:
-          task_group_id = filename[:-7]  # Remove ".pkl.gz" extension
-          task_group = self._load_task_group(task_group_id)
-          if fields is not None:
-            task_group = [
-                {field: episode[field] for field in fields}
-                for episode in task_group
-            ]
-          data.extend(task_group)
-        except Exception as e:  # pylint: disable=broad-exception-caught
-          logging.info('Unable to load %s with exception: %s', filename, e)
-    return data
+      if not filename.endswith(_EPISODES_SUFFIX):
+        continue
+      task_group = None
+      if fields is not None:
+        task_group_id = filename[: -len(_EPISODES_SUFFIX)]
+        task_group = self._load_from_manifest(
+            task_group_id, manifest.get(task_group_id), fields
+        )
+      if task_group is None:
+        pending.append(
+            (len(task_groups), os.path.join(self.directory, filename))
+        )
+      task_groups.append(task_group)
+
+    filenames = [filename for _, filename in pending]
+    if workers > 1 and len(pending) > 1:
+      with futures.ProcessPoolExecutor(
+          max_workers=min(workers, len(pending))
+      ) as executor:
+        results = list(
+            executor.map(
+                _read_task_group,
+                filenames,
+                itertools.repeat(fields),
+                itertools.repeat(lazy),
+                chunksize=max(1, len(pending) // (4 * workers)),
+            )
+        )
+    else:
+      results = [_read_task_group(f, fields, lazy) for f in filenames]
+
+    for (index, filename), (task_group, error) in zip(pending, results):
+      if error is not None:
+        logging.info('Unable to load %s with exception: %s', filename, error)
+        continue
+      if image_refs:
+        self._image_store.bind(task_group)
+      else:
+        task_group = self._image_store.resolve(task_group)
+      for episode in task_group:
+        if isinstance(episode, LazyEpisode):
+          episode.bind_images(self._image_store, resolve=not image_refs)
+      task_groups[index] = task_group
 
-  def _load_task_group(self, task_group_id: str) -> list[Episode]:
-    """Loads a single task group from disk."""
-    filename = os.path.join(self.directory, f'{task_group_id}.pkl.gz')
-    try:
-      return _unzip_and_read_pickle(filename)
-    except FileNotFoundError:
-      logging.info(
-          'File not readable: %s. It may not exist. Starting from empty state.',
-          filename,
-      )
-      return []
+    data = []
+    for task_group in task_groups:
+      if task_group is not None:
+        data.extend(task_group)
+    return data
 
 
 class NullCheckpointer(Checkpointer):
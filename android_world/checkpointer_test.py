@@ -14,8 +14,16 @@
 
 import os
 import tempfile
+import threading
+from unittest import mock
+
 from absl.testing import absltest
+from android_world import checkpoint_codecs
 from android_world import checkpointer
+from android_world import episode_runner
+from android_world import image_store
+from android_world.agents import base_agent
+import numpy as np
 
 
 class CheckpointerTest(absltest.TestCase):
@@ -85,6 +93,336 @@ class CheckpointerTest(absltest.TestCase):
     expected_data = [{'key1': 'value1'}]
     self.assertEqual(expected_data, loaded_data)
 
+  def test_load_fields_uses_manifest(self) -> None:
+    """Tests that loading fields does not read the episode blobs."""
+    task_group = [{'key1': 'value1', 'screenshot': np.zeros((4, 4))}]
+    self.checkpointer.save_episodes(task_group, 'task_group')
+    with mock.patch.object(
+        checkpointer, '_read_episodes', autospec=True
+    ) as mock_read:
+      loaded_data = self.checkpointer.load(fields=['key1'])
+    mock_read.assert_not_called()
+    self.assertEqual([{'key1': 'value1'}], loaded_data)
+
+  def test_load_fields_not_in_manifest_reads_blob(self) -> None:
+    """Tests that fields missing from the manifest are read from the blob."""
+    task_group = [{'key1': 'value1', 'screenshot': np.ones((2, 2))}]
+    self.checkpointer.save_episodes(task_group, 'task_group')
+    loaded_data = self.checkpointer.load(fields=['key1', 'screenshot'])
+    self.assertLen(loaded_data, 1)
+    self.assertEqual('value1', loaded_data[0]['key1'])
+    np.testing.assert_array_equal(np.ones((2, 2)), loaded_data[0]['screenshot'])
+
+  def test_load_fields_without_manifest(self) -> None:
+    """Tests that runs written before the manifest existed still resume."""
+    self.checkpointer.save_episodes([{'key1': 'value1'}], 'task_group')
+    os.remove(os.path.join(self.temp_dir.name, checkpointer.MANIFEST_FILENAME))
+    loaded_data = self.checkpointer.load(fields=['key1'])
+    self.assertEqual([{'key1': 'value1'}], loaded_data)
+
+  def test_stale_manifest_record_is_ignored(self) -> None:
+    """Tests that a blob rewritten without a manifest record is re-read."""
+    self.checkpointer.save_episodes([{'key1': 'old'}], 'task_group')
+    with open(
+        os.path.join(self.temp_dir.name, 'task_group.pkl.gz'), 'wb'
+    ) as f:
+      f.write(checkpointer._gzip_pickle([{'key1': 'new value'}]))
+    loaded_data = self.checkpointer.load(fields=['key1'])
+    self.assertEqual([{'key1': 'new value'}], loaded_data)
+
+  def test_truncated_manifest_line_is_skipped(self) -> None:
+    """Tests that a partially written manifest line does not break loading."""
+    self.checkpointer.save_episodes([{'key1': 'value1'}], 'task_group1')
+    with open(
+        os.path.join(self.temp_dir.name, checkpointer.MANIFEST_FILENAME), 'a'
+    ) as f:
+      f.write('{"task_name": "task_gr')
+    self.checkpointer.save_episodes([{'key1': 'value2'}], 'task_group2')
+    self.assertCountEqual(
+        ['task_group1', 'task_group2'], self.checkpointer.load_manifest()
+    )
+
+  def test_save_leaves_no_temporary_files(self) -> None:
+    """Tests that atomic writes clean up after themselves."""
+    self.checkpointer.save_episodes([{'key': 'value'}], 'task_group')
+    self.assertCountEqual(
+        os.listdir(self.temp_dir.name),
+        ['task_group.pkl.gz', 'manifest.jsonl', 'manifest.lock'],
+    )
+
+  def test_concurrent_writers(self) -> None:
+    """Tests that writers sharing a directory keep the manifest valid."""
+    writers = [
+        checkpointer.IncrementalCheckpointer(self.temp_dir.name)
+        for _ in range(4)
+    ]
+
+    def write(writer_id: int) -> None:
+      for i in range(10):
+        writers[writer_id].save_episodes(
+            [{'key': f'{writer_id}_{i}'}], f'task{writer_id}_{i}'
+        )
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    self.assertLen(self.checkpointer.load_manifest(), 40)
+    loaded_data = self.checkpointer.load(fields=['key'])
+    self.assertCountEqual(
+        [{'key': f'{w}_{i}'} for w in range(4) for i in range(10)],
+        loaded_data,
+    )
+
+  def test_images_are_stored_once_and_loaded_as_arrays(self) -> None:
+    """Tests that screenshots move to the image store and load as arrays."""
+    frame = np.random.default_rng(0).integers(
+        0, 256, (64, 48, 3), dtype=np.uint8
+    )
+    task_group = [
+        {'episode_data': {'raw_screenshot': [frame, frame.copy(), None]}}
+    ]
+    self.checkpointer.save_episodes(task_group, 'task_group')
+
+    image_dir = os.path.join(self.temp_dir.name, image_store.IMAGES_DIRNAME)
+    num_images = sum(len(files) for _, _, files in os.walk(image_dir))
+    self.assertEqual(1, num_images)
+
+    (loaded,) = self.checkpointer.load()
+    screenshots = loaded['episode_data']['raw_screenshot']
+    self.assertIsInstance(screenshots[0], np.ndarray)
+    self.assertIsNot(screenshots[0], screenshots[1])
+    self.assertIsNone(screenshots[2])
+    np.testing.assert_array_equal(frame, screenshots[1])
+
+  def test_images_loaded_lazily_as_refs(self) -> None:
+    """Tests that stored screenshots load on access with `image_refs`."""
+    frame = np.random.default_rng(0).integers(
+        0, 256, (64, 48, 3), dtype=np.uint8
+    )
+    self.checkpointer.save_episodes([{'screenshot': frame}], 'task_group')
+
+    (loaded,) = self.checkpointer.load(image_refs=True)
+    self.assertIsInstance(loaded['screenshot'], image_store.ImageRef)
+    np.testing.assert_array_equal(frame, np.asarray(loaded['screenshot']))
+
+  def test_store_images_disabled(self) -> None:
+    """Tests that images stay inline when the image store is disabled."""
+    inline_checkpointer = checkpointer.IncrementalCheckpointer(
+        self.temp_dir.name, store_images=False
+    )
+    frame = np.ones((64, 48, 3), dtype=np.uint8)
+    inline_checkpointer.save_episodes([{'screenshot': frame}], 'task_group')
+    (loaded,) = inline_checkpointer.load()
+    self.assertIsInstance(loaded['screenshot'], np.ndarray)
+    np.testing.assert_array_equal(frame, loaded['screenshot'])
+
+  def test_step_log_round_trip(self) -> None:
+    """Tests that streamed steps load in the layout of `run_episode`."""
+    streaming = checkpointer.IncrementalCheckpointer(
+        self.temp_dir.name, stream_steps=True, step_image_refs=True
+    )
+    frame = np.random.default_rng(0).integers(
+        0, 256, (64, 48, 3), dtype=np.uint8
+    )
+    steps = [
+        {'action': 'click', 'raw_screenshot': frame, 'step_number': 0},
+        {'action': 'wait', 'raw_screenshot': frame, 'step_number': 1},
+    ]
+    step_log = streaming.open_step_log('task_0')
+    kept = [step_log(step) for step in steps]
+    step_log.close()
+
+    self.assertIsInstance(kept[0]['raw_screenshot'], image_store.ImageRef)
+    step_data = streaming.load_steps('task_0')
+    self.assertEqual(['click', 'wait'], step_data['action'])
+    self.assertEqual([0, 1], step_data['step_number'])
+    np.testing.assert_array_equal(
+        frame, np.asarray(step_data['raw_screenshot'][1])
+    )
+
+  def test_streamed_episode_keeps_arrays_by_default(self) -> None:
+    """Tests that the episode returned while streaming holds the screenshots."""
+    streaming = checkpointer.IncrementalCheckpointer(
+        self.temp_dir.name, stream_steps=True
+    )
+    frame = np.ones((64, 48, 3), dtype=np.uint8)
+    agent = mock.create_autospec(
+        base_agent.EnvironmentInteractingAgent, instance=True
+    )
+    agent.step.return_value = base_agent.AgentInteractionResult(
+        done=True, data={'raw_screenshot': frame}
+    )
+
+    step_log = streaming.open_step_log('task_0')
+    self.addCleanup(step_log.close)
+    result = episode_runner.run_episode('goal', agent, step_sink=step_log)
+
+    (screenshot,) = result.step_data['raw_screenshot']
+    self.assertIs(frame, screenshot)
+    np.testing.assert_array_equal(
+        frame, streaming.load_steps('task_0')['raw_screenshot'][0]
+    )
+
+  def test_truncated_step_log_keeps_complete_steps(self) -> None:
+    """Tests that a step cut short by a crash is dropped."""
+    streaming = checkpointer.IncrementalCheckpointer(
+        self.temp_dir.name, stream_steps=True
+    )
+    step_log = streaming.open_step_log('task_0')
+    step_log({'action': 'click'})
+    step_log({'action': 'wait'})
+    step_log.close()
+    size = os.path.getsize(step_log.filename)
+    with open(step_log.filename, 'r+b') as f:
+      f.truncate(size - 3)
+
+    self.assertEqual({'action': ['click']}, streaming.load_steps('task_0'))
+
+  def test_step_log_uses_checkpointer_codec(self) -> None:
+    """Tests that step records are compressed with the configured codec."""
+
+    class FastGzipCodec(checkpoint_codecs.GzipCodec):
+      name = 'fast_gzip'
+
+    codec = FastGzipCodec(level=1)
+    with mock.patch.dict(checkpoint_codecs.CODECS, {codec.name: codec}):
+      streaming = checkpointer.IncrementalCheckpointer(
+          self.temp_dir.name, stream_steps=True, codec=codec.name
+      )
+      step_log = streaming.open_step_log('task_0')
+      step_log({'action': 'click'})
+      step_log.close()
+
+      with open(step_log.filename, 'rb') as f:
+        f.seek(checkpointer._STEP_RECORD_HEADER.size)
+        self.assertIs(codec, checkpoint_codecs.read_header(f))
+      self.assertEqual({'action': ['click']}, streaming.load_steps('task_0'))
+
+  def test_legacy_gzip_step_log_loads(self) -> None:
+    """Tests that step logs written before records had headers still load."""
+    streaming = checkpointer.IncrementalCheckpointer(
+        self.temp_dir.name, stream_steps=True
+    )
+    record = checkpointer._gzip_pickle({'action': 'click'})
+    with open(streaming._steps_filename('task_0'), 'wb') as f:
+      f.write(checkpointer._STEP_RECORD_HEADER.pack(len(record)) + record)
+
+    self.assertEqual({'action': ['click']}, streaming.load_steps('task_0'))
+
+  def test_save_episodes_removes_step_log(self) -> None:
+    """Tests that the step log is dropped once its episode is saved."""
+    streaming = checkpointer.IncrementalCheckpointer(
+        self.temp_dir.name, stream_steps=True
+    )
+    step_log = streaming.open_step_log('task_0')
+    step_log({'action': 'click'})
+    step_log.close()
+    streaming.save_episodes([{'key': 'value'}], 'task_0')
+
+    self.assertFalse(os.path.exists(step_log.filename))
+    self.assertEqual({}, streaming.load_steps('task_0'))
+
+  def test_step_log_disabled_by_default(self) -> None:
+    self.assertIsNone(self.checkpointer.open_step_log('task_0'))
+    self.assertIsNone(checkpointer.NullCheckpointer().open_step_log('task_0'))
+
+  def test_load_with_workers_matches_serial_load(self) -> None:
+    """Tests that a process pool returns the same episodes in the same order."""
+    for i in range(12):
+      self.checkpointer.save_episodes(
+          [{'key': i, 'value': str(i)}, {'key': i, 'value': 'second'}],
+          f'Task_{i}',
+      )
+    with open(os.path.join(self.temp_dir.name, 'Bad_0.pkl.gz'), 'wb') as f:
+      f.write(b'corrupt')
+
+    serial = self.checkpointer.load()
+    parallel = self.checkpointer.load(workers=3)
+
+    self.assertLen(serial, 24)
+    self.assertEqual(serial, parallel)
+    self.assertEqual(list(range(12)), [e['key'] for e in parallel[::2]])
+
+  def test_load_fields_with_workers_projects_in_workers(self) -> None:
+    """Tests that fields are applied to blobs decoded by the workers."""
+    for i in range(4):
+      self.checkpointer.save_episodes(
+          [{'key': i, 'screenshot': np.zeros((2, 2))}], f'Task_{i}'
+      )
+    loaded_data = self.checkpointer.load(
+        fields=['key', 'screenshot'], workers=2
+    )
+    self.assertEqual([0, 1, 2, 3], [e['key'] for e in loaded_data])
+    self.assertCountEqual(['key', 'screenshot'], loaded_data[0].keys())
+
+  def test_load_lazy_defers_episode_data(self) -> None:
+    """Tests that lazy episodes decode their payload on first access."""
+    episode = {
+        'goal': 'goal',
+        'episode_data': {'step_number': [0, 1]},
+        'is_successful': 1.0,
+    }
+    self.checkpointer.save_episodes([episode], 'Task_0')
+
+    (loaded,) = self.checkpointer.load(lazy=True)
+
+    self.assertIsInstance(loaded, checkpointer.LazyEpisode)
+    self.assertEqual('goal', loaded['goal'])
+    self.assertIn('episode_data', loaded)
+    self.assertFalse(loaded.payload_loaded)
+    self.assertEqual({'step_number': [0, 1]}, loaded['episode_data'])
+    self.assertTrue(loaded.payload_loaded)
+    self.assertEqual(list(episode), list(loaded))
+    self.assertEqual(episode, loaded.to_dict())
+
+  def test_load_lazy_decodes_images_with_payload(self) -> None:
+    """Tests that lazy payloads hold arrays rather than image refs."""
+    frame = np.ones((64, 48, 3), dtype=np.uint8)
+    self.checkpointer.save_episodes(
+        [{'goal': 'goal', 'episode_data': {'raw_screenshot': [frame]}}],
+        'Task_0',
+    )
+
+    (loaded,) = self.checkpointer.load(lazy=True)
+
+    (screenshot,) = loaded['episode_data']['raw_screenshot']
+    self.assertIsInstance(screenshot, np.ndarray)
+    np.testing.assert_array_equal(frame, screenshot)
+
+  def test_load_fields_skips_payload_section(self) -> None:
+    """Tests that metadata fields are read without decoding the payload."""
+    self.checkpointer.save_episodes(
+        [{'goal': 'goal', 'episode_data': {'step_number': [0]}}], 'Task_0'
+    )
+    os.remove(os.path.join(self.temp_dir.name, checkpointer.MANIFEST_FILENAME))
+    with mock.patch.object(
+        checkpointer.checkpoint_codecs,
+        'load_section',
+        autospec=True,
+        side_effect=checkpointer.checkpoint_codecs.load_section,
+    ) as mock_load_section:
+      loaded_data = self.checkpointer.load(fields=['goal'])
+
+    self.assertEqual([{'goal': 'goal'}], loaded_data)
+    # Only the metadata section.
+    mock_load_section.assert_called_once()
+
+  def test_load_lazy_with_workers(self) -> None:
+    """Tests that lazy episodes returned by worker processes still load."""
+    for i in range(3):
+      self.checkpointer.save_episodes(
+          [{'instance_id': i, 'episode_data': {'step_number': [i]}}],
+          f'Task_{i}',
+      )
+    loaded_data = self.checkpointer.load(workers=2, lazy=True)
+    self.assertEqual(
+        [[0], [1], [2]],
+        [e['episode_data']['step_number'] for e in loaded_data],
+    )
+
 
 if __name__ == '__main__':
   absltest.main()
@@ -30,6 +30,7 @@ def execute_adb_action(
     screen_elements: list[Any],  # list[UIElement]
     screen_size: tuple[int, int],
     env: env_interface.AndroidEnvInterface,
+    paste_threshold: int | None = None,
 ) -> None:
   """Execute an action based on a JSONAction object.
 
@@ -38,6 +39,8 @@ def execute_adb_action(
       screen_elements: List of UI elements on the screen.
       screen_size: The (width, height) of the screen.
       env: The environment to execute the action in.
+      paste_threshold: Length from which input text is pasted from the
+        clipboard instead of typed; see `adb_utils.type_text`.
   """
   if action.action_type in ['click', 'double_tap', 'long_press']:
     idx = action.index
@@ -101,7 +104,9 @@ def execute_adb_action(
         )
         time.sleep(1.0)
 
-      adb_utils.type_text(text, env, timeout_sec=10)
+      adb_utils.type_text(
+          text, env, timeout_sec=10, paste_threshold=paste_threshold
+      )
       adb_utils.press_enter_button(env)
     else:
       logging.warning(
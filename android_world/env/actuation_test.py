@@ -172,7 +172,7 @@ class ExecuteAdbActionTest(absltest.TestCase):
       )
       mock_tap_screen.assert_called_once_with(50, 50, self.mock_env)
       mock_type_text.assert_called_once_with(
-          'test input', self.mock_env, timeout_sec=10
+          'test input', self.mock_env, timeout_sec=10, paste_threshold=None
       )
       mock_press_enter_button.assert_called_once_with(self.mock_env)
       mock_issue_generic_request.assert_not_called()
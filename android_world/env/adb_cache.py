@@ -0,0 +1,190 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Opt-in cache for read-only adb calls.
+
+Helpers such as `adb_utils.get_orientation`, `check_airplane_mode` or
+`get_current_activity` are often issued many times within milliseconds during
+task setup. `CachingAdbWrapper` memoizes the responses of read-only adb calls
+for a short TTL, and flushes everything as soon as any other call, which may
+change the device, is issued.
+"""
+
+import re
+import threading
+import time
+from typing import Any, Callable
+
+from android_env import env_interface
+from android_env.proto import adb_pb2
+from android_env.wrappers import base_wrapper
+
+# Shell commands, as leading tokens, that do not change the device. Commands
+# with exactly these tokens only are listed in `_READ_ONLY_EXACT_COMMANDS`.
+# `dumpsys` is listed per service, since some services change the device when
+# given arguments, e.g. `dumpsys battery unplug` or `dumpsys deviceidle
+# force-idle`.
+_READ_ONLY_COMMAND_PREFIXES = (
+    ('dumpsys', 'activity', 'recents'),
+    ('dumpsys', 'input'),
+    ('dumpsys', 'telephony.registry'),
+    ('dumpsys', 'window'),
+    ('getprop',),
+    ('settings', 'get'),
+    ('settings', 'list'),
+    ('pm', 'list'),
+    ('pm', 'path'),
+    ('content', 'query'),
+    ('cat',),
+    ('ls',),
+    ('stat',),
+    ('grep',),
+    ('head',),
+    ('tail',),
+    ('wc',),
+)
+_READ_ONLY_EXACT_COMMANDS = (
+    ('wm', 'size'),
+    ('wm', 'density'),
+)
+_SHELL_SEPARATORS = re.compile(r'\|\||&&|[|;]')
+# Redirections and substitutions can write files or run arbitrary commands.
+_SHELL_UNSAFE = re.compile(r'[<>`]|\$\(')
+
+
+def _is_read_only_tokens(tokens: tuple[str, ...]) -> bool:
+  return tokens in _READ_ONLY_EXACT_COMMANDS or any(
+      tokens[: len(prefix)] == prefix for prefix in _READ_ONLY_COMMAND_PREFIXES
+  )
+
+
+def _is_read_only_shell_command(command: str) -> bool:
+  if _SHELL_UNSAFE.search(command):
+    return False
+  return all(
+      _is_read_only_tokens(tuple(segment.split()))
+      for segment in _SHELL_SEPARATORS.split(command)
+  )
+
+
+def is_read_only(adb_call: adb_pb2.AdbRequest) -> bool:
+  """Returns whether adb_call is known not to change the device."""
+  command = adb_call.WhichOneof('command')
+  if command in ('get_current_activity', 'get_orientation'):
+    return True
+  if command == 'dumpsys':
+    dumpsys = adb_call.dumpsys
+    return dumpsys.list_only or _is_read_only_tokens(
+        ('dumpsys', dumpsys.service, *dumpsys.args)
+    )
+  if command == 'package_manager':
+    return adb_call.package_manager.WhichOneof('verb') == 'list'
+  if command == 'settings':
+    return adb_call.settings.WhichOneof('verb') in ('get', 'list')
+  if command == 'generic':
+    tokens = ' '.join(adb_call.generic.args).split(maxsplit=1)
+    return (
+        len(tokens) == 2
+        and tokens[0] == 'shell'
+        and _is_read_only_shell_command(tokens[1])
+    )
+  return False
+
+
+class CachingAdbWrapper(base_wrapper.BaseWrapper):
+  """Caches the responses of read-only adb calls for a short time.
+
+  Successful responses to calls for which `is_read_only` holds are reused for
+  `ttl_sec`. Any other adb call, and `reset`, flushes the cache, since it may
+  change what the reads return. Changes the device makes on its own, such as an
+  app finishing loading, are only picked up once the TTL expires, so keep it
+  short.
+
+  Attributes:
+    hits: Read-only calls answered from the cache.
+    misses: Read-only calls sent to the device.
+    invalidations: Times the cache was flushed by other calls.
+  """
+
+  def __init__(
+      self,
+      env: env_interface.AndroidEnvInterface,
+      ttl_sec: float,
+      clock: Callable[[], float] = time.monotonic,
+  ):
+    super().__init__(env)
+    self._ttl_sec = ttl_sec
+    self._clock = clock
+    self._lock = threading.Lock()
+    self._cache: dict[bytes, tuple[float, adb_pb2.AdbResponse]] = {}
+    # Bumped on every flush, so a read racing with a write is not cached.
+    self._generation = 0
+    self.hits = 0
+    self.misses = 0
+    self.invalidations = 0
+
+  def invalidate(self) -> None:
+    """Flushes all cached responses."""
+    with self._lock:
+      self._cache.clear()
+      self._generation += 1
+      self.invalidations += 1
+
+  def reset(self) -> Any:
+    self.invalidate()
+    return super().reset()
+
+  def execute_adb_call(
+      self, adb_call: adb_pb2.AdbRequest
+  ) -> adb_pb2.AdbResponse:
+    if not is_read_only(adb_call):
+      self.invalidate()
+      try:
+        return self._env.execute_adb_call(adb_call)
+      finally:
+        # Reads issued while the call ran may have seen the old state.
+        with self._lock:
+          self._cache.clear()
+          self._generation += 1
+
+    key_request = adb_pb2.AdbRequest()
+    key_request.CopyFrom(adb_call)
+    key_request.ClearField('timeout_sec')
+    key = key_request.SerializeToString(deterministic=True)
+    with self._lock:
+      now = self._clock()
+      entry = self._cache.get(key)
+      if entry is not None and entry[0] > now:
+        self.hits += 1
+        response = adb_pb2.AdbResponse()
+        response.CopyFrom(entry[1])
+        return response
+      self.misses += 1
+      generation = self._generation
+
+    response = self._env.execute_adb_call(adb_call)
+    if response.status == adb_pb2.AdbResponse.Status.OK:
+      cached = adb_pb2.AdbResponse()
+      cached.CopyFrom(response)
+      with self._lock:
+        if generation == self._generation:
+          self._cache[key] = (now + self._ttl_sec, cached)
+    return response
+
+  def _wrapper_stats(self) -> dict[str, Any]:
+    return {
+        'adb_cache_hits': self.hits,
+        'adb_cache_misses': self.misses,
+        'adb_cache_invalidations': self.invalidations,
+    }
@@ -0,0 +1,161 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from absl.testing import absltest
+from absl.testing import parameterized
+from android_env import env_interface
+from android_env.proto import adb_pb2
+from android_world.env import adb_cache
+from android_world.env import adb_utils
+
+
+def _generic(command: str) -> adb_pb2.AdbRequest:
+  return adb_pb2.AdbRequest(
+      generic=adb_pb2.AdbRequest.GenericRequest(args=command.split(' '))
+  )
+
+
+class IsReadOnlyTest(parameterized.TestCase):
+
+  @parameterized.parameters(
+      'shell dumpsys window | grep mCurrentRotation',
+      'shell settings get global airplane_mode_on',
+      'shell getprop ro.build.version.sdk',
+      'shell wm size',
+      (
+          'shell dumpsys window | grep mCurrentRotation ;'
+          ' dumpsys input | grep -e logicalFrame -e physicalFrame'
+      ),
+  )
+  def test_read_only_commands(self, command):
+    self.assertTrue(adb_cache.is_read_only(_generic(command)))
+
+  @parameterized.parameters(
+      'shell input tap 1 2',
+      'shell am start -n com.android.settings',
+      'shell settings put global airplane_mode_on 1',
+      'shell pm clear com.android.contacts',
+      'shell rm -rf /sdcard/Download',
+      'shell wm size 1080x2400',
+      'shell dumpsys window > /sdcard/window.txt',
+      'shell dumpsys battery unplug',
+      'shell dumpsys battery set level 5',
+      'shell dumpsys deviceidle force-idle',
+      'shell cat /sdcard/a ; rm /sdcard/a',
+      'push a.txt /sdcard/a.txt',
+  )
+  def test_mutating_commands(self, command):
+    self.assertFalse(adb_cache.is_read_only(_generic(command)))
+
+  def test_typed_requests(self):
+    self.assertTrue(
+        adb_cache.is_read_only(
+            adb_pb2.AdbRequest(
+                get_current_activity=adb_pb2.AdbRequest.GetCurrentActivity()
+            )
+        )
+    )
+    self.assertFalse(
+        adb_cache.is_read_only(
+            adb_pb2.AdbRequest(
+                tap=adb_pb2.AdbRequest.Tap(x=1, y=2),
+            )
+        )
+    )
+
+  def test_typed_dumpsys_requests(self):
+    def dumpsys(service: str, *args: str) -> adb_pb2.AdbRequest:
+      return adb_pb2.AdbRequest(
+          dumpsys=adb_pb2.AdbRequest.DumpsysRequest(service=service, args=args)
+      )
+
+    self.assertTrue(adb_cache.is_read_only(dumpsys('window')))
+    self.assertTrue(adb_cache.is_read_only(dumpsys('activity', 'recents')))
+    self.assertFalse(adb_cache.is_read_only(dumpsys('battery', 'unplug')))
+    self.assertFalse(
+        adb_cache.is_read_only(dumpsys('deviceidle', 'force-idle'))
+    )
+    self.assertFalse(adb_cache.is_read_only(dumpsys('activity')))
+
+
+class CachingAdbWrapperTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.now = 0.0
+    self.env = mock.create_autospec(env_interface.AndroidEnvInterface)
+    self.env.execute_adb_call.side_effect = self._execute_adb_call
+    self.airplane_mode = b'0'
+    self.wrapper = adb_cache.CachingAdbWrapper(
+        self.env, ttl_sec=1.0, clock=lambda: self.now
+    )
+
+  def _execute_adb_call(self, adb_call):
+    if adb_call.generic.args[-1:] == ['1']:
+      self.airplane_mode = b'1'
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    response.generic.output = self.airplane_mode
+    return response
+
+  def test_repeated_reads_hit_cache_until_ttl(self):
+    for _ in range(3):
+      self.assertFalse(adb_utils.check_airplane_mode(self.wrapper))
+    self.now = 1.5
+    adb_utils.check_airplane_mode(self.wrapper)
+
+    self.assertEqual(self.env.execute_adb_call.call_count, 2)
+    self.assertEqual((self.wrapper.hits, self.wrapper.misses), (2, 2))
+
+  def test_write_flushes_cache(self):
+    self.assertFalse(adb_utils.check_airplane_mode(self.wrapper))
+    adb_utils.issue_generic_request(
+        'shell settings put global airplane_mode_on 1', self.wrapper
+    )
+
+    self.assertTrue(adb_utils.check_airplane_mode(self.wrapper))
+    self.assertEqual(self.wrapper.hits, 0)
+    self.assertEqual(self.wrapper.invalidations, 1)
+
+  def test_failed_reads_are_not_cached(self):
+    self.env.execute_adb_call.side_effect = None
+    self.env.execute_adb_call.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.ADB_ERROR
+    )
+    for _ in range(2):
+      adb_utils.issue_generic_request('shell getprop', self.wrapper)
+
+    self.assertEqual(self.wrapper.misses, 2)
+
+  def test_cached_responses_are_copies(self):
+    response = adb_utils.issue_generic_request('shell getprop', self.wrapper)
+    response.generic.output = b'changed'
+
+    self.assertEqual(
+        adb_utils.issue_generic_request(
+            'shell getprop', self.wrapper
+        ).generic.output,
+        b'0',
+    )
+
+  def test_stats_report_counters(self):
+    self.env.stats.return_value = {}
+    adb_utils.issue_generic_request('shell getprop', self.wrapper)
+
+    self.assertEqual(self.wrapper.stats()['adb_cache_misses'], 1)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -0,0 +1,266 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Opt-in persistent `adb shell` session for generic shell commands.
+
+Every `adb_utils.issue_generic_request` normally spawns a new `adb` process,
+and task setup and teardown issue dozens of tiny commands such as `ls`, `rm`
+or `settings put`, so process spawn and the adb handshake dominate their cost.
+`ShellSessionAdbWrapper` instead writes generic `shell` commands to a single
+long-lived `adb shell` per device. Each command is followed by a unique
+sentinel that carries its exit status, which marks where its output ends.
+"""
+
+import os
+import re
+import subprocess
+import threading
+import time
+from typing import Any, Sequence
+import uuid
+
+from absl import logging
+from android_env import env_interface
+from android_env.components import errors
+from android_env.proto import adb_pb2
+from android_env.wrappers import base_wrapper
+
+# Used when an adb call has no timeout, like `AdbController`.
+_DEFAULT_TIMEOUT_SEC = 120.0
+# Commands that need a terminal, which the session does not have.
+_NEEDS_TERMINAL = re.compile(r'/dev/tty\b')
+_READ_SIZE = 65536
+
+
+class ShellSession:
+  """A long-lived shell that runs one command at a time.
+
+  Each command runs in a subshell, so `cd`, `exit` or variables do not leak
+  into the next one, with its stdin closed and its stderr merged into its
+  stdout, as `adb shell <command>` does. The shell is started on first use and
+  restarted after it exits or a command times out. Thread-safe; concurrent
+  commands are run in turn.
+  """
+
+  def __init__(self, shell_command: Sequence[str]):
+    """Initializes the session.
+
+    Args:
+      shell_command: Starts the shell, e.g. `['adb', '-s', 'emulator-5554',
+        'shell']`.
+    """
+    self._shell_command = list(shell_command)
+    self._lock = threading.Lock()
+    # Guards the fields below, which the reader thread updates.
+    self._output_ready = threading.Condition()
+    self._process: subprocess.Popen[bytes] | None = None
+    self._output = bytearray()
+    self._eof = False
+
+  def _start(self) -> subprocess.Popen[bytes]:
+    process = subprocess.Popen(
+        self._shell_command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        bufsize=0,
+    )
+    with self._output_ready:
+      self._process = process
+      self._output = bytearray()
+      self._eof = False
+    threading.Thread(
+        target=self._read_output,
+        args=(process,),
+        name='adb-shell-session',
+        daemon=True,
+    ).start()
+    return process
+
+  def _read_output(self, process: subprocess.Popen[bytes]) -> None:
+    try:
+      while True:
+        chunk = os.read(process.stdout.fileno(), _READ_SIZE)
+        with self._output_ready:
+          if process is not self._process:
+            return
+          if chunk:
+            self._output += chunk
+          else:
+            self._eof = True
+          self._output_ready.notify_all()
+        if not chunk:
+          return
+    finally:
+      process.stdout.close()
+
+  def close(self) -> None:
+    """Stops the shell; the next command starts a new one."""
+    with self._output_ready:
+      process, self._process = self._process, None
+      self._output = bytearray()
+    if process is None:
+      return
+    if process.poll() is None:
+      process.kill()
+    process.wait()
+    # The reader thread closes stdout once it has read all of it.
+    process.stdin.close()
+
+  def run(
+      self, command: str, timeout: float | None = None
+  ) -> tuple[int, bytes]:
+    """Runs command in the shell.
+
+    Args:
+      command: The shell command to run.
+      timeout: Maximum seconds to wait for the command; no limit if None.
+
+    Returns:
+      The exit status of command, and its output.
+
+    Raises:
+      subprocess.TimeoutExpired: If the command did not finish in time. The
+        shell is stopped, since its output can no longer be framed.
+      OSError: If the shell could not be started.
+      RuntimeError: If the shell exited while running the command.
+    """
+    sentinel = f'__android_world_{uuid.uuid4().hex}__'
+    end_marker = re.compile(b'\n' + sentinel.encode() + rb' (\d+)\n')
+    # The leading newline of the sentinel line ends any unterminated output.
+    script = (
+        f"(\n{command}\n) </dev/null 2>&1; printf '\\n%s %d\\n' {sentinel} $?\n"
+    )
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with self._lock:
+      process = self._process
+      if process is None or process.poll() is not None:
+        self.close()
+        process = self._start()
+      try:
+        process.stdin.write(script.encode('utf-8'))
+      except OSError as e:
+        self.close()
+        raise RuntimeError('The adb shell session exited.') from e
+
+      with self._output_ready:
+        searched = 0
+        while True:
+          match = end_marker.search(self._output, searched)
+          if match is not None:
+            exit_status = int(match.group(1))
+            output = bytes(self._output[: match.start()])
+            del self._output[: match.end()]
+            return exit_status, output
+          # Only new output, and a marker split across reads, need searching.
+          searched = max(0, len(self._output) - len(sentinel) - 16)
+          remaining = None if deadline is None else deadline - time.monotonic()
+          if self._eof or (remaining is not None and remaining <= 0):
+            break
+          self._output_ready.wait(remaining)
+        exited = self._eof
+
+      self.close()
+      if exited:
+        raise RuntimeError(
+            f'The adb shell session exited while running: {command}'
+        )
+      raise subprocess.TimeoutExpired(self._shell_command + [command], timeout)
+
+
+def _session_command(adb_call: adb_pb2.AdbRequest) -> str | None:
+  """Returns the shell command of adb_call if the session can run it."""
+  if adb_call.WhichOneof('command') != 'generic':
+    return None
+  args = list(adb_call.generic.args)
+  if len(args) < 2 or args[0] != 'shell':
+    return None
+  # `adb shell` joins its arguments with spaces, too.
+  command = ' '.join(args[1:])
+  if _NEEDS_TERMINAL.search(command):
+    return None
+  return command
+
+
+class ShellSessionAdbWrapper(base_wrapper.BaseWrapper):
+  """Runs generic adb shell commands in a persistent `ShellSession`.
+
+  Responses match those of the wrapped env: the merged stdout and stderr of
+  the command are returned in `generic.output`, and a non-zero exit status or a
+  timeout raises `errors.AdbControllerError`. Other adb calls, and commands
+  that need a terminal, go to the wrapped env. So does a command the session
+  fails to run, e.g. because the device disconnected.
+
+  Attributes:
+    session_calls: Commands run in the session.
+    fallback_calls: Commands sent to the wrapped env after the session failed.
+  """
+
+  def __init__(
+      self,
+      env: env_interface.AndroidEnvInterface,
+      shell_command: Sequence[str],
+  ):
+    """Initializes the wrapper.
+
+    Args:
+      env: The env to wrap.
+      shell_command: Starts the shell, e.g. `['adb', '-s', 'emulator-5554',
+        'shell']`.
+    """
+    super().__init__(env)
+    self._session = ShellSession(shell_command)
+    self.session_calls = 0
+    self.fallback_calls = 0
+
+  def execute_adb_call(
+      self, adb_call: adb_pb2.AdbRequest
+  ) -> adb_pb2.AdbResponse:
+    command = _session_command(adb_call)
+    if command is None:
+      return self._env.execute_adb_call(adb_call)
+
+    timeout = adb_call.timeout_sec or _DEFAULT_TIMEOUT_SEC
+    try:
+      exit_status, output = self._session.run(command, timeout)
+    except subprocess.TimeoutExpired as e:
+      raise errors.AdbControllerError(
+          f'Error executing adb command: [adb shell {command}]\nCaused by: {e}'
+      ) from e
+    except (OSError, RuntimeError) as e:
+      logging.warning(
+          'adb shell session failed, issuing the call directly: %s', e
+      )
+      self.fallback_calls += 1
+      return self._env.execute_adb_call(adb_call)
+
+    self.session_calls += 1
+    if exit_status != 0:
+      raise errors.AdbControllerError(
+          f'Error executing adb command: [adb shell {command}]\nCaused by:'
+          f' exit status {exit_status}: {output.decode("utf-8", "replace")}'
+      )
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    response.generic.output = output
+    return response
+
+  def close(self) -> None:
+    self._session.close()
+    super().close()
+
+  def _wrapper_stats(self) -> dict[str, Any]:
+    return {
+        'adb_shell_session_calls': self.session_calls,
+        'adb_shell_session_fallback_calls': self.fallback_calls,
+    }
@@ -0,0 +1,128 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import subprocess
+from unittest import mock
+
+from absl.testing import absltest
+from android_env import env_interface
+from android_env.components import errors
+from android_env.proto import adb_pb2
+from android_world.env import adb_shell_session
+from android_world.env import adb_utils
+
+# A local shell stands in for `adb shell`.
+_FAKE_SHELL = ['sh']
+
+
+class ShellSessionTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.session = adb_shell_session.ShellSession(_FAKE_SHELL)
+    self.addCleanup(self.session.close)
+
+  def test_run_returns_exit_status_and_output(self):
+    self.assertEqual(
+        self.session.run('echo out; echo err >&2; printf end'),
+        (0, b'out\nerr\nend'),
+    )
+    self.assertEqual(self.session.run('exit 3'), (3, b''))
+    self.assertEqual(self.session.run('true'), (0, b''))
+
+  def test_commands_do_not_share_state(self):
+    self.session.run('cd /; x=1')
+
+    self.assertEqual(
+        self.session.run('pwd'), (0, os.getcwd().encode() + b'\n')
+    )
+    self.assertEqual(self.session.run('echo "[$x]"'), (0, b'[]\n'))
+
+  def test_commands_do_not_read_session_input(self):
+    self.assertEqual(self.session.run('cat'), (0, b''))
+    self.assertEqual(self.session.run('echo next'), (0, b'next\n'))
+
+  def test_large_output(self):
+    _, output = self.session.run('seq 1 100000')
+
+    self.assertEqual(
+        output.split(), [str(i).encode() for i in range(1, 100001)]
+    )
+
+  def test_timeout_restarts_session(self):
+    with self.assertRaises(subprocess.TimeoutExpired):
+      self.session.run('sleep 10', timeout=0.1)
+
+    self.assertEqual(self.session.run('echo ok'), (0, b'ok\n'))
+
+
+class ShellSessionAdbWrapperTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.env = mock.create_autospec(env_interface.AndroidEnvInterface)
+    self.wrapper = adb_shell_session.ShellSessionAdbWrapper(
+        self.env, _FAKE_SHELL
+    )
+    self.addCleanup(self.wrapper.close)
+
+  def test_shell_commands_run_in_session(self):
+    response = adb_utils.issue_generic_request('shell echo hello', self.wrapper)
+
+    self.assertEqual(response.status, adb_pb2.AdbResponse.Status.OK)
+    self.assertEqual(response.generic.output, b'hello\n')
+    self.env.execute_adb_call.assert_not_called()
+    self.assertEqual(self.wrapper.session_calls, 1)
+
+  def test_failed_command_raises_like_adb(self):
+    with self.assertRaisesRegex(errors.AdbControllerError, 'exit status 1'):
+      adb_utils.issue_generic_request('shell test -d /nowhere', self.wrapper)
+
+  def test_timeout_raises_like_adb(self):
+    with self.assertRaises(errors.AdbControllerError):
+      adb_utils.issue_generic_request(
+          'shell sleep 10', self.wrapper, timeout_sec=0.1
+      )
+
+  def test_other_calls_go_to_env(self):
+    adb_utils.issue_generic_request('push a.txt /sdcard/a.txt', self.wrapper)
+    adb_utils.issue_generic_request(
+        'shell uiautomator dump /dev/tty', self.wrapper
+    )
+    self.wrapper.execute_adb_call(
+        adb_pb2.AdbRequest(tap=adb_pb2.AdbRequest.Tap(x=1, y=2))
+    )
+
+    self.assertEqual(self.env.execute_adb_call.call_count, 3)
+    self.assertEqual(self.wrapper.session_calls, 0)
+
+  def test_falls_back_to_env_if_session_cannot_start(self):
+    wrapper = adb_shell_session.ShellSessionAdbWrapper(
+        self.env, ['/does/not/exist/adb', 'shell']
+    )
+    self.addCleanup(wrapper.close)
+    self.env.execute_adb_call.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK
+    )
+
+    response = adb_utils.issue_generic_request('shell ls', wrapper)
+
+    self.assertEqual(response.status, adb_pb2.AdbResponse.Status.OK)
+    self.env.execute_adb_call.assert_called_once()
+    self.assertEqual(wrapper.fallback_calls, 1)
+
+
+if __name__ == '__main__':
+  absltest.main()
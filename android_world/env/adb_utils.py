@@ -14,12 +14,14 @@
 
 """Utilties to interact with the environment using adb."""
 
+import dataclasses
 import json
 import os
 import re
 import time
 from typing import Any, Callable, Collection, Iterable, Literal, Optional, TypeVar
 import unicodedata
+import weakref
 from absl import logging
 from android_env import env_interface
 from android_env.components import errors
@@ -30,6 +32,10 @@ T = TypeVar('T')
 
 _DEFAULT_TIMEOUT_SECS = 10
 
+# KEYCODE_CTRL_LEFT and KEYCODE_V, which paste into the focused field.
+_PASTE_KEYCODES = ('113', '50')
+_CLIPPER_PACKAGE = 'ca.zgrs.clipper'
+
 # pylint: disable=line-too-long
 # Maps app names to the activity that should be launched to open the app.
 _PATTERN_TO_ACTIVITY = immutabledict.immutabledict({
@@ -508,10 +514,50 @@ def _split_words_and_newlines(text: str) -> Iterable[str]:
       yield '\n'
 
 
+def _paste_text(
+    text: str,
+    env: env_interface.AndroidEnvInterface,
+    timeout_sec: Optional[float] = _DEFAULT_TIMEOUT_SECS,
+) -> bool:
+  """Types text into the focused field by pasting it from the clipboard.
+
+  Args:
+    text: The text string to be typed.
+    env: The environment.
+    timeout_sec: A timeout to use for the paste.
+
+  Returns:
+    Whether the text was pasted; False if the clipboard could not be set or
+    the device does not support pasting with a key combination (API < 33).
+  """
+  try:
+    set_clipboard_contents(text, env)
+  except (RuntimeError, ValueError, errors.AdbControllerError) as e:
+    logging.warning('Could not set the clipboard to paste text: %s', e)
+    # Leave clipper if it was left in the foreground.
+    activity, _ = get_current_activity(env)
+    if activity and activity.startswith(_CLIPPER_PACKAGE):
+      press_back_button(env)
+    return False
+
+  logging.info('Pasting %d characters.', len(text))
+  try:
+    response = issue_generic_request(
+        ['shell', 'input', 'keycombination', *_PASTE_KEYCODES],
+        env,
+        timeout_sec,
+    )
+  except errors.AdbControllerError as e:
+    logging.warning('Could not paste text: %s', e)
+    return False
+  return response.status == adb_pb2.AdbResponse.Status.OK
+
+
 def type_text(
     text: str,
     env: env_interface.AndroidEnvInterface,
     timeout_sec: Optional[float] = _DEFAULT_TIMEOUT_SECS,
+    paste_threshold: Optional[int] = None,
 ) -> None:
   """Issues an AdbRequest to type the specified text string word-by-word.
 
@@ -520,12 +566,25 @@ def type_text(
   out and word-by-word fixes this, while allowing us to keep a lot timeout per
   word.
 
+  Texts of at least `paste_threshold` characters are instead put into the
+  clipboard with the clipper app and pasted with a single key combination,
+  which takes a constant number of adb calls. If the clipboard cannot be set,
+  the text is typed word-by-word.
+
   Args:
     text: The text string to be typed.
     env: The environment.
     timeout_sec: A timeout to use for this operation. Note: For longer texts,
       this should be longer as it takes longer to type.
+    paste_threshold: Length from which text is pasted; never pasted if None.
   """
+  if (
+      paste_threshold is not None
+      and len(text) >= paste_threshold
+      and _paste_text(text, env, timeout_sec)
+  ):
+    return
+
   words = _split_words_and_newlines(text)
   for word in words:
     if word == '\n':
@@ -1217,7 +1276,8 @@ def set_clipboard_contents(
     )
 
   time.sleep(0.5)
-  content = _adb_text_format(content)
+  # A newline would end the shell command; quoted, it is kept in the text.
+  content = _adb_text_format(content).replace('\n', "'\n'")
   output_str = issue_generic_request(
       ['shell', 'am', 'broadcast', '-a', 'clipper.set', '-e', 'text', content],
       env,
@@ -1607,6 +1667,43 @@ def get_screen_size(env: env_interface.AndroidEnvInterface) -> tuple[int, int]:
   )
 
 
+def _parse_logical_screen_size(output: str) -> tuple[int, int]:
+  """Parses the logical screen size from `dumpsys input` output."""
+  pattern = r'logicalFrame=\[0, 0, (\d+), (\d+)\]'
+  for m in re.findall(pattern, output):
+    if int(m[0]) == 0 and int(m[1]) == 0:
+      continue
+    return (int(m[0]), int(m[1]))
+  raise ValueError('Failed to get logical screen size.')
+
+
+def _parse_physical_frame_boundary(
+    output: str, orientation: int
+) -> tuple[int, int, int, int]:
+  """Parses the physical frame from `dumpsys input` output, in portrait."""
+  pattern = r'physicalFrame=\[(\d+), (\d+), (\d+), (\d+)\]'
+  for m in re.findall(pattern, output):
+    if (
+        int(m[0]) == 0
+        and int(m[1]) == 0
+        and int(m[2]) == 0
+        and int(m[3]) == 0
+    ):
+      continue
+    if orientation == 0 or orientation == 2:
+      return (int(m[0]), int(m[1]), int(m[2]), int(m[3]))
+    return (int(m[1]), int(m[0]), int(m[3]), int(m[2]))
+  raise ValueError('Failed to get physical frame boundary.')
+
+
+def _parse_orientation(output: str) -> int:
+  """Parses the orientation from `dumpsys window` output."""
+  pattern = r'mCurrentRotation=ROTATION_(\d+)'
+  for m in re.findall(pattern, output):
+    return int(m) // 90
+  raise ValueError('Failed to get orientation.')
+
+
 def get_logical_screen_size(
     env: env_interface.AndroidEnvInterface,
 ) -> tuple[int, int]:
@@ -1627,14 +1724,7 @@ def get_logical_screen_size(
       'shell dumpsys input | grep logicalFrame', env
   )
   if response.status:
-    raw_output = response.generic.output.decode('utf-8')
-    pattern = r'logicalFrame=\[0, 0, (\d+), (\d+)\]'
-    matches = re.findall(pattern, raw_output)
-    for m in matches:
-      if int(m[0]) == 0 and int(m[1]) == 0:
-        continue
-      width, height = (int(m[0]), int(m[1]))
-      return (width, height)
+    return _parse_logical_screen_size(response.generic.output.decode('utf-8'))
   raise ValueError('Failed to get logical screen size.')
 
 
@@ -1654,21 +1744,9 @@ def get_physical_frame_boundary(
       'shell dumpsys input | grep physicalFrame', env
   )
   if response.status:
-    raw_output = response.generic.output.decode('utf-8')
-    pattern = r'physicalFrame=\[(\d+), (\d+), (\d+), (\d+)\]'
-    matches = re.findall(pattern, raw_output)
-    for m in matches:
-      if (
-          int(m[0]) == 0
-          and int(m[1]) == 0
-          and int(m[2]) == 0
-          and int(m[3]) == 0
-      ):
-        continue
-      orientation = get_orientation(env)
-      if orientation == 0 or orientation == 2:
-        return (int(m[0]), int(m[1]), int(m[2]), int(m[3]))
-      return (int(m[1]), int(m[0]), int(m[3]), int(m[2]))
+    return _parse_physical_frame_boundary(
+        response.generic.output.decode('utf-8'), get_orientation(env)
+    )
   raise ValueError('Failed to get physical frame boundary.')
 
 
@@ -1690,14 +1768,61 @@ def get_orientation(
       'shell dumpsys window | grep mCurrentRotation', env
   )
   if response.status:
-    raw_output = response.generic.output.decode('utf-8')
-    pattern = r'mCurrentRotation=ROTATION_(\d+)'
-    matches = re.findall(pattern, raw_output)
-    for m in matches:
-      return int(m) // 90
+    return _parse_orientation(response.generic.output.decode('utf-8'))
   raise ValueError('Failed to get orientation.')
 
 
+@dataclasses.dataclass(frozen=True)
+class DeviceGeometry:
+  """Screen geometry of the device at one point in time.
+
+  Attributes:
+    logical_screen_size: See `get_logical_screen_size`.
+    orientation: See `get_orientation`.
+    physical_frame_boundary: See `get_physical_frame_boundary`.
+  """
+
+  logical_screen_size: tuple[int, int]
+  orientation: int
+  physical_frame_boundary: tuple[int, int, int, int]
+
+
+def get_device_geometry(
+    env: env_interface.AndroidEnvInterface,
+) -> DeviceGeometry:
+  """Returns the logical size, orientation and physical frame of the screen.
+
+  Equivalent to calling `get_logical_screen_size`, `get_orientation` and
+  `get_physical_frame_boundary`, but with a single adb round trip instead of
+  four.
+
+  Args:
+    env: The AndroidEnv interface.
+
+  Returns:
+    The current geometry.
+
+  Raises:
+    ValueError: If the geometry could not be read.
+  """
+  response = issue_generic_request(
+      'shell dumpsys window | grep mCurrentRotation ;'
+      ' dumpsys input | grep -e logicalFrame -e physicalFrame',
+      env,
+  )
+  if not response.status:
+    raise ValueError('Failed to get device geometry.')
+  output = response.generic.output.decode('utf-8')
+  orientation = _parse_orientation(output)
+  return DeviceGeometry(
+      logical_screen_size=_parse_logical_screen_size(output),
+      orientation=orientation,
+      physical_frame_boundary=_parse_physical_frame_boundary(
+          output, orientation
+      ),
+  )
+
+
 def set_screen_size(
     width: int,
     height: int,
@@ -1769,12 +1894,57 @@ def set_root_if_needed(
   return issue_generic_request(['root'], env, timeout_sec)
 
 
+_UIAUTOMATOR_DUMP_END = '</hierarchy>'
+# Envs on which `uiautomator dump /dev/tty` failed, e.g. since adb runs without
+# a pty; they dump to the sdcard straight away.
+_NO_TTY_DUMP_ENVS = weakref.WeakSet()
+
+
+def _extract_uiautomator_dump(response: adb_pb2.AdbResponse) -> str | None:
+  """Returns the hierarchy in the output of a dump, without status lines."""
+  output = response.generic.output.decode('utf-8')
+  end = output.rfind(_UIAUTOMATOR_DUMP_END)
+  start = output.find('<')
+  if response.status == adb_pb2.AdbResponse.Status.OK and 0 <= start < end:
+    return output[start : end + len(_UIAUTOMATOR_DUMP_END)]
+  return None
+
+
 def uiautomator_dump(env, timeout_sec: Optional[float] = 30) -> str:
-  """Issues a uiautomator dump request and returns the UI hierarchy."""
-  dump_args = 'shell uiautomator dump /sdcard/window_dump.xml'
-  issue_generic_request(dump_args, env, timeout_sec=timeout_sec)
+  """Issues a uiautomator dump request and returns the UI hierarchy.
+
+  The hierarchy is dumped straight to the output of a single adb call. Devices
+  that cannot dump to the shell's terminal dump to the sdcard instead and read
+  the file back in the same call; this is remembered per env, so only the first
+  dump tries the terminal.
+
+  Args:
+    env: The environment.
+    timeout_sec: A timeout to use for each adb call.
 
-  read_args = 'shell cat /sdcard/window_dump.xml'
-  response = issue_generic_request(read_args, env, timeout_sec=timeout_sec)
+  Returns:
+    The UI hierarchy, as XML.
+  """
+  if env not in _NO_TTY_DUMP_ENVS:
+    response = issue_generic_request(
+        'shell uiautomator dump /dev/tty', env, timeout_sec=timeout_sec
+    )
+    # The hierarchy is followed by a status line such as "UI hierchary dumped
+    # to: /dev/tty".
+    dump = _extract_uiautomator_dump(response)
+    if dump is not None:
+      return dump
+    logging.warning('Could not dump the UI hierarchy to stdout; using sdcard.')
+    _NO_TTY_DUMP_ENVS.add(env)
 
-  return response.generic.output.decode('utf-8')
+  response = issue_generic_request(
+      'shell uiautomator dump /sdcard/window_dump.xml &&'
+      ' cat /sdcard/window_dump.xml',
+      env,
+      timeout_sec=timeout_sec,
+  )
+  # Here the status line comes first.
+  dump = _extract_uiautomator_dump(response)
+  if dump is None:
+    return response.generic.output.decode('utf-8')
+  return dump
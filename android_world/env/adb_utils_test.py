@@ -18,6 +18,7 @@ from unittest import mock
 
 from absl.testing import absltest
 from android_env import env_interface
+from android_env.components import errors
 from android_env.proto import adb_pb2
 from android_world.env import adb_utils
 
@@ -241,6 +242,90 @@ class AdbTypingTest(AdbTestSetup):
       mock_execute_adb_call.assert_has_calls(expected_calls)
       self.assertLen(expected_calls, mock_execute_adb_call.call_count)
 
+  def _set_clipper_output(self, output: bytes) -> None:
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    response.generic.output = output
+    self.mock_issue_generic_request.return_value = response
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    response.get_current_activity.full_activity = (
+        'ca.zgrs.clipper/ca.zgrs.clipper.Main'
+    )
+    self.mock_env.execute_adb_call.return_value = response
+
+  def _typed_words(self) -> list[str]:
+    return [
+        call.args[0].input_text.text
+        for call in self.mock_env.execute_adb_call.call_args_list
+        if call.args[0].HasField('input_text')
+    ]
+
+  @mock.patch.object(adb_utils.time, 'sleep', autospec=True)
+  def test_long_text_is_pasted(self, unused_mock_sleep):
+    self._set_clipper_output(
+        b'Broadcast completed: result=-1, data="Text set"\n'
+    )
+
+    adb_utils.type_text('Type some\ntext', self.mock_env, paste_threshold=10)
+
+    self.mock_issue_generic_request.assert_any_call(
+        [
+            'shell',
+            'am',
+            'broadcast',
+            '-a',
+            'clipper.set',
+            '-e',
+            'text',
+            "Type\\ some'\n'text",
+        ],
+        self.mock_env,
+    )
+    self.mock_issue_generic_request.assert_called_with(
+        ['shell', 'input', 'keycombination', '113', '50'],
+        self.mock_env,
+        adb_utils._DEFAULT_TIMEOUT_SECS,
+    )
+    self.assertEmpty(self._typed_words())
+
+  @mock.patch.object(adb_utils.time, 'sleep', autospec=True)
+  def test_falls_back_to_typing_if_clipboard_fails(self, unused_mock_sleep):
+    self._set_clipper_output(b'Broadcast completed: result=0\n')
+
+    adb_utils.type_text('Type some\ntext', self.mock_env, paste_threshold=10)
+
+    self.assertEqual(self._typed_words(), ['Type', '%s', 'some', 'text'])
+    self.assertIn(
+        mock.call(
+            adb_pb2.AdbRequest(
+                press_button=adb_pb2.AdbRequest.PressButton(
+                    button=adb_pb2.AdbRequest.PressButton.BACK
+                ),
+                timeout_sec=adb_utils._DEFAULT_TIMEOUT_SECS,
+            )
+        ),
+        self.mock_env.execute_adb_call.call_args_list,
+    )
+
+  @mock.patch.object(adb_utils.time, 'sleep', autospec=True)
+  def test_falls_back_to_typing_if_paste_fails(self, unused_mock_sleep):
+    self._set_clipper_output(
+        b'Broadcast completed: result=-1, data="Text set"\n'
+    )
+    clipper_response = self.mock_issue_generic_request.return_value
+
+    def issue_generic_request(args, env, timeout_sec=None):
+      del env, timeout_sec
+      if 'keycombination' in args:
+        # As on devices below API 33, where `input keycombination` is missing.
+        raise errors.AdbControllerError('exit status 255')
+      return clipper_response
+
+    self.mock_issue_generic_request.side_effect = issue_generic_request
+
+    adb_utils.type_text('Type some\ntext', self.mock_env, paste_threshold=10)
+
+    self.assertEqual(self._typed_words(), ['Type', '%s', 'some', 'text'])
+
 
 class TestExtractBroadcastData(absltest.TestCase):
 
@@ -282,5 +367,90 @@ class TestScreenUtils(absltest.TestCase):
     )
 
 
+class DeviceGeometryTest(AdbTestSetup):
+
+  def test_get_device_geometry_uses_one_request(self):
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    response.generic.output = (
+        b'    mCurrentRotation=ROTATION_90\n'
+        b'      logicalFrame=[0, 0, 0, 0], physicalFrame=[0, 0, 0, 0]\n'
+        b'      logicalFrame=[0, 0, 2400, 1080],'
+        b' physicalFrame=[0, 0, 2400, 1080]\n'
+    )
+    self.mock_issue_generic_request.return_value = response
+
+    geometry = adb_utils.get_device_geometry(self.mock_env)
+
+    self.mock_issue_generic_request.assert_called_once()
+    self.assertEqual(
+        geometry,
+        adb_utils.DeviceGeometry(
+            logical_screen_size=(2400, 1080),
+            orientation=1,
+            physical_frame_boundary=(0, 0, 1080, 2400),
+        ),
+    )
+
+  def test_get_device_geometry_raises_on_unparsable_output(self):
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    response.generic.output = b'mCurrentRotation=ROTATION_0\n'
+    self.mock_issue_generic_request.return_value = response
+
+    with self.assertRaises(ValueError):
+      adb_utils.get_device_geometry(self.mock_env)
+
+
+
+class UiautomatorDumpTest(AdbTestSetup):
+
+  def test_dumps_to_stdout_in_one_request(self):
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    response.generic.output = (
+        b"<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+        b'<hierarchy rotation="0"><node text="a" /></hierarchy>'
+        b'UI hierchary dumped to: /dev/tty\n'
+    )
+    self.mock_issue_generic_request.return_value = response
+
+    dump = adb_utils.uiautomator_dump(self.mock_env)
+
+    self.mock_issue_generic_request.assert_called_once()
+    self.assertEqual(
+        dump,
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+        '<hierarchy rotation="0"><node text="a" /></hierarchy>',
+    )
+
+  def test_falls_back_to_sdcard_and_remembers(self):
+    failed = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    failed.generic.output = b'ERROR: could not get idle state.\n'
+    dumped = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    dumped.generic.output = (
+        b'UI hierchary dumped to: /sdcard/window_dump.xml\n'
+        b'<hierarchy rotation="0"></hierarchy>'
+    )
+    self.mock_issue_generic_request.side_effect = [failed, dumped, dumped]
+
+    first = adb_utils.uiautomator_dump(self.mock_env)
+    second = adb_utils.uiautomator_dump(self.mock_env)
+
+    self.assertEqual(first, '<hierarchy rotation="0"></hierarchy>')
+    self.assertEqual(second, first)
+    # Only the first dump tries the terminal; the others take one request.
+    self.assertEqual(
+        [
+            call.args[0]
+            for call in self.mock_issue_generic_request.call_args_list
+        ],
+        [
+            'shell uiautomator dump /dev/tty',
+            'shell uiautomator dump /sdcard/window_dump.xml &&'
+            ' cat /sdcard/window_dump.xml',
+            'shell uiautomator dump /sdcard/window_dump.xml &&'
+            ' cat /sdcard/window_dump.xml',
+        ],
+    )
+
+
 if __name__ == '__main__':
   absltest.main()
@@ -14,6 +14,7 @@
 
 """Controller for Android that adds UI tree information to the observation."""
 
+from concurrent import futures
 import contextlib
 import enum
 import os
@@ -21,6 +22,7 @@ import time
 from typing import Any
 from typing import cast
 from typing import Optional
+from typing import Sequence
 from absl import logging
 from android_env import env_interface
 from android_env import loader
@@ -28,10 +30,14 @@ from android_env.components import config_classes
 from android_env.proto.a11y import android_accessibility_forest_pb2
 from android_env.wrappers import a11y_grpc_wrapper
 from android_env.wrappers import base_wrapper
+from android_world.env import adb_cache
+from android_world.env import adb_shell_session
 from android_world.env import adb_utils
+from android_world.env import forest_diff
 from android_world.env import representation_utils
 from android_world.utils import file_utils
 import dm_env
+import numpy as np
 
 
 def _has_wrapper(
@@ -55,6 +61,29 @@ def _has_wrapper(
     return False
 
 
+def _enable_networking_if_airplane_mode(
+    env: a11y_grpc_wrapper.A11yGrpcWrapper,
+) -> bool:
+  """Turns airplane mode off, since it cuts the a11y tree gRPC connection.
+
+  Args:
+    env: AndroidEnv wrapped with the a11y gRPC wrapper.
+
+  Returns:
+    Whether airplane mode was on.
+  """
+  if not adb_utils.retry(3)(adb_utils.check_airplane_mode)(env):
+    return False
+  logging.warning(
+      'Airplane mode is on -- cannot retrieve a11y tree via gRPC. Turning'
+      ' it off...'
+  )
+  logging.info('Enabling networking...')
+  env.attempt_enable_networking()
+  time.sleep(1.0)
+  return True
+
+
 def get_a11y_tree(
     env: env_interface.AndroidEnvInterface,
     max_retries: int = 5,
@@ -62,6 +91,10 @@ def get_a11y_tree(
 ) -> android_accessibility_forest_pb2.AndroidAccessibilityForest:
   """Gets a11y tree.
 
+  Airplane mode is only probed if the first attempt returns no tree, rather
+  than on every call; networking is otherwise assumed to still be enabled, as
+  it was when the controller connected.
+
   Args:
     env: AndroidEnv.
     max_retries: Maximum number of retries to get a11y tree.
@@ -78,29 +111,17 @@ def get_a11y_tree(
         'Must use a11y_grpc_wrapper.A11yGrpcWrapper to get the a11y tree.'
     )
   env = cast(a11y_grpc_wrapper.A11yGrpcWrapper, env)
-  if adb_utils.retry(3)(adb_utils.check_airplane_mode)(env):
-    logging.warning(
-        'Airplane mode is on -- cannot retrieve a11y tree via gRPC. Turning'
-        ' it off...'
-    )
-    logging.info('Enabling networking...')
-    env.attempt_enable_networking()
-    time.sleep(1.0)
-
-  forest: Optional[
-      android_accessibility_forest_pb2.AndroidAccessibilityForest
-  ] = None
-  for _ in range(max_retries):
+
+  for attempt in range(max_retries):
     try:
-      forest = env.accumulate_new_extras()['accessibility_tree'][-1]  # pytype:disable=attribute-error
-      return forest
+      return env.accumulate_new_extras()['accessibility_tree'][-1]  # pytype:disable=attribute-error
     except KeyError:
       logging.warning('Could not get a11y tree, retrying.')
+    if attempt == 0 and _enable_networking_if_airplane_mode(env):
+      continue
     time.sleep(sleep_duration)
 
-  if forest is None:
-    raise RuntimeError('Could not get a11y tree.')
-  return forest
+  raise RuntimeError('Could not get a11y tree.')
 
 
 _TASK_PATH = file_utils.convert_to_posix_path(
@@ -157,6 +178,13 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
   elements (like text, buttons, and images) in a hierarchical format. The tree
   includes details such as the properties and actions available for each
   element.
+
+  Read-only adb calls can optionally be cached for `adb_cache_ttl_sec`; see
+  `adb_cache.CachingAdbWrapper`. With `adb_shell_command`, generic adb shell
+  commands run in one persistent shell started by it; see
+  `adb_shell_session.ShellSessionAdbWrapper`. With `diff_forests`, the UI
+  elements of nodes that did not change since the previous forest are reused;
+  see `forest_diff.IncrementalForestConverter`.
   """
 
   def __init__(
@@ -164,6 +192,9 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
       env: env_interface.AndroidEnvInterface,
       a11y_method: A11yMethod = A11yMethod.A11Y_FORWARDER_APP,
       install_a11y_forwarding_app: bool = True,
+      adb_cache_ttl_sec: float = 0.0,
+      diff_forests: bool = False,
+      adb_shell_command: Sequence[str] | None = None,
   ):
     self._original_env = env
     if a11y_method == A11yMethod.A11Y_FORWARDER_APP:
@@ -171,9 +202,36 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
           env, install_a11y_forwarding_app
       )
       self._env.reset()  # Initializes required server services in a11y wrapper.
+      try:
+        _enable_networking_if_airplane_mode(self._env)
+      except RuntimeError:
+        # `get_a11y_tree` probes again if the tree cannot be fetched.
+        logging.warning('Could not check airplane mode after connecting.')
     else:
       self._env = env
+    if adb_shell_command:
+      self._env = adb_shell_session.ShellSessionAdbWrapper(
+          self._env, adb_shell_command
+      )
+    # Cached responses do not need to go through the shell session.
+    if adb_cache_ttl_sec > 0:
+      self._env = adb_cache.CachingAdbWrapper(self._env, adb_cache_ttl_sec)
     self._a11y_method = a11y_method
+    self._adb_cache_ttl_sec = adb_cache_ttl_sec
+    self._persistent_adb_shell = bool(adb_shell_command)
+    self._forest_converter = (
+        forest_diff.IncrementalForestConverter(exclude_invisible_elements=True)
+        if diff_forests
+        else None
+    )
+    # How the UI elements of the latest forest differ from the previous one;
+    # only set with `diff_forests`.
+    self.last_forest_diff: forest_diff.ForestDiff | None = None
+    # Takes screenshots while `observe` fetches the forest.
+    self._screenshot_executor = futures.ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix='screenshot'
+    )
+    self._screenshot: futures.Future[np.ndarray] | None = None
 
   @property
   def device_screen_size(self) -> tuple[int, int]:
@@ -193,15 +251,36 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
   def env(self) -> env_interface.AndroidEnvInterface:
     return self._env
 
+  @property
+  def adb_cache(self) -> adb_cache.CachingAdbWrapper | None:
+    """Returns the adb cache, with its hit and miss counters, if enabled."""
+    if isinstance(self._env, adb_cache.CachingAdbWrapper):
+      return self._env
+    return None
+
   def refresh_env(self):
     # pylint: disable=protected-access
     # pytype: disable=attribute-error
     # Reconnect to emulator and reload a11y wrapper in case we lose connection.
-    self._env = get_controller(
-        console_port=self.env._coordinator._simulator._config.emulator_launcher.emulator_console_port,
-        adb_path=self.env._coordinator._simulator._config.adb_controller.adb_path,
-        grpc_port=self.env._coordinator._simulator._config.emulator_launcher.grpc_port,
-    ).env
+    if self._screenshot is not None:
+      # A screenshot `capture` takes concurrently still uses the old env.
+      futures.wait([self._screenshot])
+    config = self.env._coordinator._simulator._config
+    try:
+      # Also stops the shell session of the old wrappers, if any.
+      self._env.close()
+    except Exception:  # pylint: disable=broad-exception-caught
+      logging.warning('Failed to close the disconnected env. Continuing.')
+    controller = get_controller(
+        console_port=config.emulator_launcher.emulator_console_port,
+        adb_path=config.adb_controller.adb_path,
+        grpc_port=config.emulator_launcher.grpc_port,
+        adb_cache_ttl_sec=self._adb_cache_ttl_sec,
+        persistent_adb_shell=self._persistent_adb_shell,
+    )
+    # Only the env of the new controller is used.
+    controller._screenshot_executor.shutdown()
+    self._env = controller.env
     # pylint: enable=protected-access
     # pytype: enable=attribute-error
 
@@ -227,10 +306,7 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
   def get_ui_elements(self) -> list[representation_utils.UIElement]:
     """Returns the most recent UI elements from the device."""
     if self._a11y_method == A11yMethod.A11Y_FORWARDER_APP:
-      return representation_utils.forest_to_ui_elements(
-          self.get_a11y_forest(),
-          exclude_invisible_elements=True,
-      )
+      return self.forest_to_ui_elements(self.get_a11y_forest())
     elif self._a11y_method == A11yMethod.UIAUTOMATOR:
       return representation_utils.xml_dump_to_ui_elements(
           adb_utils.uiautomator_dump(self._env)
@@ -238,21 +314,131 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
     else:
       return []
 
+  def get_forest(
+      self,
+  ) -> android_accessibility_forest_pb2.AndroidAccessibilityForest | None:
+    """Returns the a11y forest; None unless using the a11y forwarder app."""
+    if self._a11y_method == A11yMethod.A11Y_FORWARDER_APP:
+      return self.get_a11y_forest()
+    return None
+
+  def forest_to_ui_elements(
+      self,
+      forest: android_accessibility_forest_pb2.AndroidAccessibilityForest | None,
+  ) -> list[representation_utils.UIElement]:
+    """Returns the UI elements of a forest from `get_forest`.
+
+    Without the a11y forwarder app there is no forest, and the elements are
+    read from the device instead.
+
+    Args:
+      forest: The forest returned by `get_forest`.
+
+    Returns:
+      The UI elements, as in the observation of `step`.
+    """
+    if self._a11y_method != A11yMethod.A11Y_FORWARDER_APP:
+      return self.get_ui_elements()
+    if self._forest_converter is not None:
+      elements, self.last_forest_diff = self._forest_converter.convert(forest)
+      return elements
+    return representation_utils.forest_to_ui_elements(
+        forest,
+        exclude_invisible_elements=True,
+    )
+
   def _process_timestep(self, timestep: dm_env.TimeStep) -> dm_env.TimeStep:
     """Adds a11y tree info to the observation."""
-    if self._a11y_method == A11yMethod.A11Y_FORWARDER_APP:
-      forest = self.get_a11y_forest()
-      ui_elements = representation_utils.forest_to_ui_elements(
-          forest,
-          exclude_invisible_elements=True,
-      )
-    else:
-      forest = None
-      ui_elements = self.get_ui_elements()
+    forest = self.get_forest()
     timestep.observation[OBSERVATION_KEY_FOREST] = forest
-    timestep.observation[OBSERVATION_KEY_UI_ELEMENTS] = ui_elements
+    timestep.observation[OBSERVATION_KEY_UI_ELEMENTS] = (
+        self.forest_to_ui_elements(forest)
+    )
     return timestep
 
+  def get_screenshot(self) -> np.ndarray:
+    """Returns the current screen as an RGB array, without taking a step."""
+    # pylint: disable=protected-access
+    # pytype: disable=attribute-error
+    # android_env 1.2.3, as pinned in requirements.txt, has no public way to
+    # read the current frame without a step; its coordinator reads it from the
+    # simulator, too. Revisit when upgrading android_env.
+    raw_env = getattr(self._env, 'raw_env', self._env)
+    screenshot = raw_env._coordinator._simulator.get_screenshot()
+    # pylint: enable=protected-access
+    # pytype: enable=attribute-error
+    return screenshot
+
+  def capture(
+      self, pixels: bool = True, ui_elements: bool = True
+  ) -> tuple[
+      np.ndarray | None,
+      android_accessibility_forest_pb2.AndroidAccessibilityForest | None,
+      list[representation_utils.UIElement] | None,
+  ]:
+    """Captures the requested parts of the current observation.
+
+    The screenshot is taken on another thread while the forest is fetched and
+    converted to UI elements, so a capture takes as long as the slower of the
+    two rather than their sum.
+
+    Args:
+      pixels: Whether to take a screenshot.
+      ui_elements: Whether to fetch the a11y forest and convert it to UI
+        elements.
+
+    Returns:
+      The screenshot, forest and UI elements, each None if not requested.
+    """
+    forest, elements = None, None
+    env = self._env
+    screenshot = self._screenshot = (
+        self._screenshot_executor.submit(self.get_screenshot)
+        if pixels
+        else None
+    )
+    try:
+      if ui_elements:
+        forest = self.get_forest()
+        elements = self.forest_to_ui_elements(forest)
+    finally:
+      self._screenshot = None
+      if screenshot is not None:
+        # Do not leave a screenshot in flight.
+        futures.wait([screenshot])
+    if screenshot is not None and self._env is not env:
+      # Fetching the forest reconnected; retake the screenshot from the new
+      # connection.
+      return self.get_screenshot(), forest, elements
+    return (
+        screenshot.result() if screenshot is not None else None,
+        forest,
+        elements,
+    )
+
+  def observe(self) -> dict[str, Any]:
+    """Returns the current screen, a11y forest and UI elements.
+
+    Has the same keys as the observation of `step`, but reads the frame directly
+    from the simulator instead of dispatching a no-op action through
+    android_env, which runs the action, task and wrapper logic of a full step.
+    See `capture` to only observe some of them.
+
+    Returns:
+      The observation, with 'pixels', `OBSERVATION_KEY_FOREST` and
+      `OBSERVATION_KEY_UI_ELEMENTS`.
+    """
+    pixels, forest, ui_elements = self.capture()
+    return {
+        'pixels': pixels,
+        OBSERVATION_KEY_FOREST: forest,
+        OBSERVATION_KEY_UI_ELEMENTS: ui_elements,
+    }
+
+  def close(self) -> None:
+    self._screenshot_executor.shutdown(wait=True)
+    super().close()
+
   def pull_file(
       self, remote_db_file_path: str, timeout_sec: Optional[float] = None
   ) -> contextlib._GeneratorContextManager[str]:
@@ -308,6 +494,9 @@ def get_controller(
     console_port: int = 5554,
     adb_path: str = DEFAULT_ADB_PATH,
     grpc_port: int = 8554,
+    adb_cache_ttl_sec: float = 0.0,
+    diff_forests: bool = False,
+    persistent_adb_shell: bool = False,
 ) -> AndroidWorldController:
   """Creates a controller by connecting to an existing Android environment."""
 
@@ -326,4 +515,13 @@ def get_controller(
   )
   android_env_instance = loader.load(config)
   logging.info('Setting up AndroidWorldController.')
-  return AndroidWorldController(android_env_instance)
+  return AndroidWorldController(
+      android_env_instance,
+      adb_cache_ttl_sec=adb_cache_ttl_sec,
+      diff_forests=diff_forests,
+      adb_shell_command=(
+          [adb_path, '-s', f'emulator-{console_port}', 'shell']
+          if persistent_adb_shell
+          else None
+      ),
+  )
@@ -14,10 +14,13 @@
 
 import os
 import tempfile
+import threading
+import time
 from unittest import mock
 
 from absl.testing import absltest
 from android_env import env_interface
+from android_env.proto.a11y import android_accessibility_forest_pb2
 from android_env.wrappers import a11y_grpc_wrapper
 from android_world.env import adb_utils
 from android_world.env import android_world_controller
@@ -130,6 +133,122 @@ class AndroidWorldControllerTest(absltest.TestCase):
         exclude_invisible_elements=True,
     )
 
+  @mock.patch.object(android_world_controller, 'get_a11y_tree')
+  def test_diff_forests_reports_changes(self, mock_get_a11y_tree):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(
+        mock_base_env, diff_forests=True
+    )
+    forest = android_accessibility_forest_pb2.AndroidAccessibilityForest()
+    node = forest.windows.add().tree.nodes.add()
+    node.text = 'Clock'
+    node.is_visible_to_user = True
+    mock_get_a11y_tree.return_value = forest
+
+    first = env.get_ui_elements()
+    second = env.get_ui_elements()
+
+    self.assertIs(second[0], first[0])
+    self.assertTrue(env.last_forest_diff.is_empty)
+    self.assertEqual(env.last_forest_diff.unchanged, 1)
+
+  @mock.patch.object(android_world_controller, 'get_a11y_tree')
+  @mock.patch.object(representation_utils, 'forest_to_ui_elements')
+  def test_observe_reads_screen_without_stepping(
+      self, mock_forest_to_ui, mock_get_a11y_tree
+  ):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(mock_base_env)
+    mock_simulator = env._env.raw_env._coordinator._simulator
+    mock_simulator.get_screenshot.return_value = 'pixels'
+    mock_get_a11y_tree.return_value = 'forest'
+    mock_forest_to_ui.return_value = ['element']
+
+    observation = env.observe()
+
+    self.assertEqual(
+        observation,
+        {
+            'pixels': 'pixels',
+            android_world_controller.OBSERVATION_KEY_FOREST: 'forest',
+            android_world_controller.OBSERVATION_KEY_UI_ELEMENTS: ['element'],
+        },
+    )
+    env._env.step.assert_not_called()
+
+  @mock.patch.object(android_world_controller, 'get_a11y_tree')
+  @mock.patch.object(representation_utils, 'forest_to_ui_elements')
+  def test_observe_takes_screenshot_while_fetching_forest(
+      self, mock_forest_to_ui, mock_get_a11y_tree
+  ):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(mock_base_env)
+    fetching_forest = threading.Event()
+    screenshot_taken = threading.Event()
+
+    def get_screenshot():
+      # Blocks forever if the forest is only fetched after the screenshot.
+      self.assertTrue(fetching_forest.wait(timeout=5))
+      screenshot_taken.set()
+      return 'pixels'
+
+    def get_a11y_tree(unused_env):
+      fetching_forest.set()
+      self.assertTrue(screenshot_taken.wait(timeout=5))
+      return 'forest'
+
+    env._env.raw_env._coordinator._simulator.get_screenshot.side_effect = (
+        get_screenshot
+    )
+    mock_get_a11y_tree.side_effect = get_a11y_tree
+    mock_forest_to_ui.return_value = []
+
+    observation = env.observe()
+    env.close()
+
+    self.assertEqual(observation['pixels'], 'pixels')
+    self.assertEqual(
+        observation[android_world_controller.OBSERVATION_KEY_FOREST], 'forest'
+    )
+
+  @mock.patch.object(android_world_controller, 'get_controller')
+  @mock.patch.object(android_world_controller, 'get_a11y_tree')
+  @mock.patch.object(representation_utils, 'forest_to_ui_elements')
+  def test_capture_waits_for_screenshot_before_reconnecting(
+      self, mock_forest_to_ui, mock_get_a11y_tree, mock_get_controller
+  ):
+    env = android_world_controller.AndroidWorldController(
+        mock.Mock(spec=env_interface.AndroidEnvInterface)
+    )
+    self.addCleanup(env.close)
+    old_env = env._env
+    old_env._coordinator = mock.MagicMock()
+    screenshot_done = threading.Event()
+
+    def get_old_screenshot():
+      time.sleep(0.1)
+      screenshot_done.set()
+      return 'old pixels'
+
+    old_env.raw_env._coordinator._simulator.get_screenshot.side_effect = (
+        get_old_screenshot
+    )
+    old_env.close.side_effect = lambda: self.assertTrue(
+        screenshot_done.is_set()
+    )
+    new_controller = mock.MagicMock()
+    new_simulator = new_controller.env.raw_env._coordinator._simulator
+    new_simulator.get_screenshot.return_value = 'new pixels'
+    mock_get_controller.return_value = new_controller
+    mock_get_a11y_tree.side_effect = [RuntimeError('disconnected'), 'forest']
+    mock_forest_to_ui.return_value = []
+
+    pixels, forest, _ = env.capture()
+
+    old_env.close.assert_called_once()
+    self.assertEqual(pixels, 'new pixels')
+    self.assertEqual(forest, 'forest')
+
   @mock.patch.object(adb_utils, 'check_airplane_mode')
   @mock.patch.object(android_world_controller, 'get_controller')
   @mock.patch.object(android_world_controller, '_has_wrapper')
@@ -161,6 +280,65 @@ class AndroidWorldControllerTest(absltest.TestCase):
     self.assertEqual(forest, 'success')
     mock_refresh_env.assert_called_once()
 
+  @mock.patch.object(android_world_controller, 'get_controller')
+  def test_refresh_env_closes_old_env(self, mock_get_controller):
+    env = android_world_controller.AndroidWorldController(
+        mock.Mock(spec=env_interface.AndroidEnvInterface)
+    )
+    self.addCleanup(env.close)
+    old_env = env._env
+    old_env._coordinator = mock.MagicMock()
+    new_controller = android_world_controller.AndroidWorldController(
+        mock.Mock(spec=env_interface.AndroidEnvInterface)
+    )
+    mock_get_controller.return_value = new_controller
+
+    env.refresh_env()
+
+    old_env.close.assert_called_once()
+    self.assertIs(env.env, new_controller.env)
+    with self.assertRaises(RuntimeError):
+      # The executor of the new controller is not used, so it is shut down.
+      new_controller._screenshot_executor.submit(lambda: None)
+
+  @mock.patch.object(adb_utils, 'check_airplane_mode')
+  @mock.patch.object(android_world_controller, '_has_wrapper')
+  def test_get_a11y_tree_skips_airplane_mode_check_when_tree_available(
+      self, mock_has_wrapper, mock_check_airplane_mode
+  ):
+    mock_has_wrapper.return_value = True
+    mock_env = mock.Mock()
+    mock_env.accumulate_new_extras.return_value = {
+        'accessibility_tree': ['forest']
+    }
+
+    for _ in range(3):
+      forest = android_world_controller.get_a11y_tree(mock_env)
+
+    self.assertEqual(forest, 'forest')
+    mock_check_airplane_mode.assert_not_called()
+
+  @mock.patch.object(adb_utils, 'check_airplane_mode')
+  @mock.patch.object(android_world_controller, '_has_wrapper')
+  @mock.patch.object(android_world_controller.time, 'sleep')
+  def test_get_a11y_tree_disables_airplane_mode_when_tree_missing(
+      self, unused_mock_sleep, mock_has_wrapper, mock_check_airplane_mode
+  ):
+    mock_has_wrapper.return_value = True
+    mock_check_airplane_mode.return_value = True
+    mock_env = mock.Mock()
+    mock_env.accumulate_new_extras.side_effect = [
+        {},
+        {},
+        {'accessibility_tree': ['forest']},
+    ]
+
+    forest = android_world_controller.get_a11y_tree(mock_env)
+
+    self.assertEqual(forest, 'forest')
+    mock_check_airplane_mode.assert_called_once_with(mock_env)
+    mock_env.attempt_enable_networking.assert_called_once()
+
   def test_pull_file(self):
     file_contents = 'test file contents'
     remote_file_path = create_file_with_contents(file_contents)
@@ -29,13 +29,24 @@ _ANDROID_WORLD_API_LEVEL = 33
 
 
 def _get_env(
-    console_port: int, adb_path: str, grpc_port: int
+    console_port: int,
+    adb_path: str,
+    grpc_port: int,
+    adb_cache_ttl_sec: float = 0.0,
+    diff_forests: bool = False,
+    persistent_adb_shell: bool = False,
+    paste_threshold: int | None = None,
 ) -> interface.AsyncEnv:
   """Creates an AsyncEnv by connecting to an existing Android environment."""
   controller = android_world_controller.get_controller(
-      console_port, adb_path, grpc_port
+      console_port,
+      adb_path,
+      grpc_port,
+      adb_cache_ttl_sec,
+      diff_forests,
+      persistent_adb_shell,
   )
-  return interface.AsyncAndroidEnv(controller)
+  return interface.AsyncAndroidEnv(controller, paste_threshold=paste_threshold)
 
 
 def _increase_file_descriptor_limit(limit: int = 32768):
@@ -99,6 +110,10 @@ def load_and_setup_env(
     freeze_datetime: bool = True,
     adb_path: str = android_world_controller.DEFAULT_ADB_PATH,
     grpc_port: int = 8554,
+    adb_cache_ttl_sec: float = 0.0,
+    diff_forests: bool = False,
+    persistent_adb_shell: bool = False,
+    paste_threshold: int | None = None,
 ) -> interface.AsyncEnv:
   """Create environment with `get_env()` and perform env setup and validation.
 
@@ -118,10 +133,28 @@ def load_and_setup_env(
       2023, to ensure consistent benchmarking.
     adb_path: The location of the adb binary.
     grpc_port: The port for gRPC communication with the emulator.
+    adb_cache_ttl_sec: If positive, responses to read-only adb calls are reused
+      for this many seconds; see `adb_cache.CachingAdbWrapper`.
+    diff_forests: Whether to only convert the a11y nodes that changed since the
+      previous observation; see `forest_diff.IncrementalForestConverter`.
+    persistent_adb_shell: Whether to run generic adb shell commands in one
+      long-lived `adb shell`, instead of a new adb process each; see
+      `adb_shell_session.ShellSessionAdbWrapper`.
+    paste_threshold: If set, texts of at least this many characters are pasted
+      from the clipboard instead of typed word by word; see
+      `adb_utils.type_text`.
 
   Returns:
     An interactable Android environment.
   """
-  env = _get_env(console_port, adb_path, grpc_port)
+  env = _get_env(
+      console_port,
+      adb_path,
+      grpc_port,
+      adb_cache_ttl_sec,
+      diff_forests,
+      persistent_adb_shell,
+      paste_threshold,
+  )
   setup_env(env, emulator_setup, freeze_datetime)
   return env
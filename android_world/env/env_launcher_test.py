@@ -56,8 +56,15 @@ class EnvLauncherTest(absltest.TestCase):
             ),
         )
     )
-    mock_controller.assert_called_with(mock_android_env)
-    mock_async_android_env.assert_called_with(mock_controller.return_value)
+    mock_controller.assert_called_with(
+        mock_android_env,
+        adb_cache_ttl_sec=0.0,
+        diff_forests=False,
+        adb_shell_command=None,
+    )
+    mock_async_android_env.assert_called_with(
+        mock_controller.return_value, paste_threshold=None
+    )
 
 
 if __name__ == "__main__":
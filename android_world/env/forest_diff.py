@@ -0,0 +1,132 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Incremental conversion of consecutive a11y forests to UI elements.
+
+Consecutive observations of a screen usually differ in a few nodes, such as a
+clock label or one list item. `IncrementalForestConverter` keys nodes by window
+and node id, compares their serialized content with the previous forest, and
+only converts the nodes that changed. It also reports what changed, which is a
+cheap signal of whether the screen did.
+"""
+
+import dataclasses
+import threading
+from typing import Any, Optional
+
+from android_world.env import representation_utils
+
+# (window id, node unique id).
+_NodeKey = tuple[int, int]
+
+
+@dataclasses.dataclass(frozen=True)
+class ForestDiff:
+  """Summary of how the UI elements of a forest differ from the previous one.
+
+  Attributes:
+    added: Elements whose node was not in the previous forest.
+    removed: Elements of the previous forest whose node is gone.
+    changed: Elements whose node content changed.
+    unchanged: Elements reused from the previous forest.
+  """
+
+  added: int = 0
+  removed: int = 0
+  changed: int = 0
+  unchanged: int = 0
+
+  @property
+  def is_empty(self) -> bool:
+    """Whether the UI elements are the same as in the previous forest."""
+    return not (self.added or self.removed or self.changed)
+
+
+class IncrementalForestConverter:
+  """Converts forests to UI elements, reusing those of unchanged nodes.
+
+  Returns the same `UIElement` objects as the previous call for nodes whose
+  content did not change, so callers must not mutate the returned elements.
+  Thread-safe.
+  """
+
+  def __init__(
+      self,
+      exclude_invisible_elements: bool = False,
+      screen_size: Optional[tuple[int, int]] = None,
+  ):
+    """Initializes the converter.
+
+    Args:
+      exclude_invisible_elements: True if invisible elements should not be
+        returned.
+      screen_size: The size of the device screen in pixels (width, height).
+    """
+    self._exclude_invisible_elements = exclude_invisible_elements
+    self._screen_size = screen_size
+    self._lock = threading.Lock()
+    self._previous: dict[
+        _NodeKey, tuple[bytes, representation_utils.UIElement]
+    ] = {}
+
+  def reset(self) -> None:
+    """Forgets the previous forest, so the next one is fully converted."""
+    with self._lock:
+      self._previous = {}
+
+  def convert(
+      self,
+      forest: Any,
+  ) -> tuple[list[representation_utils.UIElement], ForestDiff]:
+    """Returns the UI elements of forest, and how they changed.
+
+    The elements are those of `representation_utils.forest_to_ui_elements`.
+
+    Args:
+      forest: The forest to extract UI elements from.
+
+    Returns:
+      The UI elements, and their difference with the previous forest.
+    """
+    with self._lock:
+      elements = []
+      current = {}
+      added = changed = unchanged = 0
+      for window in forest.windows:
+        for node in window.tree.nodes:
+          if not representation_utils.is_ui_element_node(
+              node, self._exclude_invisible_elements
+          ):
+            continue
+          key = (window.id, node.unique_id)
+          content = node.SerializeToString()
+          previous = self._previous.get(key)
+          if previous is not None and previous[0] == content:
+            element = previous[1]
+            unchanged += 1
+          else:
+            element = representation_utils.accessibility_node_to_ui_element(
+                node, self._screen_size
+            )
+            if previous is None:
+              added += 1
+            else:
+              changed += 1
+          current[key] = (content, element)
+          elements.append(element)
+      removed = sum(1 for key in self._previous if key not in current)
+      self._previous = current
+    return elements, ForestDiff(
+        added=added, removed=removed, changed=changed, unchanged=unchanged
+    )
@@ -0,0 +1,97 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from absl.testing import absltest
+from android_env.proto.a11y import android_accessibility_forest_pb2
+from android_world.env import forest_diff
+from android_world.env import representation_utils
+
+
+def _make_forest(
+    texts: list[str],
+) -> android_accessibility_forest_pb2.AndroidAccessibilityForest:
+  """Returns a forest with a root node holding one visible leaf per text."""
+  forest = android_accessibility_forest_pb2.AndroidAccessibilityForest()
+  window = forest.windows.add()
+  window.id = 7
+  root = window.tree.nodes.add()
+  root.unique_id = 0
+  for i, text in enumerate(texts, start=1):
+    root.child_ids.append(i)
+    node = window.tree.nodes.add()
+    node.unique_id = i
+    node.text = text
+    node.is_visible_to_user = True
+    node.bounds_in_screen.bottom = 10 * i
+  return forest
+
+
+class IncrementalForestConverterTest(absltest.TestCase):
+
+  def test_first_forest_is_fully_added(self):
+    converter = forest_diff.IncrementalForestConverter()
+    forest = _make_forest(['a', 'b'])
+
+    elements, diff = converter.convert(forest)
+
+    self.assertEqual(
+        elements, representation_utils.forest_to_ui_elements(forest)
+    )
+    self.assertEqual(diff, forest_diff.ForestDiff(added=2))
+    self.assertFalse(diff.is_empty)
+
+  def test_unchanged_nodes_reuse_elements(self):
+    converter = forest_diff.IncrementalForestConverter()
+    first, _ = converter.convert(_make_forest(['a', 'b', 'c']))
+
+    second, diff = converter.convert(_make_forest(['a', 'B', 'c']))
+
+    self.assertEqual(diff, forest_diff.ForestDiff(changed=1, unchanged=2))
+    self.assertIs(second[0], first[0])
+    self.assertIsNot(second[1], first[1])
+    self.assertEqual(second[1].text, 'B')
+    self.assertIs(second[2], first[2])
+
+  def test_same_forest_has_empty_diff(self):
+    converter = forest_diff.IncrementalForestConverter()
+    converter.convert(_make_forest(['a']))
+
+    _, diff = converter.convert(_make_forest(['a']))
+
+    self.assertTrue(diff.is_empty)
+
+  def test_removed_and_added_nodes(self):
+    converter = forest_diff.IncrementalForestConverter()
+    converter.convert(_make_forest(['a', 'b', 'c']))
+
+    elements, diff = converter.convert(_make_forest(['a']))
+    self.assertEqual(diff, forest_diff.ForestDiff(removed=2, unchanged=1))
+    self.assertLen(elements, 1)
+
+    _, diff = converter.convert(_make_forest(['a', 'b']))
+    self.assertEqual(diff, forest_diff.ForestDiff(added=1, unchanged=1))
+
+  def test_reset_converts_everything(self):
+    converter = forest_diff.IncrementalForestConverter()
+    first, _ = converter.convert(_make_forest(['a']))
+    converter.reset()
+
+    second, diff = converter.convert(_make_forest(['a']))
+
+    self.assertEqual(diff, forest_diff.ForestDiff(added=1))
+    self.assertIsNot(second[0], first[0])
+
+
+if __name__ == '__main__':
+  absltest.main()
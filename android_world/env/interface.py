@@ -15,9 +15,13 @@
 """Environment interface for real-time interaction Android."""
 
 import abc
+import asyncio
+from concurrent import futures
 import dataclasses
+import functools
+import threading
 import time
-from typing import Any, Optional, Self
+from typing import Any, Callable, Optional, Self, TypeVar
 
 from absl import logging
 from android_env.components import action_type
@@ -26,9 +30,28 @@ from android_world.env import adb_utils
 from android_world.env import android_world_controller
 from android_world.env import json_action
 from android_world.env import representation_utils
+from android_world.env import stability
 import dm_env
 import numpy as np
 
+_T = TypeVar('_T')
+
+# Actions after which the screen is not expected to change.
+_NO_TRANSITION_ACTIONS = (
+    json_action.ANSWER,
+    json_action.STATUS,
+    json_action.UNKNOWN,
+)
+# Actions expected to bring another activity to the foreground.
+_ACTIVITY_CHANGING_ACTIONS = (
+    json_action.OPEN_APP,
+    json_action.NAVIGATE_HOME,
+    'launch_adb_activity',
+)
+# Longest wait for the foreground activity to change after such an action.
+_ACTIVITY_CHANGE_TIMEOUT_SEC = 1.0
+_ACTIVITY_POLL_INTERVAL_SEC = 0.05
+
 
 def _get_no_op_action() -> dict[str, Any]:
   """Creates a no-op action; used to retrieve screen & UI tree."""
@@ -38,22 +61,98 @@ def _get_no_op_action() -> dict[str, Any]:
   }
 
 
+def _identity(value: Any) -> Any:
+  return value
+
+
+class LazyField:
+  """Value of a `State` field that is only computed when first read."""
+
+  __slots__ = ('_fn', '_lock', '_value')
+
+  def __init__(self, fn: Callable[[], Any]):
+    self._fn = fn
+    self._lock = threading.Lock()
+    self._value = None
+
+  @property
+  def computed(self) -> bool:
+    return self._fn is None
+
+  def get(self) -> Any:
+    """Returns the value, computing it on the first call only."""
+    if self._fn is not None:
+      with self._lock:
+        if self._fn is not None:
+          self._value = self._fn()
+          self._fn = None
+    return self._value
+
+  def __reduce__(self):
+    # Pickling, e.g. in episode checkpoints, stores the computed value.
+    return _identity, (self.get(),)
+
+  def __repr__(self) -> str:
+    if self._fn is None:
+      return repr(self._value)
+    return 'LazyField(<not computed>)'
+
+
+@dataclasses.dataclass(frozen=True)
+class ObservationMask:
+  """Parts of the observation an env captures eagerly in `get_state`.
+
+  Parts left out are still available from the returned `State`, but are only
+  captured when first read, and therefore reflect the screen at that time.
+
+  Attributes:
+    pixels: Whether to take a screenshot.
+    ui_elements: Whether to fetch the forest and convert it to UI elements.
+  """
+
+  pixels: bool = True
+  ui_elements: bool = True
+
+
 @dataclasses.dataclass(frozen=True)
 class State:
   """State of the Android environment.
 
+  Any field may be given as a `LazyField`, which is computed when the field is
+  first read and then replaces it.
+
   Attributes:
     pixels: RGB array of current screen.
     forest: Raw UI forest; see android_world_controller.py for more info.
     ui_elements: Processed children and stateful UI elements extracted from
       forest.
     auxiliaries: Additional information about the state.
+    geometry: Screen geometry when the state was observed, if known.
   """
 
   pixels: np.ndarray
   forest: Any
   ui_elements: list[representation_utils.UIElement]
   auxiliaries: dict[str, Any] | None = None
+  geometry: adb_utils.DeviceGeometry | None = None
+
+  def __getattribute__(self, name: str) -> Any:
+    value = super().__getattribute__(name)
+    if type(value) is LazyField:  # pylint: disable=unidiomatic-typecheck
+      value = value.get()
+      object.__setattr__(self, name, value)
+    return value
+
+  def __repr__(self) -> str:
+    # Unlike the generated repr, does not compute lazy fields: e.g.
+    # `asyncio.run` formats the repr of the task returning a state.
+    fields = ', '.join(f'{k}={v!r}' for k, v in vars(self).items())
+    return f'{type(self).__name__}({fields})'
+
+  def is_computed(self, name: str) -> bool:
+    """Returns whether the field called name has a value yet."""
+    value = vars(self)[name]
+    return not isinstance(value, LazyField) or value.computed
 
   @classmethod
   def create_and_infer_elements(
@@ -79,6 +178,14 @@ class AsyncEnv(abc.ABC):
   Changes from action execution may take some time to appear.
   """
 
+  # Parts of the observation `get_state` captures eagerly; agents set this to
+  # skip capturing what they do not read.
+  observation_mask: ObservationMask = ObservationMask()
+
+  # Runs the blocking calls of the coroutine API; created on first use.
+  _executor: futures.ThreadPoolExecutor | None = None
+  _executor_thread: threading.Thread | None = None
+
   @property
   @abc.abstractmethod
   def controller(self) -> android_world_controller.AndroidWorldController:
@@ -111,6 +218,122 @@ class AsyncEnv(abc.ABC):
         more detail.
     """
 
+  def wait_for_transition(
+      self,
+      action: json_action.JSONAction | None = None,
+      timeout: float = 2.0,
+  ) -> State:
+    """Waits for the screen to settle after an action and returns its state.
+
+    Implementations should return as soon as the device has settled. This
+    default waits for the whole timeout.
+
+    Args:
+      action: The action that was executed; by default, the last one executed
+        since the previous call.
+      timeout: Maximum seconds to wait.
+
+    Returns:
+      The state of the settled screen.
+    """
+    del action
+    time.sleep(timeout)
+    return self.get_state(wait_to_stabilize=False)
+
+  @property
+  def executor(self) -> futures.ThreadPoolExecutor:
+    """Returns the executor that runs the blocking calls of the coroutine API.
+
+    It has a single thread, so the env is never used by two calls at once.
+    """
+    if self._executor is None:
+      self._executor = futures.ThreadPoolExecutor(
+          max_workers=1,
+          thread_name_prefix='async_env',
+          initializer=self._set_executor_thread,
+      )
+    return self._executor
+
+  def _set_executor_thread(self) -> None:
+    self._executor_thread = threading.current_thread()
+
+  @property
+  def in_executor(self) -> bool:
+    """Returns whether the calling thread is the thread of `executor`.
+
+    Coroutine API calls made while it is busy wait for it, so code running in
+    it, e.g. through `run_blocking`, must not wait on them.
+    """
+    return self._executor_thread is threading.current_thread()
+
+  async def run_blocking(
+      self, fn: Callable[..., _T], *args: Any, **kwargs: Any
+  ) -> _T:
+    """Runs fn, which may use the blocking API of the env, in `executor`.
+
+    Lets a coroutine call code that uses the env, such as task setup, without
+    blocking the event loop. Do not call the blocking API from other threads
+    while coroutine API calls are pending. Since fn may rotate or resize the
+    screen, the geometry is invalidated once it returns.
+
+    Args:
+      fn: The function to run.
+      *args: Positional arguments for fn.
+      **kwargs: Keyword arguments for fn.
+
+    Returns:
+      The return value of fn.
+    """
+    try:
+      return await self._run_in_executor(fn, *args, **kwargs)
+    finally:
+      self.invalidate_geometry()
+
+  async def _run_in_executor(
+      self, fn: Callable[..., _T], *args: Any, **kwargs: Any
+  ) -> _T:
+    """Runs fn in `executor`, for methods that keep the geometry up to date."""
+    return await asyncio.get_running_loop().run_in_executor(
+        self.executor, functools.partial(fn, *args, **kwargs)
+    )
+
+  async def areset(self, go_home: bool = False) -> State:
+    """Coroutine version of `reset`."""
+    return await self._run_in_executor(self.reset, go_home=go_home)
+
+  async def aget_state(self, wait_to_stabilize: bool = False) -> State:
+    """Coroutine version of `get_state`.
+
+    Parts of the state left lazy by `observation_mask` stay lazy, and are
+    captured on the thread that first reads them. From a coroutine, read them
+    through `run_blocking`, e.g. `await env.run_blocking(lambda: state.pixels)`,
+    so that the capture neither blocks the event loop nor races other env calls.
+
+    Args:
+      wait_to_stabilize: Whether to wait for the screen to stabilize before
+        returning state.
+
+    Returns:
+      The state of the environment.
+    """
+    return await self._run_in_executor(
+        self.get_state, wait_to_stabilize=wait_to_stabilize
+    )
+
+  async def aexecute_action(self, action: json_action.JSONAction) -> None:
+    """Coroutine version of `execute_action`."""
+    await self._run_in_executor(self.execute_action, action)
+
+  async def await_for_transition(
+      self,
+      action: json_action.JSONAction | None = None,
+      timeout: float = 2.0,
+  ) -> State:
+    """Coroutine version of `wait_for_transition`; see `aget_state`."""
+    return await self._run_in_executor(
+        self.wait_for_transition, action=action, timeout=timeout
+    )
+
   def display_message(self, message: str, header: str = '') -> None:
     """Displays a message on the screen."""
 
@@ -195,8 +418,28 @@ class AsyncEnv(abc.ABC):
     orientation.
     """
 
+  @property
+  def geometry(self) -> adb_utils.DeviceGeometry:
+    """Returns the logical screen size, orientation and physical frame."""
+    return adb_utils.DeviceGeometry(
+        logical_screen_size=self.logical_screen_size,
+        orientation=self.orientation,
+        physical_frame_boundary=self.physical_frame_boundary,
+    )
+
+  def invalidate_geometry(self) -> None:
+    """Signals that the screen geometry may have changed.
+
+    Call after changing the orientation or screen size of the device other than
+    through `execute_action`, `reset` or `run_blocking`, e.g. after setting up
+    a task.
+    """
+
 
-def _process_timestep(timestep: dm_env.TimeStep) -> State:
+def _process_timestep(
+    timestep: dm_env.TimeStep,
+    geometry: adb_utils.DeviceGeometry | None = None,
+) -> State:
   """Parses timestep observation and returns State."""
   return State(
       pixels=timestep.observation['pixels'],
@@ -207,92 +450,94 @@ def _process_timestep(timestep: dm_env.TimeStep) -> State:
           android_world_controller.OBSERVATION_KEY_UI_ELEMENTS
       ],
       auxiliaries={},
+      geometry=geometry,
   )
 
 
+def _with_geometry(
+    state: State, geometry: adb_utils.DeviceGeometry
+) -> State:
+  """Returns a copy of state with geometry, keeping its lazy fields lazy."""
+  return State(**{**vars(state), 'geometry': geometry})
+
+
 class AsyncAndroidEnv(AsyncEnv):
   """Async environment interface using AndroidEnv to communicate with device."""
 
   interaction_cache = ''
 
   def __init__(
-      self, controller: android_world_controller.AndroidWorldController
+      self,
+      controller: android_world_controller.AndroidWorldController,
+      stability_detector: stability.StabilityDetector | None = None,
+      paste_threshold: int | None = None,
   ):
     self._controller = controller
-    self._prior_state = None
+    # Decides when the screen is stable for `get_state(wait_to_stabilize=True)`.
+    self.stability_detector = (
+        stability_detector or stability.MultiSignalStabilityDetector()
+    )
+    # Input text of at least this many characters is pasted from the clipboard
+    # instead of typed word by word; see `adb_utils.type_text`.
+    self.paste_threshold = paste_threshold
     # Variable used to temporarily save interactions between agent and user.
     # Like when agent use answer action to answer user questions, we
     # use this to save the agent response. Or later on when agent has the
     # ability to ask user question, user's answer will be saved here as well.
     self.interaction_cache = ''
+    # Geometry of the latest observation; None once it may have changed.
+    self._geometry: adb_utils.DeviceGeometry | None = None
+    # Last action executed since `wait_for_transition`, and the foreground
+    # activity before it if it is expected to change it.
+    self._pending_action: json_action.JSONAction | None = None
+    self._pre_action_activity: str | None = None
 
   @property
   def controller(self) -> android_world_controller.AndroidWorldController:
     return self._controller
 
   def reset(self, go_home: bool = False) -> State:
+    self.invalidate_geometry()
     if go_home:
       adb_utils.press_home_button(self.controller)
     self.interaction_cache = ''
 
-    return _process_timestep(self.controller.reset())
-
-  def _get_state(self):
-    return _process_timestep(self.controller.step(_get_no_op_action()))
+    timestep = self.controller.reset()
+    return _process_timestep(timestep, self._refresh_geometry())
 
-  def _get_stable_state(
-      self,
-      stability_threshold: int = 3,
-      sleep_duration: float = 0.5,
-      timeout: float = 6.0,
-  ) -> State:
-    """Checks if the UI elements remain stable over a number of checks and returns the state.
+  def _refresh_geometry(self) -> adb_utils.DeviceGeometry:
+    self._geometry = adb_utils.get_device_geometry(self.controller)
+    return self._geometry
 
-    Args:
-        stability_threshold: Number of consecutive checks where UI elements must
-          remain the same to consider UI stable.
-        sleep_duration: Minimum time in seconds between each check.
-        timeout: Maximum time in seconds to wait for UI to become stable before
-          giving up.
+  def _get_state(self) -> State:
+    """Captures the masked parts of the observation; defers the others."""
+    mask = self.observation_mask
+    pixels, forest, ui_elements = self.controller.capture(
+        pixels=mask.pixels, ui_elements=mask.ui_elements
+    )
+    if not mask.pixels:
+      pixels = LazyField(self.controller.get_screenshot)
+    if not mask.ui_elements:
+      lazy_forest = LazyField(self.controller.get_forest)
+      forest = lazy_forest
+      ui_elements = LazyField(
+          lambda: self.controller.forest_to_ui_elements(lazy_forest.get())
+      )
+    return State(
+        pixels=pixels, forest=forest, ui_elements=ui_elements, auxiliaries={}
+    )
 
-    Returns:
-        The current state of the UI if stability is achieved within the timeout.
-    """
-    if not self._prior_state:
-      self._prior_state = self._get_state()
-    if stability_threshold <= 0:
-      raise ValueError('Stability threshold must be a positive integer.')
-
-    stable_checks = 1
-    start_time = time.time()
-    deadline = start_time + timeout
-
-    while stable_checks < stability_threshold and time.time() < deadline:
-      iteration_start_time = time.time()
-      current_state = self._get_state()
-
-      if self._prior_state.ui_elements == current_state.ui_elements:
-        stable_checks += 1
-        if stable_checks == stability_threshold:
-          break  # Exit early if stability is achieved.
-      else:
-        stable_checks = 1  # Reset if any change is detected
-        self._prior_state = current_state
-
-      elapsed_time = time.time() - iteration_start_time
-      remaining_sleep = sleep_duration - elapsed_time
-      if remaining_sleep > 0:
-        sleep_time = min(remaining_sleep, deadline - time.time())
-        if sleep_time > 0:
-          time.sleep(sleep_time)
-      # If remaining_sleep <= 0, proceed immediately to the next iteration
-
-    return current_state  # pylint: disable=undefined-variable
+  def _get_stable_state(self) -> State:
+    """Returns the state once `stability_detector` considers it stable."""
+    return self.stability_detector.wait_until_stable(self._get_state)
 
   def get_state(self, wait_to_stabilize: bool = False) -> State:
     if wait_to_stabilize:
-      return self._get_stable_state()
-    return self._get_state()
+      state = self._get_stable_state()
+    else:
+      state = self._get_state()
+    # Fetched once per observation: apps may rotate the screen at any time.
+    return _with_geometry(state, self._refresh_geometry())
 
   def execute_action(self, action: json_action.JSONAction) -> None:
     if action.action_type == json_action.ANSWER:
@@ -304,12 +549,68 @@ class AsyncAndroidEnv(AsyncEnv):
       # Do nothing if it is a termination action.
       return
     state = self.get_state(wait_to_stabilize=False)
+    self._pending_action = action
+    self._pre_action_activity = (
+        self.foreground_activity_name
+        if action.action_type in _ACTIVITY_CHANGING_ACTIONS
+        else None
+    )
     actuation.execute_adb_action(
         action,
         state.ui_elements,
-        self.logical_screen_size,
+        state.geometry.logical_screen_size,
         self.controller,
+        paste_threshold=self.paste_threshold,
+    )
+    if action.action_type == 'change_orientation':
+      self.invalidate_geometry()
+
+  def wait_for_transition(
+      self,
+      action: json_action.JSONAction | None = None,
+      timeout: float = 2.0,
+  ) -> State:
+    """Returns the state once the screen settles after action.
+
+    After actions that launch or leave an activity, first waits for the
+    foreground activity to change, so that the screen is not found stable
+    before the transition starts. Then waits for `stability_detector` to
+    consider the screen stable. Both waits share the timeout.
+
+    Args:
+      action: The action that was executed; by default, the last one executed
+        since the previous call.
+      timeout: Maximum seconds to wait.
+
+    Returns:
+      The state of the settled screen.
+    """
+    action = action or self._pending_action
+    prior_activity = self._pre_action_activity
+    self._pending_action = self._pre_action_activity = None
+    if action is not None and action.action_type in _NO_TRANSITION_ACTIONS:
+      return self.get_state(wait_to_stabilize=False)
+
+    deadline = time.monotonic() + timeout
+    if prior_activity is not None:
+      self._wait_for_activity_change(prior_activity, deadline)
+    state = self.stability_detector.wait_until_stable(
+        self._get_state, timeout=max(0.0, deadline - time.monotonic())
     )
+    return _with_geometry(state, self._refresh_geometry())
+
+  def _wait_for_activity_change(
+      self, prior_activity: str, deadline: float
+  ) -> None:
+    """Polls the foreground activity until it is not prior_activity."""
+    deadline = min(deadline, time.monotonic() + _ACTIVITY_CHANGE_TIMEOUT_SEC)
+    while time.monotonic() < deadline:
+      if self.controller.adb_cache is not None:
+        # A cached answer would hide the change until its TTL expires.
+        self.controller.adb_cache.invalidate()
+      if self.foreground_activity_name != prior_activity:
+        return
+      time.sleep(_ACTIVITY_POLL_INTERVAL_SEC)
 
   def hide_automation_ui(self) -> None:
     """Hides the coordinates on screen."""
@@ -342,20 +643,34 @@ class AsyncAndroidEnv(AsyncEnv):
   def device_screen_size(self) -> tuple[int, int]:
     return self.controller.device_screen_size
 
+  @property
+  def geometry(self) -> adb_utils.DeviceGeometry:
+    """Returns the geometry of the latest observation, unless invalidated."""
+    if self._geometry is None:
+      return self._refresh_geometry()
+    return self._geometry
+
+  def invalidate_geometry(self) -> None:
+    self._geometry = None
+
   @property
   def logical_screen_size(self) -> tuple[int, int]:
-    return adb_utils.get_logical_screen_size(self.controller)
+    return self.geometry.logical_screen_size
 
   def close(self) -> None:
     try:
       self.controller.close()
     except:  # pylint: disable=bare-except
       logging.warning('Failed to close controller. Continuing.')
+    if self._executor is not None:
+      # Not waiting, since `close` may itself run in the executor.
+      self._executor.shutdown(wait=False)
+      self._executor = None
 
   @property
   def orientation(self) -> int:
-    return adb_utils.get_orientation(self.controller)
+    return self.geometry.orientation
 
   @property
   def physical_frame_boundary(self) -> tuple[int, int, int, int]:
-    return adb_utils.get_physical_frame_boundary(self.controller)
+    return self.geometry.physical_frame_boundary
@@ -12,11 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import pickle
+import threading
 from unittest import mock
 
 from absl.testing import absltest
+from android_world.env import actuation
+from android_world.env import adb_utils
 from android_world.env import interface
+from android_world.env import json_action
 from android_world.env import representation_utils
+from android_world.env import stability
 import numpy as np
 
 
@@ -28,39 +35,43 @@ class InterfaceTest(absltest.TestCase):
     states = [
         interface.State(
             ui_elements=stable_ui_elements,
-            pixels=np.empty([1, 2, 3]),
+            pixels=np.zeros([1, 2, 3]),
             forest=None,
         )
         for _ in range(4)
     ]
-    env = interface.AsyncAndroidEnv(mock.MagicMock())
+    env = interface.AsyncAndroidEnv(
+        mock.MagicMock(),
+        stability.MultiSignalStabilityDetector(stability_threshold=3),
+    )
     env._get_state = mock.MagicMock(side_effect=states)
 
-    self.assertEqual(
-        env._get_stable_state(
-            stability_threshold=3, sleep_duration=0.1, timeout=1
-        ),
-        states[2],
-    )
+    self.assertEqual(env._get_stable_state(), states[2])
+    self.assertTrue(env.stability_detector.history[-1].stable)
 
   def test_ui_stability_false_due_to_timeout(self):
     changing_ui_elements = [
-        representation_utils.UIElement(text=f"Element{i}") for i in range(10)
+        representation_utils.UIElement(text=f"Element{i}") for i in range(100)
     ]
-    env = interface.AsyncAndroidEnv(mock.MagicMock())
+    env = interface.AsyncAndroidEnv(
+        mock.MagicMock(),
+        stability.MultiSignalStabilityDetector(
+            initial_interval=0.01, max_interval=0.01, timeout=0.1
+        ),
+    )
     states = [
         interface.State(
-            ui_elements=[elem], pixels=np.empty([1, 2, 3]), forest=None
+            ui_elements=[elem], pixels=np.zeros([1, 2, 3]), forest=None
         )
         for elem in changing_ui_elements
     ]
     env._get_state = mock.MagicMock(side_effect=states)
-    self.assertEqual(
-        env._get_stable_state(
-            stability_threshold=3, sleep_duration=0.1, timeout=0.41
-        ),
-        states[5],
-    )
+
+    state = env._get_stable_state()
+
+    record = env.stability_detector.history[-1]
+    self.assertFalse(record.stable)
+    self.assertIs(state, states[record.observations - 1])
 
   @mock.patch("time.sleep", return_value=None)
   def test_stability_fluctuates(self, unused_mocked_time_sleep):
@@ -73,19 +84,280 @@ class InterfaceTest(absltest.TestCase):
     )
     states = [
         interface.State(
-            ui_elements=[elem], pixels=np.empty([1, 2, 3]), forest=None
+            ui_elements=[elem], pixels=np.zeros([1, 2, 3]), forest=None
         )
         for elem in fluctuating_ui_elements
     ]
     env._get_state = mock.MagicMock(side_effect=states)
-    cur = env._get_stable_state(
-        stability_threshold=3, sleep_duration=0.5, timeout=2.5
-    )
+    cur = env._get_stable_state()
     self.assertEqual(
         cur,
         states[5],
     )
 
+  @mock.patch.object(adb_utils, "get_device_geometry")
+  def test_geometry_fetched_once_per_observation(self, mock_get_geometry):
+    geometry = adb_utils.DeviceGeometry(
+        logical_screen_size=(1080, 2400),
+        orientation=0,
+        physical_frame_boundary=(0, 0, 1080, 2400),
+    )
+    mock_get_geometry.return_value = geometry
+    env = interface.AsyncAndroidEnv(mock.MagicMock())
+    env._get_state = mock.MagicMock(
+        return_value=interface.State(
+            ui_elements=[], pixels=np.empty([1, 2, 3]), forest=None
+        )
+    )
+
+    state = env.get_state()
+    sizes = [env.logical_screen_size, env.orientation]
+    boundary = env.physical_frame_boundary
+
+    self.assertIs(state.geometry, geometry)
+    self.assertEqual(sizes, [(1080, 2400), 0])
+    self.assertEqual(boundary, (0, 0, 1080, 2400))
+    mock_get_geometry.assert_called_once()
+
+    env.invalidate_geometry()
+    self.assertEqual(env.orientation, 0)
+    self.assertEqual(mock_get_geometry.call_count, 2)
+
+  @mock.patch.object(adb_utils, "get_device_geometry")
+  def test_geometry_refetched_after_reset_and_run_blocking(
+      self, mock_get_geometry
+  ):
+    portrait = adb_utils.DeviceGeometry(
+        logical_screen_size=(1080, 2400),
+        orientation=0,
+        physical_frame_boundary=(0, 0, 1080, 2400),
+    )
+    landscape = adb_utils.DeviceGeometry(
+        logical_screen_size=(2400, 1080),
+        orientation=1,
+        physical_frame_boundary=(0, 0, 1080, 2400),
+    )
+    mock_get_geometry.return_value = portrait
+    controller = mock.MagicMock()
+    controller.reset.side_effect = RuntimeError("reset failed")
+    env = interface.AsyncAndroidEnv(controller)
+    self.addCleanup(env.close)
+    self.assertEqual(env.orientation, 0)
+
+    # A failed reset does not keep the geometry from before it.
+    mock_get_geometry.return_value = landscape
+    with self.assertRaises(RuntimeError):
+      env.reset()
+    self.assertEqual(env.orientation, 1)
+
+    # E.g. task setup that rotates the screen.
+    def rotate():
+      mock_get_geometry.return_value = portrait
+
+    asyncio.run(env.run_blocking(rotate))
+    self.assertEqual(env.orientation, 0)
+
+  @mock.patch.object(adb_utils, "get_device_geometry")
+  def test_masked_out_fields_are_captured_on_first_read(
+      self, unused_mock_get_geometry
+  ):
+    controller = mock.MagicMock()
+    controller.capture.return_value = (None, None, None)
+    controller.get_forest.return_value = "forest"
+    controller.forest_to_ui_elements.return_value = [
+        representation_utils.UIElement(text="Element")
+    ]
+    env = interface.AsyncAndroidEnv(controller)
+    env.observation_mask = interface.ObservationMask(
+        pixels=False, ui_elements=False
+    )
+
+    state = env.get_state()
+    controller.capture.assert_called_once_with(pixels=False, ui_elements=False)
+    controller.get_screenshot.assert_not_called()
+    controller.get_forest.assert_not_called()
+    self.assertFalse(state.is_computed("ui_elements"))
+
+    self.assertEqual(state.ui_elements[0].text, "Element")
+    self.assertEqual(state.ui_elements[0].text, "Element")
+    controller.forest_to_ui_elements.assert_called_once_with("forest")
+    controller.get_forest.assert_called_once()
+    self.assertTrue(state.is_computed("forest"))
+    self.assertFalse(state.is_computed("pixels"))
+    controller.get_screenshot.assert_not_called()
+
+  @mock.patch.object(adb_utils, "get_device_geometry")
+  def test_masked_in_fields_are_captured_eagerly(
+      self, unused_mock_get_geometry
+  ):
+    controller = mock.MagicMock()
+    pixels = np.empty([1, 2, 3])
+    controller.capture.return_value = (pixels, None, [])
+    env = interface.AsyncAndroidEnv(controller)
+
+    state = env.get_state()
+
+    controller.capture.assert_called_once_with(pixels=True, ui_elements=True)
+    self.assertTrue(state.is_computed("pixels"))
+    self.assertIs(state.pixels, pixels)
+    self.assertEqual(state.ui_elements, [])
+
+  def test_repr_does_not_compute_lazy_fields(self):
+    state = interface.State(
+        pixels=interface.LazyField(lambda: "pixels"),
+        forest=None,
+        ui_elements=[],
+    )
+
+    self.assertIn("pixels=LazyField(<not computed>)", repr(state))
+    self.assertFalse(state.is_computed("pixels"))
+    self.assertEqual(state.pixels, "pixels")
+    self.assertIn("pixels='pixels'", repr(state))
+
+  def test_pickling_state_computes_lazy_fields(self):
+    state = interface.State(
+        pixels=interface.LazyField(lambda: "pixels"),
+        forest=None,
+        ui_elements=[],
+    )
+
+    restored = pickle.loads(pickle.dumps(state))
+
+    self.assertEqual(restored.pixels, "pixels")
+    self.assertTrue(restored.is_computed("pixels"))
+
+  @mock.patch.object(adb_utils, "get_device_geometry")
+  def test_wait_for_transition_skips_actions_without_transition(
+      self, unused_mock_get_geometry
+  ):
+    env = interface.AsyncAndroidEnv(mock.MagicMock())
+    env._get_state = mock.MagicMock(
+        return_value=interface.State(
+            ui_elements=[], pixels=np.zeros([1, 2, 3]), forest=None
+        )
+    )
+    env.stability_detector = mock.create_autospec(
+        stability.StabilityDetector, instance=True
+    )
+
+    env.wait_for_transition(json_action.JSONAction(action_type="answer"))
+
+    env._get_state.assert_called_once()
+    env.stability_detector.wait_until_stable.assert_not_called()
+
+  @mock.patch("time.sleep", return_value=None)
+  @mock.patch.object(adb_utils, "get_device_geometry")
+  @mock.patch.object(adb_utils, "get_current_activity")
+  def test_wait_for_transition_waits_for_activity_change(
+      self, mock_get_activity, unused_mock_get_geometry, unused_mock_sleep
+  ):
+    mock_get_activity.side_effect = [
+        ("home", None),
+        ("home", None),
+        ("clock", None),
+    ]
+    env = interface.AsyncAndroidEnv(mock.MagicMock())
+    env._get_state = mock.MagicMock(
+        return_value=interface.State(
+            ui_elements=[], pixels=np.zeros([1, 2, 3]), forest=None
+        )
+    )
+    env.stability_detector = mock.create_autospec(
+        stability.StabilityDetector, instance=True
+    )
+    env.stability_detector.wait_until_stable.return_value = (
+        env._get_state.return_value
+    )
+
+    with mock.patch.object(actuation, "execute_adb_action"):
+      env.execute_action(
+          json_action.JSONAction(action_type="open_app", app_name="Clock")
+      )
+    env.wait_for_transition(timeout=5.0)
+
+    self.assertEqual(mock_get_activity.call_count, 3)
+    env.stability_detector.wait_until_stable.assert_called_once()
+    self.assertLessEqual(
+        env.stability_detector.wait_until_stable.call_args.kwargs["timeout"],
+        5.0,
+    )
+
+  @mock.patch.object(adb_utils, "get_device_geometry")
+  def test_coroutine_api_runs_calls_in_executor(self, unused_mock_get_geometry):
+    env = interface.AsyncAndroidEnv(mock.MagicMock())
+    self.addCleanup(env.close)
+    state = interface.State(
+        ui_elements=[], pixels=np.zeros([1, 2, 3]), forest=None
+    )
+    threads = []
+
+    def get_state(wait_to_stabilize=False):
+      del wait_to_stabilize
+      threads.append(threading.current_thread())
+      return state
+
+    env._get_state = mock.MagicMock(side_effect=get_state)
+
+    async def run():
+      return await asyncio.gather(env.aget_state(), env.aget_state())
+
+    states = asyncio.run(run())
+
+    self.assertLen(states, 2)
+    self.assertIs(states[0].pixels, state.pixels)
+    # Calls run in turn, on the single executor thread.
+    self.assertLen(set(threads), 1)
+    self.assertIsNot(threads[0], threading.current_thread())
+
+  @mock.patch.object(adb_utils, "get_device_geometry")
+  def test_aget_state_keeps_masked_out_fields_lazy(
+      self, unused_mock_get_geometry
+  ):
+    controller = mock.MagicMock()
+    controller.capture.return_value = (None, None, None)
+    env = interface.AsyncAndroidEnv(controller)
+    self.addCleanup(env.close)
+    env.observation_mask = interface.ObservationMask(
+        pixels=False, ui_elements=False
+    )
+
+    state = asyncio.run(env.aget_state())
+
+    controller.capture.assert_called_once_with(pixels=False, ui_elements=False)
+    controller.get_screenshot.assert_not_called()
+    controller.get_forest.assert_not_called()
+    self.assertFalse(state.is_computed("pixels"))
+    self.assertFalse(state.is_computed("ui_elements"))
+
+    threads = []
+
+    def get_screenshot():
+      threads.append(threading.current_thread())
+      return np.zeros([1, 2, 3])
+
+    controller.get_screenshot.side_effect = get_screenshot
+    asyncio.run(env.run_blocking(lambda: state.pixels))
+    self.assertEqual(threads, [env._executor_thread])
+
+  def test_in_executor(self):
+    env = interface.AsyncAndroidEnv(mock.MagicMock())
+    self.addCleanup(env.close)
+
+    self.assertFalse(env.in_executor)
+    self.assertTrue(asyncio.run(env.run_blocking(lambda: env.in_executor)))
+
+  def test_aexecute_action(self):
+    env = interface.AsyncAndroidEnv(mock.MagicMock())
+    self.addCleanup(env.close)
+
+    asyncio.run(
+        env.aexecute_action(
+            json_action.JSONAction(action_type="answer", text="42")
+        )
+    )
+
+    self.assertEqual(env.interaction_cache, "42")
+
 
 if __name__ == "__main__":
   absltest.main()
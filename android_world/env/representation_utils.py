@@ -15,12 +15,34 @@
 """Tools for processing and representing accessibility trees."""
 
 import dataclasses
-from typing import Any, Optional
+import io
+import sys
+from typing import Any, Iterable, Optional, Self
 import xml.etree.ElementTree as ET
 from android_env.proto.a11y import android_accessibility_forest_pb2
+import numpy as np
 
 
-@dataclasses.dataclass
+def _get_slots_state(obj: Any) -> dict[str, Any]:
+  """Returns the fields to pickle, in the layout used before `__slots__`."""
+  return {
+      field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)
+  }
+
+
+def _set_slots_state(obj: Any, state: dict[str, Any]) -> None:
+  """Restores pickled fields; those missing from older pickles get defaults."""
+  for field in dataclasses.fields(obj):
+    if field.default is not dataclasses.MISSING:
+      setattr(obj, field.name, field.default)
+  for name, value in state.items():
+    setattr(obj, name, value)
+
+
+# Screens with hundreds of nodes create thousands of these per observation,
+# which are kept in agent histories and checkpoints: `__slots__` keeps them
+# small.
+@dataclasses.dataclass(slots=True)
 class BoundingBox:
   """Class for representing a bounding box."""
 
@@ -48,8 +70,11 @@ class BoundingBox:
   def area(self) -> float | int:
     return self.width * self.height
 
+  __getstate__ = _get_slots_state
+  __setstate__ = _set_slots_state
 
-@dataclasses.dataclass
+
+@dataclasses.dataclass(slots=True)
 class UIElement:
   """Represents a UI element."""
 
@@ -76,6 +101,9 @@ class UIElement:
   resource_id: Optional[str] = None
   metadata: Optional[dict[str, Any]] = None
 
+  __getstate__ = _get_slots_state
+  __setstate__ = _set_slots_state
+
 
 def accessibility_node_to_ui_element(
     node: Any,
@@ -133,6 +161,20 @@ def _normalize_bounding_box(
   )
 
 
+def is_ui_element_node(
+    node: Any, exclude_invisible_elements: bool = False
+) -> bool:
+  """Returns whether an a11y node is extracted as a UI element.
+
+  Args:
+    node: A node of an accessibility forest.
+    exclude_invisible_elements: True if invisible nodes are not extracted.
+  """
+  if node.child_ids and not (node.content_description or node.is_scrollable):
+    return False
+  return not exclude_invisible_elements or node.is_visible_to_user
+
+
 def forest_to_ui_elements(
     forest: android_accessibility_forest_pb2.AndroidAccessibilityForest | Any,
     exclude_invisible_elements: bool = False,
@@ -155,65 +197,310 @@ def forest_to_ui_elements(
   elements = []
   for window in forest.windows:
     for node in window.tree.nodes:
-      if not node.child_ids or node.content_description or node.is_scrollable:
-        if exclude_invisible_elements and not node.is_visible_to_user:
-          continue
-        else:
-          elements.append(accessibility_node_to_ui_element(node, screen_size))
+      if is_ui_element_node(node, exclude_invisible_elements):
+        elements.append(accessibility_node_to_ui_element(node, screen_size))
   return elements
 
 
-def _parse_ui_hierarchy(xml_string: str) -> dict[str, Any]:
-  """Parses the UI hierarchy XML into a dictionary structure."""
-  root = ET.fromstring(xml_string)
+# Columns of a `UIElementTable`, named as the `UIElement` attributes they hold.
+_TABLE_STRING_COLUMNS = (
+    'text',
+    'content_description',
+    'class_name',
+    'hint_text',
+    'package_name',
+    'resource_name',
+    'tooltip',
+    'resource_id',
+)
+_TABLE_FLAG_COLUMNS = (
+    'is_checked',
+    'is_checkable',
+    'is_clickable',
+    'is_editable',
+    'is_enabled',
+    'is_focused',
+    'is_focusable',
+    'is_long_clickable',
+    'is_scrollable',
+    'is_selected',
+    'is_visible',
+)
+
+
+def _bbox_row(bbox: Optional[BoundingBox]) -> tuple[float, ...]:
+  if bbox is None:
+    return (np.nan,) * 4
+  return (bbox.x_min, bbox.x_max, bbox.y_min, bbox.y_max)
+
+
+def _intern(text: Optional[str]) -> Optional[str]:
+  return sys.intern(text) if text else None
+
+
+class UIElementTable:
+  """UI elements stored column by column, for vectorized queries.
+
+  Bounding boxes are (n, 4) float arrays of `x_min, x_max, y_min, y_max`, with
+  NaN rows for elements without one. Flags are boolean arrays, in which `None`
+  reads as False; `unset` records which flags were `None`, so converting back
+  to `UIElement`s keeps them apart. Strings are object arrays of interned
+  strings, or None. `metadata` is not stored.
+
+  Attributes:
+    bbox_pixels: Bounding boxes in pixels.
+    bbox: Bounding boxes normalized by the screen size.
+    columns: The string and flag columns, by `UIElement` attribute name.
+    unset: Boolean masks of the rows in which each flag column was `None`.
+  """
 
-  def parse_node(node):
-    result = node.attrib
-    result['children'] = [parse_node(child) for child in node]
-    return result
+  def __init__(
+      self,
+      bbox_pixels: np.ndarray,
+      bbox: np.ndarray,
+      columns: dict[str, np.ndarray],
+      unset: Optional[dict[str, np.ndarray]] = None,
+  ):
+    self.bbox_pixels = bbox_pixels
+    self.bbox = bbox
+    self.columns = columns
+    if unset is None:
+      unset = {
+          name: np.zeros(len(bbox_pixels), dtype=bool)
+          for name in _TABLE_FLAG_COLUMNS
+      }
+    self.unset = unset
+
+  @classmethod
+  def from_ui_elements(cls, ui_elements: Iterable[UIElement]) -> Self:
+    """Returns a table of ui_elements, in the same order."""
+    ui_elements = list(ui_elements)
+    columns = {
+        name: np.array(
+            [_intern(getattr(e, name)) for e in ui_elements], dtype=object
+        )
+        for name in _TABLE_STRING_COLUMNS
+    }
+    unset = {}
+    for name in _TABLE_FLAG_COLUMNS:
+      values = [getattr(e, name) for e in ui_elements]
+      columns[name] = np.array([bool(v) for v in values], dtype=bool)
+      unset[name] = np.array([v is None for v in values], dtype=bool)
+    return cls(
+        bbox_pixels=np.array(
+            [_bbox_row(e.bbox_pixels) for e in ui_elements], dtype=float
+        ).reshape(-1, 4),
+        bbox=np.array(
+            [_bbox_row(e.bbox) for e in ui_elements], dtype=float
+        ).reshape(-1, 4),
+        columns=columns,
+        unset=unset,
+    )
 
-  return parse_node(root)
+  def __len__(self) -> int:
+    return len(self.bbox_pixels)
+
+  def __getattr__(self, name: str) -> np.ndarray:
+    # Only called for names that are not attributes, i.e. column names.
+    try:
+      return self.__dict__['columns'][name]
+    except KeyError:
+      raise AttributeError(name) from None
+
+  def select(self, rows: np.ndarray) -> Self:
+    """Returns a table of the rows selected by a boolean mask or indices."""
+    return type(self)(
+        bbox_pixels=self.bbox_pixels[rows],
+        bbox=self.bbox[rows],
+        columns={name: column[rows] for name, column in self.columns.items()},
+        unset={name: mask[rows] for name, mask in self.unset.items()},
+    )
 
+  def centers(self) -> np.ndarray:
+    """Returns the (n, 2) centers of the pixel bounding boxes, as (x, y)."""
+    return np.stack(
+        [
+            (self.bbox_pixels[:, 0] + self.bbox_pixels[:, 1]) / 2.0,
+            (self.bbox_pixels[:, 2] + self.bbox_pixels[:, 3]) / 2.0,
+        ],
+        axis=1,
+    )
 
-def xml_dump_to_ui_elements(xml_string: str) -> list[UIElement]:
-  """Converts a UI hierarchy XML dump from uiautomator dump to UIElements."""
-  parsed_hierarchy = _parse_ui_hierarchy(xml_string)
-  ui_elements = []
+  def areas(self) -> np.ndarray:
+    """Returns the areas of the pixel bounding boxes."""
+    return (self.bbox_pixels[:, 1] - self.bbox_pixels[:, 0]) * (
+        self.bbox_pixels[:, 3] - self.bbox_pixels[:, 2]
+    )
 
-  def process_node(node, is_root):
-    bounds = node.get('bounds')
-    if bounds:
-      x_min, y_min, x_max, y_max = map(
-          int, bounds.strip('[]').replace('][', ',').split(',')
+  def valid_mask(self, screen_width_height_px: tuple[int, int]) -> np.ndarray:
+    """Returns which elements are visible and have a box on the screen.
+
+    Matches `m3a_utils.validate_ui_element`: elements without a bounding box
+    are valid if visible.
+
+    Args:
+      screen_width_height_px: The screen size in pixels.
+    """
+    screen_width, screen_height = screen_width_height_px
+    x_min, x_max, y_min, y_max = self.bbox_pixels.T
+    with np.errstate(invalid='ignore'):
+      on_screen = (
+          (x_min < x_max)
+          & (x_min < screen_width)
+          & (x_max > 0)
+          & (y_min < y_max)
+          & (y_min < screen_height)
+          & (y_max > 0)
       )
-      bbox = BoundingBox(x_min, x_max, y_min, y_max)
-    else:
-      bbox = None
-
-    ui_element = UIElement(
-        text=node.get('text'),
-        content_description=node.get('content-desc'),
-        class_name=node.get('class'),
-        bbox=bbox,
-        bbox_pixels=bbox,
-        is_checked=node.get('checked') == 'true',
-        is_checkable=node.get('checkable') == 'true',
-        is_clickable=node.get('clickable') == 'true',
-        is_enabled=node.get('enabled') == 'true',
-        is_focused=node.get('focused') == 'true',
-        is_focusable=node.get('focusable') == 'true',
-        is_long_clickable=node.get('long-clickable') == 'true',
-        is_scrollable=node.get('scrollable') == 'true',
-        is_selected=node.get('selected') == 'true',
-        package_name=node.get('package'),
-        resource_id=node.get('resource-id'),
-        is_visible=True,
+    return self.columns['is_visible'] & (
+        np.isnan(self.bbox_pixels).any(axis=1) | on_screen
     )
-    if not is_root:
-      ui_elements.append(ui_element)
 
-    for child in node.get('children', []):
-      process_node(child, is_root=False)
+  def hit_test(self, x: float, y: float) -> np.ndarray:
+    """Returns the indices of the elements containing a pixel, smallest first.
+
+    Args:
+      x: The horizontal pixel coordinate.
+      y: The vertical pixel coordinate.
+    """
+    x_min, x_max, y_min, y_max = self.bbox_pixels.T
+    with np.errstate(invalid='ignore'):
+      hits = np.flatnonzero(
+          (x_min <= x) & (x <= x_max) & (y_min <= y) & (y <= y_max)
+      )
+    return hits[np.argsort(self.areas()[hits], kind='stable')]
+
+  def to_ui_element(self, index: int) -> UIElement:
+    """Returns the element in row index as a `UIElement`."""
+    values = {name: column[index] for name, column in self.columns.items()}
+    for name in _TABLE_FLAG_COLUMNS:
+      values[name] = None if self.unset[name][index] else bool(values[name])
+    pixels = self.bbox_pixels[index]
+    if not np.isnan(pixels).any():
+      # Stored as floats to allow NaN; pixels are usually whole numbers.
+      values['bbox_pixels'] = BoundingBox(
+          *(int(v) if v.is_integer() else v for v in pixels.tolist())
+      )
+    if not np.isnan(self.bbox[index]).any():
+      values['bbox'] = BoundingBox(*self.bbox[index].tolist())
+    return UIElement(**values)
+
+  def to_ui_elements(self) -> list[UIElement]:
+    """Returns all elements as `UIElement`s, for existing callers."""
+    return [self.to_ui_element(i) for i in range(len(self))]
 
-  process_node(parsed_hierarchy, is_root=True)
+
+def forest_to_ui_element_table(
+    forest: android_accessibility_forest_pb2.AndroidAccessibilityForest | Any,
+    exclude_invisible_elements: bool = False,
+    screen_size: Optional[tuple[int, int]] = None,
+) -> UIElementTable:
+  """Extracts the nodes of `forest_to_ui_elements` into a `UIElementTable`.
+
+  Reads the nodes into columns directly, without creating a `UIElement` and
+  two `BoundingBox`es per node.
+
+  Args:
+    forest: The forest to extract leaf nodes from.
+    exclude_invisible_elements: True if invisible elements should not be
+      returned.
+    screen_size: The size of the device screen in pixels (width, height).
+
+  Returns:
+    The extracted UI elements.
+  """
+  bbox_pixels = []
+  strings = {name: [] for name in _TABLE_STRING_COLUMNS}
+  flags = {name: [] for name in _TABLE_FLAG_COLUMNS}
+  for window in forest.windows:
+    for node in window.tree.nodes:
+      if not is_ui_element_node(node, exclude_invisible_elements):
+        continue
+      bounds = node.bounds_in_screen
+      bbox_pixels.append((bounds.left, bounds.right, bounds.top, bounds.bottom))
+      strings['text'].append(_intern(node.text))
+      strings['content_description'].append(
+          _intern(node.content_description)
+      )
+      strings['class_name'].append(_intern(node.class_name))
+      strings['hint_text'].append(_intern(node.hint_text))
+      strings['package_name'].append(_intern(node.package_name))
+      strings['resource_name'].append(_intern(node.view_id_resource_name))
+      strings['tooltip'].append(None)
+      strings['resource_id'].append(None)
+      for name in _TABLE_FLAG_COLUMNS[:-1]:
+        flags[name].append(getattr(node, name))
+      flags['is_visible'].append(node.is_visible_to_user)
+
+  pixels = np.array(bbox_pixels, dtype=float).reshape(-1, 4)
+  if screen_size is not None:
+    width, height = screen_size
+    normalized = pixels / np.array([width, width, height, height], dtype=float)
+  else:
+    normalized = np.full_like(pixels, np.nan)
+  columns = {
+      name: np.array(values, dtype=object) for name, values in strings.items()
+  }
+  columns.update(
+      {name: np.array(values, dtype=bool) for name, values in flags.items()}
+  )
+  return UIElementTable(bbox_pixels=pixels, bbox=normalized, columns=columns)
+
+
+def _xml_node_to_ui_element(attributes: dict[str, str]) -> UIElement:
+  """Converts the attributes of a uiautomator dump node to a UIElement."""
+  bounds = attributes.get('bounds')
+  if bounds:
+    x_min, y_min, x_max, y_max = map(
+        int, bounds.strip('[]').replace('][', ',').split(',')
+    )
+    bbox = BoundingBox(x_min, x_max, y_min, y_max)
+  else:
+    bbox = None
+
+  return UIElement(
+      text=attributes.get('text'),
+      content_description=attributes.get('content-desc'),
+      class_name=attributes.get('class'),
+      bbox=bbox,
+      bbox_pixels=bbox,
+      is_checked=attributes.get('checked') == 'true',
+      is_checkable=attributes.get('checkable') == 'true',
+      is_clickable=attributes.get('clickable') == 'true',
+      is_enabled=attributes.get('enabled') == 'true',
+      is_focused=attributes.get('focused') == 'true',
+      is_focusable=attributes.get('focusable') == 'true',
+      is_long_clickable=attributes.get('long-clickable') == 'true',
+      is_scrollable=attributes.get('scrollable') == 'true',
+      is_selected=attributes.get('selected') == 'true',
+      package_name=attributes.get('package'),
+      resource_id=attributes.get('resource-id'),
+      is_visible=True,
+  )
+
+
+def xml_dump_to_ui_elements(xml_string: str) -> list[UIElement]:
+  """Converts a UI hierarchy XML dump from uiautomator dump to UIElements.
+
+  Every node below the root is converted, in document order, as it is parsed;
+  no tree of the whole dump is kept.
+
+  Args:
+    xml_string: The output of `adb_utils.uiautomator_dump`.
+
+  Returns:
+    The UI elements of the dump.
+  """
+  ui_elements = []
+  depth = 0
+  for event, node in ET.iterparse(
+      io.StringIO(xml_string), events=('start', 'end')
+  ):
+    if event == 'start':
+      if depth:
+        ui_elements.append(_xml_node_to_ui_element(node.attrib))
+      depth += 1
+    else:
+      depth -= 1
+      node.clear()  # Frees the subtree, which has already been converted.
   return ui_elements
@@ -13,11 +13,14 @@
 # limitations under the License.
 
 import dataclasses
+import pickle
+import types
 from unittest import mock
 
 from absl.testing import absltest
 from absl.testing import parameterized
 from android_world.env import representation_utils
+import numpy as np
 
 
 @dataclasses.dataclass(frozen=True)
@@ -115,5 +118,201 @@ class TestAccessibilityNodeToUIElement(parameterized.TestCase):
     self.assertEqual(ui_element.bbox, expected_normalized_bbox)
 
 
+
+# `UIElement` as it was before `__slots__`, with fewer fields. Pickled by
+# reference to `representation_utils.UIElement`, while patched in.
+_UIElementWithoutSlots = dataclasses.make_dataclass(
+    'UIElement', [('text', str | None, dataclasses.field(default=None))]
+)
+_UIElementWithoutSlots.__module__ = representation_utils.__name__
+
+
+class TestUIElementPickling(parameterized.TestCase):
+
+  @parameterized.parameters(range(pickle.HIGHEST_PROTOCOL + 1))
+  def test_round_trip(self, protocol):
+    element = representation_utils.UIElement(
+        text='Item',
+        bbox_pixels=representation_utils.BoundingBox(0, 10, 0, 20),
+        metadata={'key': 'value'},
+    )
+
+    restored = pickle.loads(pickle.dumps(element, protocol=protocol))
+
+    self.assertEqual(restored, element)
+
+  def test_loads_pickles_from_before_slots(self):
+    element = _UIElementWithoutSlots(text='Item')
+    with mock.patch.object(
+        representation_utils, 'UIElement', _UIElementWithoutSlots
+    ):
+      data = pickle.dumps(element)
+
+    restored = pickle.loads(data)
+
+    self.assertIsInstance(restored, representation_utils.UIElement)
+    self.assertEqual(restored.text, 'Item')
+    self.assertIsNone(restored.is_checked)
+
+
+
+def _node(child_ids=(), **kwargs) -> types.SimpleNamespace:
+  """Returns a stand-in for an a11y node proto, with proto defaults."""
+  fields = dict(
+      child_ids=list(child_ids),
+      bounds_in_screen=BoundsInScreen(0, 10, 0, 10),
+      text='',
+      content_description='',
+      class_name='',
+      hint_text='',
+      package_name='',
+      view_id_resource_name='',
+      is_visible_to_user=True,
+  )
+  for name in (
+      'is_checked',
+      'is_checkable',
+      'is_clickable',
+      'is_editable',
+      'is_enabled',
+      'is_focused',
+      'is_focusable',
+      'is_long_clickable',
+      'is_scrollable',
+      'is_selected',
+  ):
+    fields[name] = False
+  fields.update(kwargs)
+  return types.SimpleNamespace(**fields)
+
+
+def _forest(nodes) -> types.SimpleNamespace:
+  window = types.SimpleNamespace(tree=types.SimpleNamespace(nodes=nodes))
+  return types.SimpleNamespace(windows=[window])
+
+
+class TestUIElementTable(absltest.TestCase):
+
+  def test_table_matches_forest_to_ui_elements(self):
+    forest = _forest([
+        _node(
+            child_ids=[1, 2], bounds_in_screen=BoundsInScreen(0, 100, 0, 200)
+        ),
+        _node(text='OK', is_clickable=True),
+        _node(
+            content_description='Icon',
+            bounds_in_screen=BoundsInScreen(50, 70, 20, 40),
+        ),
+        _node(text='Hidden', is_visible_to_user=False),
+    ])
+
+    table = representation_utils.forest_to_ui_element_table(
+        forest, exclude_invisible_elements=True, screen_size=(100, 200)
+    )
+
+    self.assertEqual(
+        table.to_ui_elements(),
+        representation_utils.forest_to_ui_elements(
+            forest, exclude_invisible_elements=True, screen_size=(100, 200)
+        ),
+    )
+
+  def test_from_ui_elements_to_ui_elements(self):
+    elements = [
+        representation_utils.UIElement(
+            text='A',
+            bbox_pixels=representation_utils.BoundingBox(0, 10, 0, 20),
+            is_visible=True,
+            is_clickable=False,
+        ),
+        representation_utils.UIElement(text='B', is_visible=True),
+    ]
+
+    table = representation_utils.UIElementTable.from_ui_elements(elements)
+
+    restored = table.to_ui_elements()
+    self.assertLen(table, 2)
+    self.assertEqual(list(table.text), ['A', 'B'])
+    self.assertEqual(restored[0].bbox_pixels, elements[0].bbox_pixels)
+    self.assertIsNone(restored[1].bbox_pixels)
+    self.assertEqual(
+        [e.is_visible for e in restored], [e.is_visible for e in elements]
+    )
+    self.assertFalse(table.is_checked[1])
+    self.assertIsNone(restored[1].is_checked)
+    self.assertIs(restored[0].is_clickable, False)
+    self.assertEqual(
+        table.select(np.array([1])).to_ui_elements(), [elements[1]]
+    )
+
+  def test_valid_mask(self):
+    table = representation_utils.UIElementTable.from_ui_elements([
+        representation_utils.UIElement(
+            bbox_pixels=representation_utils.BoundingBox(0, 10, 0, 10),
+            is_visible=True,
+        ),
+        representation_utils.UIElement(
+            bbox_pixels=representation_utils.BoundingBox(0, 10, 0, 10),
+            is_visible=False,
+        ),
+        representation_utils.UIElement(
+            bbox_pixels=representation_utils.BoundingBox(200, 300, 0, 10),
+            is_visible=True,
+        ),
+        representation_utils.UIElement(
+            bbox_pixels=representation_utils.BoundingBox(10, 10, 0, 10),
+            is_visible=True,
+        ),
+        representation_utils.UIElement(is_visible=True),
+    ])
+
+    np.testing.assert_array_equal(
+        table.valid_mask((100, 100)), [True, False, False, False, True]
+    )
+
+  def test_centers_and_hit_test(self):
+    table = representation_utils.UIElementTable.from_ui_elements([
+        representation_utils.UIElement(
+            bbox_pixels=representation_utils.BoundingBox(0, 100, 0, 100)
+        ),
+        representation_utils.UIElement(
+            bbox_pixels=representation_utils.BoundingBox(10, 20, 10, 30)
+        ),
+        representation_utils.UIElement(),
+    ])
+
+    np.testing.assert_array_equal(table.centers()[:2], [[50, 50], [15, 20]])
+    np.testing.assert_array_equal(table.hit_test(15, 15), [1, 0])
+    np.testing.assert_array_equal(table.hit_test(50, 50), [0])
+    self.assertEmpty(table.hit_test(500, 500))
+
+
+
+class TestXmlDumpToUIElements(absltest.TestCase):
+
+  def test_converts_nodes_below_root_in_document_order(self):
+    xml = (
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+        '<hierarchy rotation="0">'
+        '<node text="Parent" bounds="[0,0][100,200]" clickable="true">'
+        '<node text="Child" content-desc="Icon" />'
+        '</node>'
+        '<node text="Sibling" resource-id="com.example:id/x" />'
+        '</hierarchy>'
+    )
+
+    elements = representation_utils.xml_dump_to_ui_elements(xml)
+
+    self.assertEqual([e.text for e in elements], ['Parent', 'Child', 'Sibling'])
+    self.assertEqual(
+        elements[0].bbox_pixels,
+        representation_utils.BoundingBox(0, 100, 0, 200),
+    )
+    self.assertTrue(elements[0].is_clickable)
+    self.assertEqual(elements[1].content_description, 'Icon')
+    self.assertIsNone(elements[1].bbox)
+    self.assertEqual(elements[2].resource_id, 'com.example:id/x')
+
+
 if __name__ == '__main__':
   absltest.main()
@@ -0,0 +1,271 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Detection of when the screen has stopped changing.
+
+`AsyncAndroidEnv.get_state(wait_to_stabilize=True)` polls the device until a
+`StabilityDetector` sees the same screen several times in a row. Polling starts
+fast and backs off, so a static screen is reported stable after a fraction of a
+second, while a screen that keeps changing is not polled more than needed.
+"""
+
+import abc
+import collections
+import dataclasses
+import time
+from typing import Any, Callable, Sequence
+
+from absl import logging
+from android_world.env import representation_utils
+import numpy as np
+
+# UIElement attributes that make up its structural fingerprint. `metadata` is
+# left out: it is free-form and not hashable.
+_FINGERPRINT_ATTRIBUTES = (
+    'text',
+    'content_description',
+    'class_name',
+    'hint_text',
+    'is_checked',
+    'is_checkable',
+    'is_clickable',
+    'is_editable',
+    'is_enabled',
+    'is_focused',
+    'is_focusable',
+    'is_long_clickable',
+    'is_scrollable',
+    'is_selected',
+    'is_visible',
+    'package_name',
+    'resource_name',
+    'tooltip',
+    'resource_id',
+)
+
+# Longest side, in pixels, of the screenshots compared by the pixel signal.
+_DOWNSCALED_SIZE = 64
+
+
+def _bbox_key(
+    bbox: representation_utils.BoundingBox | None,
+) -> tuple[float, ...] | None:
+  if bbox is None:
+    return None
+  return (bbox.x_min, bbox.x_max, bbox.y_min, bbox.y_max)
+
+
+def ui_elements_fingerprint(
+    ui_elements: Sequence[representation_utils.UIElement],
+) -> int:
+  """Returns a hash of the structure and content of ui_elements.
+
+  Equal lists of elements have equal fingerprints; hashing them once per
+  observation is cheaper than comparing each pair of lists field by field.
+
+  Args:
+    ui_elements: The UI elements of an observation.
+  """
+  return hash(
+      tuple(
+          (
+              tuple(getattr(e, name) for name in _FINGERPRINT_ATTRIBUTES),
+              _bbox_key(e.bbox_pixels),
+              _bbox_key(e.bbox),
+          )
+          for e in ui_elements
+      )
+  )
+
+
+def downscale_pixels(pixels: np.ndarray) -> np.ndarray:
+  """Returns a small grayscale copy of an RGB screenshot for comparisons."""
+  height, width = pixels.shape[:2]
+  stride = max(1, max(height, width) // _DOWNSCALED_SIZE)
+  sampled = pixels[::stride, ::stride]
+  if sampled.ndim == 3:
+    return sampled.mean(axis=-1, dtype=np.float32)
+  return sampled.astype(np.float32)
+
+
+@dataclasses.dataclass(frozen=True)
+class StabilizationRecord:
+  """Outcome of one wait for the screen to stabilize.
+
+  Attributes:
+    duration: Seconds from the start of the wait until it returned.
+    observations: Number of states captured during the wait.
+    stable: Whether the screen stabilized before the timeout.
+  """
+
+  duration: float
+  observations: int
+  stable: bool
+
+
+class StabilityDetector(abc.ABC):
+  """Polls observations until consecutive ones show the same screen.
+
+  Subclasses decide whether an observation shows the same screen as the
+  previous one; this class schedules the polling and records its outcome.
+  """
+
+  def __init__(
+      self,
+      stability_threshold: int = 3,
+      initial_interval: float = 0.1,
+      max_interval: float = 0.5,
+      backoff: float = 1.5,
+      timeout: float = 6.0,
+      history_size: int = 1000,
+  ):
+    """Initializes the detector.
+
+    Args:
+      stability_threshold: Number of consecutive observations that must show
+        the same screen to consider it stable.
+      initial_interval: Seconds between the first two observations.
+      max_interval: Upper bound on the seconds between two observations.
+      backoff: Factor the interval grows by after each observation.
+      timeout: Maximum seconds to wait for the screen to stabilize.
+      history_size: Number of most recent waits kept in `history`.
+
+    Raises:
+      ValueError: If the stability threshold is not positive, or the polling
+        schedule is invalid.
+    """
+    if stability_threshold <= 0:
+      raise ValueError('Stability threshold must be a positive integer.')
+    if initial_interval < 0 or max_interval < initial_interval:
+      raise ValueError(
+          'Polling intervals must satisfy 0 <= initial_interval <='
+          f' max_interval, got {initial_interval} and {max_interval}.'
+      )
+    if backoff < 1:
+      raise ValueError(f'backoff must be at least 1, got {backoff}.')
+    self.stability_threshold = stability_threshold
+    self.initial_interval = initial_interval
+    self.max_interval = max_interval
+    self.backoff = backoff
+    self.timeout = timeout
+    self.history: collections.deque[StabilizationRecord] = collections.deque(
+        maxlen=history_size
+    )
+
+  @abc.abstractmethod
+  def reset(self, state: Any) -> None:
+    """Starts a new wait from the first observation, state."""
+
+  @abc.abstractmethod
+  def is_unchanged(self, state: Any) -> bool:
+    """Returns whether state shows the same screen as the previous one."""
+
+  def wait_until_stable(
+      self, get_state: Callable[[], Any], timeout: float | None = None
+  ) -> Any:
+    """Polls get_state until the screen is stable, or the timeout expires.
+
+    Args:
+      get_state: Captures the current `interface.State`.
+      timeout: Maximum seconds to wait; defaults to `self.timeout`.
+
+    Returns:
+      The last state captured.
+    """
+    timeout = self.timeout if timeout is None else timeout
+    start = time.monotonic()
+    deadline = start + timeout
+    state = get_state()
+    self.reset(state)
+    observations = 1
+    stable_checks = 1
+    interval = self.initial_interval
+    while stable_checks < self.stability_threshold:
+      sleep_time = min(interval, deadline - time.monotonic())
+      if sleep_time < 0:
+        break
+      time.sleep(sleep_time)
+      interval = min(interval * self.backoff, self.max_interval)
+      state = get_state()
+      observations += 1
+      if self.is_unchanged(state):
+        stable_checks += 1
+      else:
+        stable_checks = 1
+        # Changes come in bursts; look again soon.
+        interval = self.initial_interval
+
+    record = StabilizationRecord(
+        duration=time.monotonic() - start,
+        observations=observations,
+        stable=stable_checks >= self.stability_threshold,
+    )
+    self.history.append(record)
+    if not record.stable:
+      logging.warning('Screen did not stabilize within %.1f seconds.', timeout)
+    logging.info(
+        'Screen stabilization took %.2f seconds over %d observations.',
+        record.duration,
+        record.observations,
+    )
+    return state
+
+
+class MultiSignalStabilityDetector(StabilityDetector):
+  """Compares UI element fingerprints and downscaled screenshots.
+
+  The screen is unchanged only if neither signal changed, so animations that do
+  not touch the a11y tree are caught by the pixels. Signals are only read from
+  parts of the state that were already captured, so an env observation mask
+  is respected; the UI elements are read if neither part was.
+  """
+
+  def __init__(self, pixel_threshold: float = 1.0, **kwargs):
+    """Initializes the detector.
+
+    Args:
+      pixel_threshold: Largest mean absolute difference, on a 0-255 scale,
+        between two downscaled screenshots of the same screen. Keeps a blinking
+        cursor from preventing stability.
+      **kwargs: Passed to `StabilityDetector`.
+    """
+    super().__init__(**kwargs)
+    self.pixel_threshold = pixel_threshold
+    self._fingerprint: int | None = None
+    self._pixels: np.ndarray | None = None
+
+  def _signals(self, state: Any) -> tuple[int | None, np.ndarray | None]:
+    pixels = None
+    if state.is_computed('pixels') and state.pixels is not None:
+      pixels = downscale_pixels(state.pixels)
+    fingerprint = None
+    if state.is_computed('ui_elements') or pixels is None:
+      fingerprint = ui_elements_fingerprint(state.ui_elements)
+    return fingerprint, pixels
+
+  def reset(self, state: Any) -> None:
+    self._fingerprint, self._pixels = self._signals(state)
+
+  def is_unchanged(self, state: Any) -> bool:
+    fingerprint, pixels = self._signals(state)
+    unchanged = fingerprint == self._fingerprint
+    if unchanged and pixels is not None:
+      unchanged = (
+          self._pixels is not None
+          and pixels.shape == self._pixels.shape
+          and float(np.abs(pixels - self._pixels).mean())
+          <= self.pixel_threshold
+      )
+    self._fingerprint, self._pixels = fingerprint, pixels
+    return unchanged
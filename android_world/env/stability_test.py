@@ -0,0 +1,136 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from absl.testing import absltest
+from android_world.env import interface
+from android_world.env import representation_utils
+from android_world.env import stability
+import numpy as np
+
+
+def _state(text: str = "Element", pixels=None) -> interface.State:
+  return interface.State(
+      pixels=np.zeros([100, 50, 3], dtype=np.uint8)
+      if pixels is None
+      else pixels,
+      forest=None,
+      ui_elements=[
+          representation_utils.UIElement(
+              text=text,
+              bbox_pixels=representation_utils.BoundingBox(0, 10, 0, 10),
+          )
+      ],
+  )
+
+
+class FingerprintTest(absltest.TestCase):
+
+  def test_equal_elements_have_equal_fingerprints(self):
+    self.assertEqual(
+        stability.ui_elements_fingerprint(_state().ui_elements),
+        stability.ui_elements_fingerprint(_state().ui_elements),
+    )
+
+  def test_fingerprint_ignores_metadata(self):
+    element = representation_utils.UIElement(text="a", metadata={"x": [1]})
+
+    self.assertEqual(
+        stability.ui_elements_fingerprint([element]),
+        stability.ui_elements_fingerprint(
+            [representation_utils.UIElement(text="a")]
+        ),
+    )
+
+  def test_moved_element_changes_fingerprint(self):
+    moved = _state()
+    moved.ui_elements[0].bbox_pixels = representation_utils.BoundingBox(
+        5, 15, 0, 10
+    )
+
+    self.assertNotEqual(
+        stability.ui_elements_fingerprint(_state().ui_elements),
+        stability.ui_elements_fingerprint(moved.ui_elements),
+    )
+
+
+@mock.patch("time.sleep", return_value=None)
+class MultiSignalStabilityDetectorTest(absltest.TestCase):
+
+  def test_static_screen_is_stable_after_threshold(self, unused_mock_sleep):
+    detector = stability.MultiSignalStabilityDetector(stability_threshold=3)
+    states = [_state() for _ in range(5)]
+    get_state = mock.MagicMock(side_effect=states)
+
+    self.assertIs(detector.wait_until_stable(get_state), states[2])
+    self.assertEqual(detector.history[-1].observations, 3)
+    self.assertTrue(detector.history[-1].stable)
+
+  def test_pixel_change_resets_stability(self, unused_mock_sleep):
+    detector = stability.MultiSignalStabilityDetector(stability_threshold=2)
+    animated = np.full([100, 50, 3], 255, dtype=np.uint8)
+    states = [_state(), _state(pixels=animated), _state(pixels=animated)]
+    get_state = mock.MagicMock(side_effect=states)
+
+    self.assertIs(detector.wait_until_stable(get_state), states[2])
+
+  def test_small_pixel_change_is_ignored(self, unused_mock_sleep):
+    detector = stability.MultiSignalStabilityDetector(stability_threshold=2)
+    cursor = np.zeros([100, 50, 3], dtype=np.uint8)
+    cursor[0, 0] = 255
+    states = [_state(), _state(pixels=cursor)]
+    get_state = mock.MagicMock(side_effect=states)
+
+    self.assertIs(detector.wait_until_stable(get_state), states[1])
+
+  def test_lazy_pixels_are_not_captured(self, unused_mock_sleep):
+    detector = stability.MultiSignalStabilityDetector(stability_threshold=2)
+    screenshot = mock.MagicMock()
+    states = [
+        interface.State(
+            pixels=interface.LazyField(screenshot),
+            forest=None,
+            ui_elements=[],
+        )
+        for _ in range(2)
+    ]
+
+    detector.wait_until_stable(mock.MagicMock(side_effect=states))
+
+    screenshot.assert_not_called()
+
+  def test_polling_backs_off(self, mock_sleep):
+    detector = stability.MultiSignalStabilityDetector(
+        stability_threshold=4,
+        initial_interval=0.1,
+        max_interval=0.2,
+        backoff=2.0,
+    )
+
+    detector.wait_until_stable(lambda: _state())
+
+    sleeps = [call.args[0] for call in mock_sleep.call_args_list]
+    self.assertLen(sleeps, 3)
+    self.assertAlmostEqual(sleeps[0], 0.1, places=2)
+    self.assertAlmostEqual(sleeps[1], 0.2, places=2)
+    self.assertAlmostEqual(sleeps[2], 0.2, places=2)
+
+  def test_invalid_threshold_raises(self, unused_mock_sleep):
+    with self.assertRaises(ValueError):
+      stability.MultiSignalStabilityDetector(stability_threshold=0)
+
+
+if __name__ == "__main__":
+  absltest.main()
@@ -14,6 +14,7 @@
 
 """Runs an agent on the environment."""
 
+import asyncio
 import dataclasses
 from typing import Any, Callable, Optional
 from android_world import constants
@@ -46,6 +47,9 @@ def run_episode(
     start_on_home_screen: bool = False,
     termination_fn: Callable[[interface.AsyncEnv], float] | None = None,
     print_fn: Callable[[str], None] = print,
+    step_sink: (
+        Callable[[dict[str, Any]], dict[str, Any] | None] | None
+    ) = None,
 ) -> EpisodeResult:
   """Runs an agent on goal, e.g., "turn off wifi".
 
@@ -64,6 +68,10 @@ def run_episode(
       For example, for MiniWoB++ tasks, the episode should terminate if there is
       a nonzero reward.
     print_fn: A function to print log messages to the console or logger.
+    step_sink: If provided, called with the data of each step as soon as the
+      step completes, e.g. to append it to disk. If it returns a dict, that dict
+      is kept in the episode's step data in place of the original, e.g. with
+      screenshots swapped for references to their stored copies.
 
   Returns:
     Data collected during running agent on goal.
@@ -81,18 +89,23 @@ def run_episode(
     result = agent.step(goal)
     print_fn('Completed step {:d}.'.format(step_n + 1))
     assert constants.STEP_NUMBER not in result.data
-    output.append(result.data | {constants.STEP_NUMBER: step_n})
+    step = result.data | {constants.STEP_NUMBER: step_n}
+    if step_sink is not None:
+      kept = step_sink(step)
+      if kept is not None:
+        step = kept
+    output.append(step)
     if termination_fn(agent.env):
       print_fn('Environment ends episode.')
       return EpisodeResult(
           done=True,
-          step_data=_transpose_lod_to_dol(output),
+          step_data=transpose_lod_to_dol(output),
       )
     elif result.done:
       print_fn('Agent indicates task is done.')
       return EpisodeResult(
           done=result.done,
-          step_data=_transpose_lod_to_dol(output),
+          step_data=transpose_lod_to_dol(output),
       )
   print_fn(
       termcolor.colored(
@@ -101,11 +114,94 @@ def run_episode(
       )
   )
   return EpisodeResult(
-      done=result.done, step_data=_transpose_lod_to_dol(output)  # pylint: disable=undefined-variable
+      done=result.done, step_data=transpose_lod_to_dol(output)  # pylint: disable=undefined-variable
   )
 
 
-def _transpose_lod_to_dol(data: list[dict[str, Any]]) -> dict[str, list[Any]]:
+async def arun_episode(
+    goal: str,
+    agent: base_agent.EnvironmentInteractingAgent,
+    max_n_steps: int = 10,
+    start_on_home_screen: bool = False,
+    termination_fn: Callable[[interface.AsyncEnv], float] | None = None,
+    print_fn: Callable[[str], None] = print,
+    step_sink: (
+        Callable[[dict[str, Any]], dict[str, Any] | None] | None
+    ) = None,
+) -> EpisodeResult:
+  """Coroutine version of `run_episode`.
+
+  Steps with `agent.astep`, and runs step_sink in a thread while the next step
+  runs, so that e.g. writing a step to disk overlaps the model call of the
+  next. Sinks still run one at a time, in step order, and all have run when
+  this returns. Arguments and result are as for `run_episode`.
+
+  Args:
+    goal: The goal instruction for the agent.
+    agent: The agent to run on the environment.
+    max_n_steps: The max number of steps to allow an agent to run before ending
+      an episode.
+    start_on_home_screen: Whether to start episode from the home screen or just
+      the current screen.
+    termination_fn: If provided, a determines whether to terminate an episode.
+    print_fn: A function to print log messages to the console or logger.
+    step_sink: If provided, called with the data of each step after the step
+      completes. If it returns a dict, that dict is kept in the episode's step
+      data in place of the original.
+
+  Returns:
+    Data collected during running agent on goal.
+  """
+  if max_n_steps == 0:
+    return EpisodeResult(done=False, step_data={})
+  if termination_fn is None:
+    termination_fn = lambda env: False
+
+  await agent.areset(start_on_home_screen)
+  agent.set_max_steps(max_n_steps)
+
+  output = []
+  sink_task = None
+
+  async def sink(index: int) -> None:
+    kept = await asyncio.to_thread(step_sink, output[index])
+    if kept is not None:
+      output[index] = kept
+
+  try:
+    for step_n in range(max_n_steps):
+      result = await agent.astep(goal)
+      print_fn('Completed step {:d}.'.format(step_n + 1))
+      assert constants.STEP_NUMBER not in result.data
+      output.append(result.data | {constants.STEP_NUMBER: step_n})
+      if step_sink is not None:
+        if sink_task is not None:
+          await sink_task
+        sink_task = asyncio.create_task(sink(step_n))
+      if await agent.env.run_blocking(termination_fn, agent.env):
+        print_fn('Environment ends episode.')
+        done = True
+        break
+      elif result.done:
+        print_fn('Agent indicates task is done.')
+        done = True
+        break
+    else:
+      print_fn(
+          termcolor.colored(
+              'Agent did not indicate task is done. Reached max number of'
+              ' steps.',
+              'red',
+          )
+      )
+      done = result.done  # pylint: disable=undefined-loop-variable
+  finally:
+    if sink_task is not None:
+      await sink_task
+  return EpisodeResult(done=done, step_data=transpose_lod_to_dol(output))
+
+
+def transpose_lod_to_dol(data: list[dict[str, Any]]) -> dict[str, list[Any]]:
   """Transposes a list of dictionaries to a dictionary of lists.
 
   Args:
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import threading
 from typing import Any
 from unittest import mock
 from absl.testing import absltest
@@ -19,6 +21,7 @@ from android_world import constants
 from android_world import episode_runner
 from android_world.agents import base_agent
 from android_world.env import interface
+from android_world.utils import test_utils
 
 
 class FakeEnvironmentInteractingAgent(base_agent.EnvironmentInteractingAgent):
@@ -89,6 +92,118 @@ class EpisodeRunnerTest(absltest.TestCase):
 
     mock_agent.env.reset.assert_called_with(go_home=True)
 
+  def test_step_sink_receives_each_step(self):
+    agent = FakeEnvironmentInteractingAgent(
+        self.env, 'fake_agent', return_data={'action': 'click'}
+    )
+    sunk_steps = []
+
+    def step_sink(step: dict[str, Any]) -> None:
+      # The step is streamed before the episode ends.
+      self.assertLen(sunk_steps, agent.call_count - 1)
+      sunk_steps.append(step)
+
+    result = episode_runner.run_episode(
+        'test_goal', agent, max_n_steps=3, step_sink=step_sink
+    )
+
+    self.assertEqual(
+        [{'action': 'click', constants.STEP_NUMBER: i} for i in range(3)],
+        sunk_steps,
+    )
+    self.assertEqual(
+        episode_runner.transpose_lod_to_dol(sunk_steps), result.step_data
+    )
+
+  def test_step_sink_return_value_replaces_step(self):
+    agent = FakeEnvironmentInteractingAgent(
+        self.env, 'fake_agent', return_data={'screenshot': 'pixels'}
+    )
+
+    result = episode_runner.run_episode(
+        'test_goal',
+        agent,
+        max_n_steps=2,
+        step_sink=lambda step: step | {'screenshot': 'ref'},
+    )
+
+    self.assertEqual(['ref', 'ref'], result.step_data['screenshot'])
+
+
+class ArunEpisodeTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.env = test_utils.FakeAsyncEnv()
+    self.addCleanup(self.env.close)
+
+  def test_max_steps_reached(self):
+    agent = FakeEnvironmentInteractingAgent(self.env, 'fake_agent')
+
+    result = asyncio.run(
+        episode_runner.arun_episode('test_goal', agent, max_n_steps=2)
+    )
+
+    self.assertFalse(result.done)
+    self.assertLen(result.step_data[constants.STEP_NUMBER], 2)
+    self.assertEqual(agent.call_count, 2)
+
+  def test_termination_fn_early_termination(self):
+    agent = FakeEnvironmentInteractingAgent(self.env, 'fake_agent')
+
+    result = asyncio.run(
+        episode_runner.arun_episode(
+            'test_goal', agent, termination_fn=lambda env: True
+        )
+    )
+
+    self.assertTrue(result.done)
+    self.assertEqual(agent.call_count, 1)
+
+  def test_start_on_home_screen(self):
+    agent = FakeEnvironmentInteractingAgent(self.env, 'fake_agent')
+
+    with mock.patch.object(self.env, 'reset') as mock_reset:
+      asyncio.run(
+          episode_runner.arun_episode(
+              'test_goal', agent, max_n_steps=1, start_on_home_screen=True
+          )
+      )
+
+    mock_reset.assert_called_once_with(go_home=True)
+
+  def test_step_sink_overlaps_next_step(self):
+    agent = FakeEnvironmentInteractingAgent(
+        self.env, 'fake_agent', return_data={'screenshot': 'pixels'}
+    )
+    first_sink_started = threading.Event()
+    second_step_done = threading.Event()
+    sunk_steps = []
+
+    def step(goal):
+      # The sink of the first step runs while the second step runs.
+      if agent.call_count == 1:
+        self.assertTrue(first_sink_started.wait(timeout=5))
+        second_step_done.set()
+      return FakeEnvironmentInteractingAgent.step(agent, goal)
+
+    def step_sink(step_data):
+      sunk_steps.append(step_data[constants.STEP_NUMBER])
+      first_sink_started.set()
+      if step_data[constants.STEP_NUMBER] == 0:
+        self.assertTrue(second_step_done.wait(timeout=5))
+      return step_data | {'screenshot': 'ref'}
+
+    with mock.patch.object(agent, 'step', side_effect=step):
+      result = asyncio.run(
+          episode_runner.arun_episode(
+              'test_goal', agent, max_n_steps=3, step_sink=step_sink
+          )
+      )
+
+    self.assertEqual([0, 1, 2], sunk_steps)
+    self.assertEqual(['ref', 'ref', 'ref'], result.step_data['screenshot'])
+
 
 if __name__ == '__main__':
   absltest.main()
@@ -0,0 +1,246 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Content-addressed store for the screenshots of checkpointed episodes.
+
+Images are written once per unique content as lossless PNGs, and episodes keep
+an `ImageRef` in place of each array. Refs are decoded on first access.
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Any
+
+import cv2
+import numpy as np
+
+IMAGES_DIRNAME = 'images'
+# Arrays smaller than this are cheaper to keep inline in the episode.
+_MIN_IMAGE_SIZE = 1024
+# zlib level 1 is several times faster than the default and, on screenshots,
+# only slightly larger.
+_PNG_COMPRESSION = 1
+
+
+def is_image(value: Any) -> bool:
+  """Returns whether a value is an image array that can be stored as a PNG."""
+  if not isinstance(value, np.ndarray) or value.dtype != np.uint8:
+    return False
+  if value.size < _MIN_IMAGE_SIZE:
+    return False
+  return value.ndim == 2 or (value.ndim == 3 and value.shape[2] in (1, 3, 4))
+
+
+class ImageRef:
+  """Reference to an image in an `ImageStore`.
+
+  `np.asarray(ref)` returns the image. It is decoded the first time it is needed
+  and kept afterwards; unused refs cost only their digest.
+
+  Attributes:
+    digest: Hex SHA-256 of the image's shape, dtype and bytes.
+    shape: Shape of the image array.
+    dtype: Dtype of the image array.
+  """
+
+  __slots__ = ('digest', 'shape', 'dtype', '_store', '_array')
+
+  def __init__(
+      self,
+      digest: str,
+      shape: tuple[int, ...],
+      dtype: str,
+      store: 'ImageStore | None' = None,
+  ):
+    self.digest = digest
+    self.shape = tuple(shape)
+    self.dtype = np.dtype(dtype)
+    self._store = store
+    self._array = None
+
+  def __getstate__(self) -> dict[str, Any]:
+    # Only the address is persisted; the store is bound again on load.
+    return {'digest': self.digest, 'shape': self.shape, 'dtype': self.dtype.str}
+
+  def __setstate__(self, state: dict[str, Any]) -> None:
+    self.__init__(state['digest'], state['shape'], state['dtype'])
+
+  def __repr__(self) -> str:
+    return f'ImageRef({self.digest[:12]}, shape={self.shape})'
+
+  def __eq__(self, other: Any) -> bool:
+    if isinstance(other, ImageRef):
+      return self.digest == other.digest
+    return NotImplemented
+
+  def __hash__(self) -> int:
+    return hash(self.digest)
+
+  def bind(self, store: 'ImageStore') -> None:
+    """Sets the store that the image is read from."""
+    self._store = store
+
+  @property
+  def ndim(self) -> int:
+    return len(self.shape)
+
+  def load(self) -> np.ndarray:
+    """Returns the image, reading it from the store on first use.
+
+    Raises:
+      ValueError: If the ref is not bound to a store.
+    """
+    if self._array is None:
+      if self._store is None:
+        raise ValueError(f'{self!r} is not bound to an image store.')
+      self._array = self._store.get(self)
+    return self._array
+
+  def __array__(self, dtype=None, copy=None) -> np.ndarray:
+    del copy
+    array = self.load()
+    return array if dtype is None else array.astype(dtype)
+
+
+class ImageStore:
+  """Stores images as PNG files named by the hash of their content.
+
+  Writes are atomic and idempotent, so several processes can share a store.
+
+  Attributes:
+    directory: The directory holding the images.
+  """
+
+  def __init__(self, directory: str):
+    self.directory = directory
+
+  def _filename(self, digest: str) -> str:
+    return os.path.join(self.directory, digest[:2], f'{digest}.png')
+
+  def put(self, image: np.ndarray) -> ImageRef:
+    """Adds an image to the store if it is not there yet.
+
+    Args:
+      image: The image; see `is_image` for the supported arrays.
+
+    Returns:
+      A ref to the stored image, bound to this store.
+
+    Raises:
+      ValueError: If the image cannot be stored losslessly.
+    """
+    if not is_image(image):
+      raise ValueError(
+          f'Unsupported image: shape={image.shape}, dtype={image.dtype}.'
+      )
+    image = np.ascontiguousarray(image)
+    hasher = hashlib.sha256(f'{image.shape}{image.dtype.str}'.encode())
+    hasher.update(image.data)
+    ref = ImageRef(hasher.hexdigest(), image.shape, image.dtype.str, self)
+    filename = self._filename(ref.digest)
+    if os.path.exists(filename):
+      return ref
+
+    ok, encoded = cv2.imencode(
+        '.png', image, [cv2.IMWRITE_PNG_COMPRESSION, _PNG_COMPRESSION]
+    )
+    if not ok:
+      raise ValueError(f'Unable to encode image {ref!r}.')
+    directory = os.path.dirname(filename)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_filename = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        f.write(encoded.tobytes())
+      os.replace(tmp_filename, filename)
+    except BaseException:
+      if os.path.exists(tmp_filename):
+        os.remove(tmp_filename)
+      raise
+    return ref
+
+  def get(self, ref: ImageRef) -> np.ndarray:
+    """Reads an image from the store.
+
+    Args:
+      ref: Ref returned by `put`.
+
+    Returns:
+      The image, identical to the array passed to `put`.
+
+    Raises:
+      FileNotFoundError: If the image is not in the store.
+    """
+    with open(self._filename(ref.digest), 'rb') as f:
+      encoded = np.frombuffer(f.read(), dtype=np.uint8)
+    image = cv2.imdecode(encoded, cv2.IMREAD_UNCHANGED)
+    return image.reshape(ref.shape)
+
+  def externalize(self, value: Any) -> Any:
+    """Returns a copy of value with its images replaced by refs.
+
+    Dicts, lists and tuples are traversed; other values, including subclasses
+    of those containers, are returned as is.
+
+    Args:
+      value: E.g. an episode.
+    """
+    if is_image(value):
+      return self.put(value)
+    if type(value) is dict:  # pylint: disable=unidiomatic-typecheck
+      return {k: self.externalize(v) for k, v in value.items()}
+    if type(value) is list:  # pylint: disable=unidiomatic-typecheck
+      return [self.externalize(v) for v in value]
+    if type(value) is tuple:  # pylint: disable=unidiomatic-typecheck
+      return tuple(self.externalize(v) for v in value)
+    return value
+
+  def resolve(self, value: Any) -> Any:
+    """Returns a copy of value with its refs replaced by their images.
+
+    The inverse of `externalize`. Each distinct image is decoded once; refs to
+    it that repeat get copies, so the arrays can be modified independently.
+
+    Args:
+      value: E.g. a loaded episode.
+    """
+    decoded: dict[str, np.ndarray] = {}
+
+    def resolve(value: Any) -> Any:
+      if isinstance(value, ImageRef):
+        if value.digest in decoded:
+          return decoded[value.digest].copy()
+        decoded[value.digest] = self.get(value)
+        return decoded[value.digest]
+      if type(value) is dict:  # pylint: disable=unidiomatic-typecheck
+        return {k: resolve(v) for k, v in value.items()}
+      if type(value) is list:  # pylint: disable=unidiomatic-typecheck
+        return [resolve(v) for v in value]
+      if type(value) is tuple:  # pylint: disable=unidiomatic-typecheck
+        return tuple(resolve(v) for v in value)
+      return value
+
+    return resolve(value)
+
+  def bind(self, value: Any) -> None:
+    """Binds all refs within value to this store, in place."""
+    if isinstance(value, ImageRef):
+      value.bind(self)
+    elif isinstance(value, dict):
+      for v in value.values():
+        self.bind(v)
+    elif isinstance(value, (list, tuple)):
+      for v in value:
+        self.bind(v)
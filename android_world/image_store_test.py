@@ -0,0 +1,118 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pickle
+import tempfile
+
+from absl.testing import absltest
+from absl.testing import parameterized
+from android_world import image_store
+import numpy as np
+
+
+def _random_image(shape: tuple[int, ...], seed: int = 0) -> np.ndarray:
+  return np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+
+
+class ImageStoreTest(parameterized.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.temp_dir = tempfile.TemporaryDirectory()
+    self.store = image_store.ImageStore(self.temp_dir.name)
+
+  def tearDown(self):
+    super().tearDown()
+    self.temp_dir.cleanup()
+
+  def _num_files(self) -> int:
+    return sum(len(files) for _, _, files in os.walk(self.temp_dir.name))
+
+  @parameterized.named_parameters(
+      dict(testcase_name='rgb', shape=(64, 48, 3)),
+      dict(testcase_name='rgba', shape=(64, 48, 4)),
+      dict(testcase_name='gray', shape=(64, 48)),
+      dict(testcase_name='single_channel', shape=(64, 48, 1)),
+  )
+  def test_round_trip_is_lossless(self, shape):
+    image = _random_image(shape)
+    ref = self.store.put(image)
+    self.assertEqual(ref.shape, shape)
+    np.testing.assert_array_equal(self.store.get(ref), image)
+
+  def test_identical_images_are_stored_once(self):
+    image = _random_image((64, 48, 3))
+    ref1 = self.store.put(image)
+    ref2 = self.store.put(image.copy())
+    self.assertEqual(ref1, ref2)
+    self.assertEqual(self._num_files(), 1)
+    self.store.put(_random_image((64, 48, 3), seed=1))
+    self.assertEqual(self._num_files(), 2)
+
+  def test_same_bytes_with_different_shape_differ(self):
+    image = _random_image((64, 48, 3))
+    self.assertNotEqual(
+        self.store.put(image), self.store.put(image.reshape(48, 64, 3))
+    )
+
+  def test_put_unsupported_array_raises_value_error(self):
+    with self.assertRaises(ValueError):
+      self.store.put(np.zeros((64, 48, 3), dtype=np.float32))
+
+  def test_externalize_replaces_images_only(self):
+    image = _random_image((64, 48, 3))
+    small = np.zeros((2, 2), dtype=np.uint8)
+    episode = {
+        'goal': 'goal',
+        'episode_data': {'raw_screenshot': [image, None], 'small': [small]},
+    }
+    externalized = self.store.externalize(episode)
+
+    self.assertIsInstance(
+        externalized['episode_data']['raw_screenshot'][0], image_store.ImageRef
+    )
+    self.assertIsNone(externalized['episode_data']['raw_screenshot'][1])
+    self.assertIs(externalized['episode_data']['small'][0], small)
+    self.assertEqual(externalized['goal'], 'goal')
+    # The original episode is left untouched.
+    self.assertIs(episode['episode_data']['raw_screenshot'][0], image)
+
+  def test_resolve_inverts_externalize(self):
+    image = _random_image((64, 48, 3))
+    episode = {'goal': 'goal', 'raw_screenshot': [image, image.copy(), None]}
+    resolved = self.store.resolve(self.store.externalize(episode))
+
+    first, second, missing = resolved['raw_screenshot']
+    self.assertIsInstance(first, np.ndarray)
+    np.testing.assert_array_equal(first, image)
+    np.testing.assert_array_equal(second, image)
+    # Repeated frames are decoded once but not aliased.
+    self.assertIsNot(first, second)
+    self.assertIsNone(missing)
+    self.assertEqual(resolved['goal'], 'goal')
+
+  def test_pickled_ref_is_lazy_until_bound(self):
+    image = _random_image((64, 48, 3))
+    ref = pickle.loads(pickle.dumps(self.store.put(image)))
+    self.assertEqual(ref.shape, image.shape)
+    with self.assertRaises(ValueError):
+      ref.load()
+
+    self.store.bind({'refs': [ref]})
+    np.testing.assert_array_equal(np.asarray(ref), image)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -0,0 +1,443 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Columnar index of episode metadata across many run directories.
+
+A `ResultsIndex` extracts the metadata of every episode saved by an
+`IncrementalCheckpointer` into one table, so runs can be compared without
+unpickling them:
+
+```python
+index = results_index.ResultsIndex('~/android_world/index')
+index.scan(results_index.find_run_directories('~/android_world/runs'))
+index.leaderboard()
+```
+
+Scans are incremental: only task group files that are new or whose size or
+modification time changed since the last scan are read. The table is stored as
+one Parquet file per run if `pyarrow` is installed, and in SQLite otherwise.
+"""
+
+import abc
+from collections.abc import Sequence
+from concurrent import futures
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+
+from absl import logging
+from android_world import checkpointer as checkpointer_lib
+from android_world import constants
+import pandas as pd
+
+RUN_COLUMN = 'run'
+FILE_COLUMN = 'file'
+# Episode fields copied into the index.
+EPISODE_FIELDS = (
+    constants.EpisodeConstants.TASK_TEMPLATE,
+    constants.EpisodeConstants.INSTANCE_ID,
+    constants.EpisodeConstants.GOAL,
+    constants.EpisodeConstants.AGENT_NAME,
+    constants.EpisodeConstants.SEED,
+    constants.EpisodeConstants.IS_SUCCESSFUL,
+    constants.EpisodeConstants.EPISODE_LENGTH,
+    constants.EpisodeConstants.RUN_TIME,
+    constants.EpisodeConstants.FINISH_DTIME,
+    constants.EpisodeConstants.EXCEPTION_INFO,
+)
+COLUMNS = (RUN_COLUMN, FILE_COLUMN) + EPISODE_FIELDS
+
+_EPISODES_SUFFIX = '.pkl.gz'
+_SQLITE_FILENAME = 'episodes.sqlite'
+_PARQUET_DIRNAME = 'parts'
+_PARQUET_FILES_FILENAME = 'files.json'
+
+_SQLITE_TYPES = {
+    constants.EpisodeConstants.INSTANCE_ID: 'INTEGER',
+    constants.EpisodeConstants.SEED: 'INTEGER',
+    constants.EpisodeConstants.IS_SUCCESSFUL: 'REAL',
+    constants.EpisodeConstants.EPISODE_LENGTH: 'INTEGER',
+    constants.EpisodeConstants.RUN_TIME: 'REAL',
+    constants.EpisodeConstants.FINISH_DTIME: 'TIMESTAMP',
+}
+
+# (size, mtime_ns) of a task group file when it was ingested.
+_Fingerprint = tuple[int, int]
+
+
+@dataclasses.dataclass(frozen=True)
+class ScanStats:
+  """What a scan changed in the index.
+
+  Attributes:
+    num_runs: Run directories scanned.
+    num_files_ingested: Task group files that were new or changed, and read.
+    num_files_unchanged: Task group files skipped since they were indexed.
+    num_files_removed: Indexed task group files that no longer exist.
+    num_episodes_ingested: Episodes read from the ingested files.
+  """
+
+  num_runs: int = 0
+  num_files_ingested: int = 0
+  num_files_unchanged: int = 0
+  num_files_removed: int = 0
+  num_episodes_ingested: int = 0
+
+
+def find_run_directories(root: str) -> list[str]:
+  """Returns the directories under root that contain task group files."""
+  root = os.path.expanduser(root)
+  run_dirs = []
+  for dirpath, _, filenames in os.walk(root):
+    if any(f.endswith(_EPISODES_SUFFIX) for f in filenames):
+      run_dirs.append(dirpath)
+  return sorted(run_dirs)
+
+
+def _read_file(filename: str) -> list[dict[str, object]] | None:
+  """Reads the indexed fields of a task group file; None if unreadable."""
+  try:
+    return checkpointer_lib.read_episode_metadata(filename, EPISODE_FIELDS)
+  except Exception as e:  # pylint: disable=broad-exception-caught
+    logging.warning('Unable to index %s: %r', filename, e)
+    return None
+
+
+def _to_frame(rows: list[dict[str, object]]) -> pd.DataFrame:
+  df = pd.DataFrame(rows, columns=list(COLUMNS))
+  df[constants.EpisodeConstants.FINISH_DTIME] = pd.to_datetime(
+      df[constants.EpisodeConstants.FINISH_DTIME]
+  )
+  return df
+
+
+class _Store(abc.ABC):
+  """Persists the indexed episodes and the fingerprints of their files."""
+
+  @abc.abstractmethod
+  def load_fingerprints(self) -> dict[str, _Fingerprint]:
+    """Returns the fingerprint of every indexed file, by path."""
+
+  @abc.abstractmethod
+  def update(
+      self,
+      run_dir: str,
+      removed: Sequence[str],
+      fingerprints: dict[str, _Fingerprint],
+      rows: pd.DataFrame,
+  ) -> None:
+    """Replaces the rows of the removed and re-ingested files of a run."""
+
+  def commit(self) -> None:
+    """Persists what `update` has not yet written, once per scan."""
+
+  @abc.abstractmethod
+  def read(self) -> pd.DataFrame:
+    """Returns all indexed episodes."""
+
+
+class _SqliteStore(_Store):
+  """Stores the index in a SQLite database."""
+
+  def __init__(self, filename: str):
+    self._connection = sqlite3.connect(filename)
+    with self._connection:
+      self._connection.execute(
+          'CREATE TABLE IF NOT EXISTS files ('
+          ' path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER)'
+      )
+      columns = ', '.join(
+          f'{column} {_SQLITE_TYPES.get(column, "TEXT")}' for column in COLUMNS
+      )
+      self._connection.execute(
+          f'CREATE TABLE IF NOT EXISTS episodes ({columns})'
+      )
+      self._connection.execute(
+          'CREATE INDEX IF NOT EXISTS episodes_file ON episodes (file)'
+      )
+
+  def load_fingerprints(self) -> dict[str, _Fingerprint]:
+    rows = self._connection.execute('SELECT path, size, mtime_ns FROM files')
+    return {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+
+  def update(
+      self,
+      run_dir: str,
+      removed: Sequence[str],
+      fingerprints: dict[str, _Fingerprint],
+      rows: pd.DataFrame,
+  ) -> None:
+    del run_dir
+    stale = [(path,) for path in list(removed) + list(fingerprints)]
+    with self._connection:
+      self._connection.executemany('DELETE FROM files WHERE path = ?', stale)
+      self._connection.executemany('DELETE FROM episodes WHERE file = ?', stale)
+      self._connection.executemany(
+          'INSERT INTO files VALUES (?, ?, ?)',
+          [(path, *fp) for path, fp in fingerprints.items()],
+      )
+      rows.to_sql('episodes', self._connection, if_exists='append', index=False)
+
+  def read(self) -> pd.DataFrame:
+    df = pd.read_sql(
+        'SELECT * FROM episodes',
+        self._connection,
+        parse_dates=[constants.EpisodeConstants.FINISH_DTIME],
+    )
+    return df[list(COLUMNS)]
+
+
+class _ParquetStore(_Store):
+  """Stores the index as one Parquet file per run directory."""
+
+  def __init__(self, directory: str):
+    import pyarrow  # pylint: disable=g-import-not-at-top,unused-import
+
+    self._parts = os.path.join(directory, _PARQUET_DIRNAME)
+    self._fingerprints_filename = os.path.join(
+        directory, _PARQUET_FILES_FILENAME
+    )
+    os.makedirs(self._parts, exist_ok=True)
+    # Updated by `update` and written by `commit`; loaded on first use.
+    self._fingerprints: dict[str, _Fingerprint] | None = None
+
+  def _part(self, run_dir: str) -> str:
+    digest = hashlib.sha1(run_dir.encode()).hexdigest()[:16]
+    return os.path.join(
+        self._parts, f'{os.path.basename(run_dir)}_{digest}.parquet'
+    )
+
+  def load_fingerprints(self) -> dict[str, _Fingerprint]:
+    if self._fingerprints is None:
+      try:
+        with open(self._fingerprints_filename) as f:
+          self._fingerprints = {
+              path: tuple(fp) for path, fp in json.load(f).items()
+          }
+      except FileNotFoundError:
+        self._fingerprints = {}
+    return dict(self._fingerprints)
+
+  def update(
+      self,
+      run_dir: str,
+      removed: Sequence[str],
+      fingerprints: dict[str, _Fingerprint],
+      rows: pd.DataFrame,
+  ) -> None:
+    part = self._part(run_dir)
+    stale = set(removed) | set(fingerprints)
+    frames = [rows]
+    if os.path.exists(part):
+      existing = pd.read_parquet(part)
+      frames.insert(0, existing[~existing[FILE_COLUMN].isin(stale)])
+    df = pd.concat(frames, ignore_index=True)
+    if df.empty:
+      if os.path.exists(part):
+        os.remove(part)
+    else:
+      df.to_parquet(part, index=False)
+
+    self.load_fingerprints()
+    for path in removed:
+      self._fingerprints.pop(path, None)
+    self._fingerprints.update(fingerprints)
+
+  def commit(self) -> None:
+    # Parts written before a crash are re-ingested by the next scan, since
+    # their files keep their previous fingerprints.
+    if self._fingerprints is None:
+      return
+    fd, tmp_filename = tempfile.mkstemp(
+        suffix='.tmp', dir=os.path.dirname(self._fingerprints_filename)
+    )
+    with os.fdopen(fd, 'w') as f:
+      json.dump(self._fingerprints, f)
+    os.replace(tmp_filename, self._fingerprints_filename)
+
+  def read(self) -> pd.DataFrame:
+    parts = sorted(
+        os.path.join(self._parts, f)
+        for f in os.listdir(self._parts)
+        if f.endswith('.parquet')
+    )
+    if not parts:
+      return _to_frame([])
+    return pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+
+
+def _has_pyarrow() -> bool:
+  try:
+    import pyarrow  # pylint: disable=g-import-not-at-top,unused-import
+  except ImportError:
+    return False
+  return True
+
+
+class ResultsIndex:
+  """Incrementally maintained table of episode metadata across runs.
+
+  Attributes:
+    directory: The directory holding the index.
+    backend: 'parquet' or 'sqlite'.
+  """
+
+  def __init__(self, directory: str, backend: str = 'auto'):
+    """Opens or creates an index.
+
+    Args:
+      directory: The directory holding the index.
+      backend: 'parquet', 'sqlite', or 'auto' to reuse the backend of an
+        existing index, or else use Parquet if pyarrow is installed.
+
+    Raises:
+      ValueError: If backend is unknown.
+    """
+    self.directory = os.path.expanduser(directory)
+    os.makedirs(self.directory, exist_ok=True)
+    sqlite_filename = os.path.join(self.directory, _SQLITE_FILENAME)
+    if backend == 'auto':
+      if os.path.exists(sqlite_filename) or not _has_pyarrow():
+        backend = 'sqlite'
+      else:
+        backend = 'parquet'
+    if backend == 'sqlite':
+      self._store = _SqliteStore(sqlite_filename)
+    elif backend == 'parquet':
+      self._store = _ParquetStore(self.directory)
+    else:
+      raise ValueError(
+          f"Unknown backend {backend!r}; expected 'auto', 'parquet' or"
+          " 'sqlite'."
+      )
+    self.backend = backend
+
+  def scan(self, run_dirs: Sequence[str], workers: int = 1) -> ScanStats:
+    """Ingests new and changed task group files of run_dirs.
+
+    Files of other run directories already in the index are left untouched.
+
+    Args:
+      run_dirs: Run directories, e.g. from `find_run_directories`.
+      workers: Number of processes that read files. Reading is the expensive
+        part of a scan for runs saved before the metadata and payload of
+        episodes were stored separately.
+
+    Returns:
+      What the scan changed.
+    """
+    known = self._store.load_fingerprints()
+    pending: dict[str, tuple[list[str], dict[str, _Fingerprint]]] = {}
+    num_unchanged = 0
+    for run_dir in run_dirs:
+      run_dir = os.path.abspath(os.path.expanduser(run_dir))
+      on_disk = {}
+      for entry in os.scandir(run_dir):
+        if entry.name.endswith(_EPISODES_SUFFIX) and entry.is_file():
+          stat = entry.stat()
+          on_disk[entry.path] = (stat.st_size, stat.st_mtime_ns)
+      prefix = run_dir + os.sep
+      removed = [
+          path
+          for path in known
+          if path.startswith(prefix)
+          and os.sep not in path[len(prefix) :]
+          and path not in on_disk
+      ]
+      changed = {
+          path: fp for path, fp in on_disk.items() if known.get(path) != fp
+      }
+      num_unchanged += len(on_disk) - len(changed)
+      if removed or changed:
+        pending[run_dir] = (removed, changed)
+
+    paths = [path for _, changed in pending.values() for path in changed]
+    if workers > 1 and len(paths) > 1:
+      with futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        results = dict(zip(paths, executor.map(_read_file, paths)))
+    else:
+      results = {path: _read_file(path) for path in paths}
+
+    num_episodes = num_removed = num_ingested = 0
+    for run_dir, (removed, changed) in pending.items():
+      rows = []
+      ingested, unreadable = {}, []
+      for path, fp in changed.items():
+        if results[path] is None:
+          unreadable.append(path)
+          continue
+        ingested[path] = fp
+        for episode in results[path]:
+          rows.append(
+              {RUN_COLUMN: os.path.basename(run_dir), FILE_COLUMN: path}
+              | episode
+          )
+      # Unreadable files are not fingerprinted, so the next scan tries them
+      # again; the rows of earlier versions of them are dropped.
+      self._store.update(
+          run_dir, removed + unreadable, ingested, _to_frame(rows)
+      )
+      num_episodes += len(rows)
+      num_ingested += len(ingested)
+      num_removed += len(removed)
+    self._store.commit()
+
+    return ScanStats(
+        num_runs=len(run_dirs),
+        num_files_ingested=num_ingested,
+        num_files_unchanged=num_unchanged,
+        num_files_removed=num_removed,
+        num_episodes_ingested=num_episodes,
+    )
+
+  def to_dataframe(self) -> pd.DataFrame:
+    """Returns one row per indexed episode, with the columns in `COLUMNS`."""
+    return self._store.read()
+
+  def leaderboard(
+      self, by: Sequence[str] = (constants.EpisodeConstants.AGENT_NAME,)
+  ) -> pd.DataFrame:
+    """Aggregates success across all indexed episodes.
+
+    Episodes that raised an exception are counted in `num_fail_trials` and
+    excluded from the other columns, as in `suite_utils.process_episodes`.
+
+    Args:
+      by: Columns to group by, e.g. agent name and seed.
+
+    Returns:
+      Per group, the number of completed and failed trials, the mean success
+      rate and episode length, and the number of task templates, sorted by
+      success rate.
+    """
+    df = self.to_dataframe()
+    failed = df[constants.EpisodeConstants.EXCEPTION_INFO].notnull()
+    completed = df[~failed]
+    result = completed.groupby(list(by), dropna=False).agg(
+        num_complete_trials=(constants.EpisodeConstants.IS_SUCCESSFUL, 'count'),
+        mean_success_rate=(constants.EpisodeConstants.IS_SUCCESSFUL, 'mean'),
+        mean_episode_length=(constants.EpisodeConstants.EPISODE_LENGTH, 'mean'),
+        num_task_templates=(
+            constants.EpisodeConstants.TASK_TEMPLATE,
+            'nunique',
+        ),
+    )
+    result['num_fail_trials'] = (
+        df[failed].groupby(list(by), dropna=False).size()
+    )
+    result['num_fail_trials'] = result['num_fail_trials'].fillna(0).astype(int)
+    return result.sort_values('mean_success_rate', ascending=False)
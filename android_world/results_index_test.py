@@ -0,0 +1,174 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import os
+import tempfile
+from unittest import mock
+
+from absl.testing import absltest
+from absl.testing import parameterized
+from android_world import checkpointer
+from android_world import results_index
+
+
+def _episode(goal, agent_name, is_successful, exception_info=None):
+  return {
+      'goal': goal,
+      'task_template': goal.split()[0],
+      'instance_id': 0,
+      'agent_name': agent_name,
+      'seed': 30,
+      'is_successful': is_successful,
+      'episode_length': 3,
+      'run_time': 1.5,
+      'finish_dtime': datetime.datetime(2025, 1, 1, 12),
+      'exception_info': exception_info,
+      'episode_data': {'step_number': [0, 1, 2]},
+  }
+
+
+class ResultsIndexTest(parameterized.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    temp_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(temp_dir.cleanup)
+    self.runs_dir = os.path.join(temp_dir.name, 'runs')
+    self.index_dir = os.path.join(temp_dir.name, 'index')
+
+  def _save(self, run, task, episodes):
+    checkpointer.IncrementalCheckpointer(
+        os.path.join(self.runs_dir, run)
+    ).save_episodes(episodes, task)
+
+  def _index(self, backend):
+    if backend == 'parquet':
+      try:
+        import pyarrow  # pylint: disable=g-import-not-at-top,unused-import
+      except ImportError:
+        self.skipTest('pyarrow is not installed.')
+    return results_index.ResultsIndex(self.index_dir, backend=backend)
+
+  @parameterized.parameters('sqlite', 'parquet')
+  def test_scan_indexes_metadata_of_all_runs(self, backend):
+    self._save('run_a', 'Wifi', [_episode('Wifi on', 'm3a', 1.0)])
+    self._save('run_b', 'Wifi', [_episode('Wifi on', 't3a', 0.0)])
+    index = self._index(backend)
+
+    stats = index.scan(results_index.find_run_directories(self.runs_dir))
+    df = index.to_dataframe()
+
+    self.assertEqual(stats.num_files_ingested, 2)
+    self.assertEqual(stats.num_episodes_ingested, 2)
+    self.assertEqual(list(df.columns), list(results_index.COLUMNS))
+    self.assertCountEqual(df['run'], ['run_a', 'run_b'])
+    self.assertCountEqual(df['agent_name'], ['m3a', 't3a'])
+    self.assertEqual(
+        df['finish_dtime'][0], datetime.datetime(2025, 1, 1, 12)
+    )
+
+  @parameterized.parameters('sqlite', 'parquet')
+  def test_rescan_only_ingests_new_and_changed_files(self, backend):
+    self._save('run_a', 'Wifi', [_episode('Wifi on', 'm3a', 0.0)])
+    self._save('run_a', 'Clock', [_episode('Clock set', 'm3a', 1.0)])
+    index = self._index(backend)
+    index.scan(results_index.find_run_directories(self.runs_dir))
+
+    unchanged = index.scan(results_index.find_run_directories(self.runs_dir))
+    self._save('run_a', 'Wifi', [_episode('Wifi on', 'm3a', 1.0)])
+    self._save('run_b', 'Wifi', [_episode('Wifi on', 't3a', 1.0)])
+    changed = self._index(backend).scan(
+        results_index.find_run_directories(self.runs_dir)
+    )
+
+    self.assertEqual(unchanged.num_files_ingested, 0)
+    self.assertEqual(unchanged.num_files_unchanged, 2)
+    self.assertEqual(changed.num_files_ingested, 2)
+    self.assertEqual(changed.num_files_unchanged, 1)
+    df = index.to_dataframe()
+    self.assertLen(df, 3)
+    self.assertEqual(df['is_successful'].sum(), 3.0)
+
+  @parameterized.parameters('sqlite', 'parquet')
+  def test_scan_drops_removed_files(self, backend):
+    self._save('run_a', 'Wifi', [_episode('Wifi on', 'm3a', 1.0)])
+    self._save('run_b', 'Wifi', [_episode('Wifi on', 't3a', 1.0)])
+    index = self._index(backend)
+    index.scan(results_index.find_run_directories(self.runs_dir))
+
+    os.remove(os.path.join(self.runs_dir, 'run_a', 'Wifi.pkl.gz'))
+    stats = index.scan([os.path.join(self.runs_dir, 'run_a')])
+
+    self.assertEqual(stats.num_files_removed, 1)
+    self.assertEqual(list(index.to_dataframe()['run']), ['run_b'])
+
+  @parameterized.parameters('sqlite', 'parquet')
+  def test_unreadable_files_are_read_again_by_next_scan(self, backend):
+    self._save('run_a', 'Wifi', [_episode('Wifi on', 'm3a', 1.0)])
+    index = self._index(backend)
+    run_dirs = results_index.find_run_directories(self.runs_dir)
+
+    with mock.patch.object(results_index, '_read_file', return_value=None):
+      unreadable = index.scan(run_dirs)
+    readable = self._index(backend).scan(run_dirs)
+
+    self.assertEqual(unreadable.num_files_ingested, 0)
+    self.assertEqual(readable.num_files_ingested, 1)
+    self.assertLen(index.to_dataframe(), 1)
+
+  def test_parquet_scan_writes_fingerprints_once(self):
+    self._save('run_a', 'Wifi', [_episode('Wifi on', 'm3a', 1.0)])
+    self._save('run_b', 'Wifi', [_episode('Wifi on', 't3a', 1.0)])
+    index = self._index('parquet')
+
+    with mock.patch.object(
+        results_index.json, 'dump', wraps=results_index.json.dump
+    ) as mock_dump:
+      index.scan(results_index.find_run_directories(self.runs_dir))
+
+    mock_dump.assert_called_once()
+
+  def test_leaderboard_counts_failed_trials_separately(self):
+    self._save(
+        'run_a',
+        'Wifi',
+        [
+            _episode('Wifi on', 'm3a', 1.0),
+            _episode('Wifi off', 'm3a', 0.0),
+            _episode('Wifi on', 'm3a', 0.0, exception_info='Timeout'),
+        ],
+    )
+    index = results_index.ResultsIndex(self.index_dir, backend='sqlite')
+    index.scan(results_index.find_run_directories(self.runs_dir))
+
+    leaderboard = index.leaderboard()
+
+    self.assertEqual(leaderboard.loc['m3a', 'num_complete_trials'], 2)
+    self.assertEqual(leaderboard.loc['m3a', 'num_fail_trials'], 1)
+    self.assertEqual(leaderboard.loc['m3a', 'mean_success_rate'], 0.5)
+
+  def test_auto_reuses_existing_sqlite_index(self):
+    results_index.ResultsIndex(self.index_dir, backend='sqlite')
+    self.assertEqual(
+        results_index.ResultsIndex(self.index_dir).backend, 'sqlite'
+    )
+
+  def test_unknown_backend_raises_value_error(self):
+    with self.assertRaises(ValueError):
+      results_index.ResultsIndex(self.index_dir, backend='csv')
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -15,11 +15,19 @@
 """Utilities for evaluating automation agents."""
 
 import collections
+from collections.abc import Sequence
+from concurrent import futures
+import contextlib
+import dataclasses
 import datetime
+import functools
 import hashlib
+import inspect
 import logging
 import os
+import queue
 import random
+import threading
 import time
 import traceback
 from typing import Any, Callable, Type, TypeVar
@@ -41,15 +49,37 @@ import pandas as pd
 _FIXED_SEED = 123
 _TASK_TEMPLATE_COLUMN = 'task_template'
 _TASK_PROMPT_COLUMN = 'task_prompt'
+_RESULT_COLUMNS = (
+    'num_complete_trials',
+    'mean_success_rate',
+    'mean_episode_length',
+    'total_runtime_s',
+    'num_fail_trials',
+)
 TaskEvalType = TypeVar('TaskEvalType', bound=task_eval.TaskEval)
-
-
-class Suite(dict[str, list[task_eval.TaskEval]]):
+_T = TypeVar('_T')
+
+# Episode fields kept in memory and used to resume from a checkpoint.
+_METADATA_FIELDS = (
+    constants.EpisodeConstants.GOAL,
+    constants.EpisodeConstants.TASK_TEMPLATE,
+    constants.EpisodeConstants.INSTANCE_ID,
+    constants.EpisodeConstants.IS_SUCCESSFUL,
+    constants.EpisodeConstants.EPISODE_LENGTH,
+    constants.EpisodeConstants.RUN_TIME,
+    constants.EpisodeConstants.EXCEPTION_INFO,
+    constants.EpisodeConstants.AUX_DATA,
+)
+
+
+class Suite(dict[str, Sequence[task_eval.TaskEval]]):
   """A suite of tasks.
 
-  Each key is the task name as defined in registry.py and its value is a list
-  of instantiated task objects. These instances differ from each other by their
+  Each key is the task name as defined in registry.py and its value is a
+  sequence of task objects. These instances differ from each other by their
   parameter initializations; i.e. each task will have different task parameters.
+  The sequence is either a list of instantiated tasks or, for lazy suites, a
+  `LazyTaskInstances` that builds each instance when it is accessed.
   """
 
   def __init__(self, *args, **kwargs):
@@ -103,13 +133,79 @@ def _instantiate_task(
   return task(params)
 
 
+class LazyTaskInstances(Sequence[task_eval.TaskEval]):
+  """Instances of a task that are created on access.
+
+  Only the task class and the seed of each instance are stored. Every access
+  instantiates a new task object, so callers that need to keep state on an
+  instance across calls (e.g. initialize, then score, then tear down) should
+  hold on to the returned object. If the seeds are `None`, each access yields
+  new random params.
+  """
+
+  def __init__(
+      self,
+      task_type: Type[task_eval.TaskEval],
+      seeds: Sequence[int | None],
+      env: interface.AsyncEnv | None = None,
+  ):
+    self._task_type = task_type
+    self._seeds = tuple(seeds)
+    self._env = env
+    self._name: str | None = None
+
+  @property
+  def task_type(self) -> Type[task_eval.TaskEval]:
+    """The task class that instances are created from."""
+    return self._task_type
+
+  @property
+  def name(self) -> str:
+    """The name of the task, as given by `TaskEval.name` of its instances.
+
+    Tasks may override `name`, e.g. to depend on their config, so it is read
+    from the first instance, which is built once for this.
+    """
+    if self._name is None:
+      self._name = self[0].name if self else self._task_type.__name__
+    return self._name
+
+  @property
+  def seeds(self) -> tuple[int | None, ...]:
+    """The seed used to generate the params of each instance."""
+    return self._seeds
+
+  def __len__(self) -> int:
+    return len(self._seeds)
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return [self[i] for i in range(*index.indices(len(self)))]
+    return _instantiate_task(
+        self._task_type, seed=self._seeds[index], env=self._env
+    )
+
+  def __repr__(self) -> str:
+    return (
+        f'{type(self).__name__}({self._task_type.__name__}, n={len(self)})'
+    )
+
+
+def _get_task_name(instances: Sequence[task_eval.TaskEval]) -> str:
+  """Returns the name of the task of instances, building at most one."""
+  if isinstance(instances, LazyTaskInstances):
+    return instances.name
+  return instances[0].name
+
+
 def create_suite(
     task_registry: dict[str, Type[task_eval.TaskEval]],
     n_task_combinations: int = 1,
     seed: int | None = None,
     tasks: list[str] | None = None,
     use_identical_params: bool = False,
-    env: interface.AsyncEnv | None = None
+    env: interface.AsyncEnv | None = None,
+    lazy: bool = False,
 ) -> Suite:
   """Creates task suite.
 
@@ -141,9 +237,16 @@ def create_suite(
     use_identical_params: If True, each instance of a task, for a total of
       `n_task_combinations`, will have the same params.
     env: The environment that will be run on.
+    lazy: If True, instances are not created up front. Each task maps to a
+      `LazyTaskInstances` holding the instance seeds, and an instance is built
+      when it is accessed, e.g. when the runner reaches it. Seeds are the same
+      as for an eager suite, so seeded params are identical.
 
   Returns:
     A mapping of task name to instances of the task.
+
+  Raises:
+    ValueError: If a task in `tasks` is not in the task registry.
   """
 
   def _get_instance_seed(name: str, i: int) -> int:
@@ -153,8 +256,11 @@ def create_suite(
     )
 
   suite = {}
-  for name, task_type in task_registry.items():
-    current = []
+  # Filter before instantiating, so unused tasks are never created.
+  for name, task_type in _filter_tasks(
+      task_registry, task_registry, tasks
+  ).items():
+    seeds = []
     for i in range(n_task_combinations):
       if use_identical_params:
         instance_seed = (
@@ -164,9 +270,14 @@ def create_suite(
         instance_seed = _get_instance_seed(name, i)
       else:
         instance_seed = None
-      current.append(_instantiate_task(task_type, seed=instance_seed, env=env))
-    suite[name] = current
-  suite = _filter_tasks(suite, task_registry, tasks)
+      seeds.append(instance_seed)
+    if lazy:
+      suite[name] = LazyTaskInstances(task_type, seeds, env=env)
+    else:
+      suite[name] = [
+          _instantiate_task(task_type, seed=instance_seed, env=env)
+          for instance_seed in seeds
+      ]
 
   # Sort suite alphabetically by task name.
   return Suite(sorted(suite.items()))
@@ -184,10 +295,10 @@ def _suggest_keyword(
 
 
 def _filter_tasks(
-    suite: dict[str, list[task_eval.TaskEval]],
+    suite: dict[str, _T],
     task_registry: dict[str, Type[task_eval.TaskEval]],
     tasks: list[str] | None = None,
-) -> dict[str, list[task_eval.TaskEval]]:
+) -> dict[str, _T]:
   """Filters a suite by specific tasks.
 
   Args:
@@ -220,11 +331,36 @@ def _filter_tasks(
   return subset
 
 
+def _accepts_step_sink(run_episode: Callable[..., Any]) -> bool:
+  """Returns whether run_episode can be called with a `step_sink` argument."""
+  try:
+    parameters = inspect.signature(run_episode).parameters.values()
+  except (TypeError, ValueError):
+    return False
+  return any(
+      p.name == 'step_sink' or p.kind == inspect.Parameter.VAR_KEYWORD
+      for p in parameters
+  )
+
+
+def _open_step_log(
+    checkpointer: checkpointer_lib.Checkpointer,
+    run_episode: Callable[..., Any],
+    instance_name: str,
+) -> checkpointer_lib.StepLog | None:
+  """Opens a step log for instance_name if run_episode can stream to it."""
+  if not _accepts_step_sink(run_episode):
+    return None
+  return checkpointer.open_step_log(instance_name)
+
+
 def _run_task(
     task: TaskEvalType,
     run_episode: Callable[[TaskEvalType], episode_runner.EpisodeResult],
     env: interface.AsyncEnv,
     demo_mode: bool,
+    initialize_lock: contextlib.AbstractContextManager[Any] | None = None,
+    step_log: checkpointer_lib.StepLog | None = None,
 ) -> dict[str, Any]:
   """Runs a task.
 
@@ -233,6 +369,12 @@ def _run_task(
     run_episode: Runs the agent on the task.
     env: Environment that will be run on.
     demo_mode: Whether running in demo mode; will display success overlay if so.
+    initialize_lock: If provided, held while the task is initialized. Task
+      initialization seeds and consumes the global `random` state, so parallel
+      runners use this to keep task setup identical to a serial run.
+    step_log: If provided, passed to `run_episode` as its `step_sink` to stream
+      the steps of the episode to disk. Only given for `run_episode` functions
+      that accept a `step_sink`.
 
   Returns:
     Episode data and associated success signals.
@@ -241,10 +383,18 @@ def _run_task(
     ValueError: If step data was not as expected.
   """
   start = time.time()
+  if initialize_lock is None:
+    initialize_lock = contextlib.nullcontext()
   try:
-    task.initialize_task(env)
+    with initialize_lock:
+      task.initialize_task(env)
+    # Setup may have rotated the screen, e.g. by launching an app.
+    env.invalidate_geometry()
     _log_and_print('Running task %s with goal "%s"', task.name, task.goal)
-    interaction_results = run_episode(task)
+    if step_log is None:
+      interaction_results = run_episode(task)
+    else:
+      interaction_results = run_episode(task, step_sink=step_log)
     task_successful = task.is_successful(env)
   except Exception as e:  # pylint: disable=broad-exception-caught
     _log_and_print('%s\nSKIPPING %s.', '~' * 80, task.name)
@@ -316,6 +466,70 @@ def _get_task_info(
   return completed, failed
 
 
+def _flatten(slots: list[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+  return [metadata for slot in slots for metadata in slot]
+
+
+class _ResultsSummarizer:
+  """Periodically prints results while a suite is running.
+
+  If no `process_episodes_fn` is given, results are kept up to date by an
+  `EpisodeAggregator`, so each episode costs O(1) rather than a rebuild of the
+  full results table.
+  """
+
+  def __init__(self, process_episodes_fn=None, summary_every_n: int = 1):
+    if summary_every_n <= 0:
+      raise ValueError('summary_every_n must be a positive integer.')
+    self._process_episodes_fn = process_episodes_fn
+    self._summary_every_n = summary_every_n
+    self._aggregator = EpisodeAggregator()
+    self._num_unreported = 0
+
+  def add_existing(self, episodes: list[dict[str, Any]]) -> None:
+    """Adds episodes loaded from a checkpoint, without printing."""
+    for episode in episodes:
+      self._aggregator.add(episode)
+
+  def add(
+      self,
+      episode: dict[str, Any],
+      all_episodes: (
+          list[dict[str, Any]] | Callable[[], list[dict[str, Any]]]
+      ),
+  ) -> None:
+    """Adds a newly run episode, printing the summary if it is due.
+
+    Args:
+      episode: The metadata of the new episode.
+      all_episodes: The metadata of all episodes so far, or a function returning
+        it. Only used with a custom `process_episodes_fn`.
+    """
+    self._aggregator.add(episode)
+    self._num_unreported += 1
+    if self._num_unreported >= self._summary_every_n:
+      self._report(all_episodes)
+
+  def finish(self, all_episodes: list[dict[str, Any]]) -> None:
+    """Prints the summary if any episode has not been reported yet."""
+    if self._num_unreported:
+      self._report(all_episodes)
+
+  def _report(
+      self,
+      all_episodes: (
+          list[dict[str, Any]] | Callable[[], list[dict[str, Any]]]
+      ),
+  ) -> None:
+    self._num_unreported = 0
+    if self._process_episodes_fn is None:
+      self._aggregator.render(print_summary=True)
+      return
+    if callable(all_episodes):
+      all_episodes = all_episodes()
+    self._process_episodes_fn(all_episodes, print_summary=True)
+
+
 def _run_task_suite(
     suite: Suite,
     run_episode: Callable[[task_eval.TaskEval], episode_runner.EpisodeResult],
@@ -326,6 +540,7 @@ def _run_task_suite(
     return_full_episode_data: bool = False,
     process_episodes_fn=None,
     check_episode_fn: Callable[[dict[str, Any]], bool] | None = None,
+    summary_every_n: int = 1,
 ) -> list[dict[str, Any]]:
   """Runs e2e system on suite.
 
@@ -339,27 +554,21 @@ def _run_task_suite(
     return_full_episode_data: Whether to return full episode data instead of
       just metadata.
     process_episodes_fn: The function to process episode data. Usually to
-      compute metrics. Deafaults to process_episodes from this file.
+      compute metrics. If not provided, results are aggregated incrementally
+      with an `EpisodeAggregator`, which prints the same table as
+      `process_episodes`.
     check_episode_fn: The function to check episode data.
+    summary_every_n: Print the results summary every `summary_every_n` episodes,
+      and once more at the end of the run.
 
   Returns:
     Metadata for each episode, including the scripted reward.
   """
-  metadata_fields = [
-      constants.EpisodeConstants.GOAL,
-      constants.EpisodeConstants.TASK_TEMPLATE,
-      constants.EpisodeConstants.INSTANCE_ID,
-      constants.EpisodeConstants.IS_SUCCESSFUL,
-      constants.EpisodeConstants.EPISODE_LENGTH,
-      constants.EpisodeConstants.RUN_TIME,
-      constants.EpisodeConstants.EXCEPTION_INFO,
-      constants.EpisodeConstants.AUX_DATA,
-  ]
+  metadata_fields = list(_METADATA_FIELDS)
   completed_tasks, failed_tasks = _get_task_info(
       checkpointer.load(fields=metadata_fields)
   )
-  if process_episodes_fn is None:
-    process_episodes_fn = process_episodes
+  summarizer = _ResultsSummarizer(process_episodes_fn, summary_every_n)
 
   if (completed_tasks or failed_tasks) and return_full_episode_data:
     raise ValueError(
@@ -372,18 +581,19 @@ def _run_task_suite(
     msg = 'Running task: ' + name
     _log_and_print(msg + '\n' + '=' * len(msg))
 
-    for i, instance in enumerate(instances):
-      instance_name = (
-          instance.name + checkpointer_lib.INSTANCE_SEPARATOR + str(i)
-      )
+    task_name = _get_task_name(instances) if instances else ''
+    for i in range(len(instances)):
+      instance_name = task_name + checkpointer_lib.INSTANCE_SEPARATOR + str(i)
       # Transferring from old checkpoint.
       if instance_name in completed_tasks:
         completed_episodes: list[dict[str, Any]] = completed_tasks[
             instance_name
         ]
         episodes_metadata.extend(completed_episodes)
+        summarizer.add_existing(completed_episodes)
       if instance_name in failed_tasks:
         episodes_metadata.extend(failed_tasks[instance_name])
+        summarizer.add_existing(failed_tasks[instance_name])
       already_processed = (
           instance_name in completed_tasks and instance_name not in failed_tasks
       )
@@ -391,12 +601,23 @@ def _run_task_suite(
         _log_and_print('Skipping already processed task %s', instance_name)
         continue
 
-      episode = _run_task(instance, run_episode, env, demo_mode=demo_mode)
+      # Lazy suites build the instance only once it is about to run.
+      instance = instances[i]
+      step_log = _open_step_log(checkpointer, run_episode, instance_name)
+      try:
+        episode = _run_task(
+            instance, run_episode, env, demo_mode=demo_mode, step_log=step_log
+        )
+      finally:
+        if step_log is not None:
+          step_log.close()
       if (
           episode.get(constants.EpisodeConstants.EXCEPTION_INFO) is None
           and check_episode_fn is not None
       ):
         if not check_episode_fn(episode):
+          if step_log is not None:
+            step_log.discard()
           continue
       episode[constants.EpisodeConstants.AGENT_NAME] = agent_name
       episode[constants.EpisodeConstants.INSTANCE_ID] = i
@@ -405,8 +626,9 @@ def _run_task_suite(
       if return_full_episode_data:
         full_episode_data.append(episode)
 
-      episodes_metadata.append({k: episode[k] for k in metadata_fields})
-      process_episodes_fn(episodes_metadata, print_summary=True)
+      episode_metadata = {k: episode[k] for k in metadata_fields}
+      episodes_metadata.append(episode_metadata)
+      summarizer.add(episode_metadata, episodes_metadata)
 
       if episode[constants.EpisodeConstants.EXCEPTION_INFO] is not None:
         # Don't include episode in tally if execution/eval logic errored out.
@@ -416,6 +638,7 @@ def _run_task_suite(
       if demo_mode:
         _update_scoreboard(correct, total, env.controller)
     print()
+  summarizer.finish(episodes_metadata)
 
   return full_episode_data if return_full_episode_data else episodes_metadata
 
@@ -428,6 +651,7 @@ def run(
     return_full_episode_data: bool = False,
     process_episodes_fn=None,
     check_episode_fn: Callable[[dict[str, Any]], bool] | None = None,
+    summary_every_n: int = 1,
 ) -> list[dict[str, Any]]:
   """Create suite and runs eval suite.
 
@@ -437,33 +661,22 @@ def run(
     checkpointer: Checkpointer that loads from existing run and resumes from
       there. NOTE: It will resume from the last fully completed task template.
       Relatedly, data for a task template will not be saved until all instances
-      are executed.
+      are executed. If the checkpointer opens step logs, the steps of each
+      episode are also streamed to it while the episode runs.
     demo_mode: Whether to run in demo mode, which displays a scoreboard and the
       task instruction as a notification.
     return_full_episode_data: Whether to return full episode data instead of
       just metadata.
     process_episodes_fn: The function to process episode data. Usually to
-      compute metrics. Deafaults to process_episodes from this file.
+      compute metrics. Deafaults to incrementally computing the results of
+      process_episodes from this file.
     check_episode_fn: The function to check episode data.
+    summary_every_n: How often, in episodes, to print the results summary.
 
   Returns:
     Step-by-step data from each episode.
   """
-
-  def run_episode(task: task_eval.TaskEval) -> episode_runner.EpisodeResult:
-    if demo_mode:
-      _display_goal(agent.env, task)
-    return episode_runner.run_episode(
-        goal=task.goal,
-        agent=agent,
-        max_n_steps=_allocate_step_budget(task.complexity),
-        start_on_home_screen=task.start_on_home_screen,
-        termination_fn=(
-            miniwob_base.is_episode_terminated
-            if task.name.lower().startswith('miniwob')
-            else None
-        ),
-    )
+  run_episode = _get_run_episode_fn(agent, demo_mode)
 
   if demo_mode:
     adb_utils.send_android_intent(
@@ -483,11 +696,217 @@ def run(
       return_full_episode_data=return_full_episode_data,
       process_episodes_fn=process_episodes_fn,
       check_episode_fn=check_episode_fn,
+      summary_every_n=summary_every_n,
   )
 
   return results
 
 
+def _get_run_episode_fn(
+    agent: base_agent.EnvironmentInteractingAgent, demo_mode: bool = False
+) -> Callable[..., episode_runner.EpisodeResult]:
+  """Returns a function that runs `agent` on a task for a single episode.
+
+  The function takes the task and an optional `step_sink`, which is forwarded
+  to `episode_runner.run_episode`.
+  """
+
+  def run_episode(
+      task: task_eval.TaskEval,
+      step_sink: Callable[[dict[str, Any]], Any] | None = None,
+  ) -> episode_runner.EpisodeResult:
+    if demo_mode:
+      _display_goal(agent.env, task)
+    return episode_runner.run_episode(
+        goal=task.goal,
+        agent=agent,
+        max_n_steps=_allocate_step_budget(task.complexity),
+        start_on_home_screen=task.start_on_home_screen,
+        termination_fn=(
+            miniwob_base.is_episode_terminated
+            if task.name.lower().startswith('miniwob')
+            else None
+        ),
+        step_sink=step_sink,
+    )
+
+  return run_episode
+
+
+def _run_task_suite_parallel(
+    suite: Suite,
+    run_episode_fns: Sequence[
+        Callable[[task_eval.TaskEval], episode_runner.EpisodeResult]
+    ],
+    envs: Sequence[interface.AsyncEnv],
+    checkpointer: checkpointer_lib.Checkpointer = checkpointer_lib.NullCheckpointer(),
+    agent_name: str = '',
+    process_episodes_fn=None,
+    check_episode_fn: Callable[[dict[str, Any]], bool] | None = None,
+    summary_every_n: int = 1,
+) -> list[dict[str, Any]]:
+  """Runs e2e system on suite, sharding task instances across environments.
+
+  Each environment gets its own worker thread, which pulls task instances from a
+  shared work queue until it is empty. All workers write to the same
+  checkpointer, so a run can be resumed by either the serial or the parallel
+  runner. The returned metadata is ordered as in `_run_task_suite`.
+
+  Args:
+    suite: The suite to run it on.
+    run_episode_fns: The e2e system for each environment; i.e.
+      `run_episode_fns[i]` runs an agent acting on `envs[i]`.
+    envs: The environments, one per emulator.
+    checkpointer: See docstring from `run`.
+    agent_name: The name of the agent.
+    process_episodes_fn: See docstring from `_run_task_suite`.
+    check_episode_fn: The function to check episode data.
+    summary_every_n: See docstring from `_run_task_suite`.
+
+  Returns:
+    Metadata for each episode, including the scripted reward.
+
+  Raises:
+    ValueError: If the number of environments and episode runners differ.
+  """
+  if len(run_episode_fns) != len(envs):
+    raise ValueError(
+        f'Got {len(run_episode_fns)} episode runners for {len(envs)}'
+        ' environments; there must be exactly one per environment.'
+    )
+  if not envs:
+    raise ValueError('At least one environment is required.')
+  metadata_fields = list(_METADATA_FIELDS)
+  completed_tasks, failed_tasks = _get_task_info(
+      checkpointer.load(fields=metadata_fields)
+  )
+  summarizer = _ResultsSummarizer(process_episodes_fn, summary_every_n)
+
+  # One slot of metadata per instance, in suite order. Workers fill in the
+  # slots of the instances they run, so the output is independent of scheduling.
+  slots: list[list[dict[str, Any]]] = []
+  work_queue = queue.Queue()
+  for instances in suite.values():
+    task_name = _get_task_name(instances) if instances else ''
+    for i in range(len(instances)):
+      instance_name = task_name + checkpointer_lib.INSTANCE_SEPARATOR + str(i)
+      slot = completed_tasks.get(instance_name, []) + failed_tasks.get(
+          instance_name, []
+      )
+      slots.append(slot)
+      summarizer.add_existing(slot)
+      already_processed = (
+          instance_name in completed_tasks and instance_name not in failed_tasks
+      )
+      if already_processed:
+        _log_and_print('Skipping already processed task %s', instance_name)
+        continue
+      work_queue.put((instances, i, instance_name, slot))
+
+  results_lock = threading.Lock()
+  initialize_lock = threading.Lock()
+
+  def worker(worker_id: int) -> None:
+    run_episode, env = run_episode_fns[worker_id], envs[worker_id]
+    while True:
+      try:
+        instances, i, instance_name, slot = work_queue.get_nowait()
+      except queue.Empty:
+        return
+      # Lazy suites build the instance here. Instantiation seeds the global
+      # random state, so it shares the lock with task initialization.
+      with initialize_lock:
+        instance = instances[i]
+      _log_and_print('[worker %d] Running task: %s', worker_id, instance_name)
+      step_log = _open_step_log(checkpointer, run_episode, instance_name)
+      try:
+        episode = _run_task(
+            instance,
+            run_episode,
+            env,
+            demo_mode=False,
+            initialize_lock=initialize_lock,
+            step_log=step_log,
+        )
+      finally:
+        if step_log is not None:
+          step_log.close()
+      if (
+          episode.get(constants.EpisodeConstants.EXCEPTION_INFO) is None
+          and check_episode_fn is not None
+      ):
+        if not check_episode_fn(episode):
+          if step_log is not None:
+            step_log.discard()
+          continue
+      episode[constants.EpisodeConstants.AGENT_NAME] = agent_name
+      episode[constants.EpisodeConstants.INSTANCE_ID] = i
+      checkpointer.save_episodes([episode], instance_name)
+
+      with results_lock:
+        episode_metadata = {k: episode[k] for k in metadata_fields}
+        slot.append(episode_metadata)
+        summarizer.add(episode_metadata, lambda: _flatten(slots))
+
+  with futures.ThreadPoolExecutor(
+      max_workers=len(envs), thread_name_prefix='suite_worker'
+  ) as executor:
+    worker_futures = [executor.submit(worker, i) for i in range(len(envs))]
+    for future in worker_futures:
+      # Re-raises any exception that escaped a worker.
+      future.result()
+
+  episodes_metadata = _flatten(slots)
+  summarizer.finish(episodes_metadata)
+  return episodes_metadata
+
+
+def run_parallel(
+    suite: Suite,
+    agents: Sequence[base_agent.EnvironmentInteractingAgent],
+    checkpointer: checkpointer_lib.Checkpointer = checkpointer_lib.NullCheckpointer(),
+    process_episodes_fn=None,
+    check_episode_fn: Callable[[dict[str, Any]], bool] | None = None,
+    summary_every_n: int = 1,
+) -> list[dict[str, Any]]:
+  """Runs eval suite on several environments in parallel.
+
+  This is the multi-emulator equivalent of `run`. Each agent must act on its
+  own environment; e.g. one `AsyncEnv` per running emulator. Task instances are
+  handed out from a shared work queue, so faster emulators pick up more work.
+
+  Args:
+    suite: The suite of tasks to run on.
+    agents: Agents that interact on the environments; one per environment.
+    checkpointer: Checkpointer that loads from existing run and resumes from
+      there. Shared by all workers.
+    process_episodes_fn: The function to process episode data. Usually to
+      compute metrics. Deafaults to incrementally computing the results of
+      process_episodes from this file.
+    check_episode_fn: The function to check episode data.
+    summary_every_n: How often, in episodes, to print the results summary.
+
+  Returns:
+    Metadata for each episode, in the same order as a serial `run`.
+
+  Raises:
+    ValueError: If two agents share the same environment.
+  """
+  envs = [agent.env for agent in agents]
+  if len({id(env) for env in envs}) != len(envs):
+    raise ValueError('Each agent must have its own environment.')
+  return _run_task_suite_parallel(
+      suite,
+      [_get_run_episode_fn(agent) for agent in agents],
+      envs,
+      checkpointer=checkpointer,
+      agent_name=agents[0].name if agents else '',
+      process_episodes_fn=process_episodes_fn,
+      check_episode_fn=check_episode_fn,
+      summary_every_n=summary_every_n,
+  )
+
+
 def _allocate_step_budget(task_complexity: float) -> int:
   """Allocates number of steps dynamically based on the complexity score.
 
@@ -586,8 +1005,9 @@ def _update_scoreboard(
   )
 
 
-def _extract_task_metadata() -> pd.DataFrame:
-  """Extracts metadata from task_metadata.json."""
+@functools.cache
+def _load_task_metadata() -> pd.DataFrame:
+  """Reads task_metadata.json; cached since the file is static."""
   name = 'task_metadata.json'
   filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
   df = pd.read_json(filepath)
@@ -598,6 +1018,11 @@ def _extract_task_metadata() -> pd.DataFrame:
   ]
 
 
+def _extract_task_metadata() -> pd.DataFrame:
+  """Extracts metadata from task_metadata.json."""
+  return _load_task_metadata().copy()
+
+
 def _print_results_by_tag(result_df: pd.DataFrame) -> None:
   exploded_df = result_df.explode('tags').reset_index()
   exploded_df.replace(regex={'tags': r''}, value='untagged', inplace=True)  # pytype: disable=wrong-arg-types
@@ -669,7 +1094,18 @@ def process_episodes(
     A dataframe aggregating results of run.
   """
 
-  df = pd.DataFrame(list(episodes))
+  # Only keep the fields used below, so lazily loaded episodes (see
+  # `checkpointer.LazyEpisode`) are not decoded in full.
+  columns = (
+      constants.EpisodeConstants.TASK_TEMPLATE,
+      constants.EpisodeConstants.IS_SUCCESSFUL,
+      constants.EpisodeConstants.EPISODE_LENGTH,
+      constants.EpisodeConstants.RUN_TIME,
+      constants.EpisodeConstants.EXCEPTION_INFO,
+  )
+  df = pd.DataFrame(
+      [{k: episode[k] for k in columns if k in episode} for episode in episodes]
+  )
 
   # Add exeception info for backwards compatibility.
   df = df.assign(**{
@@ -689,13 +1125,22 @@ def process_episodes(
       ],
   })
   result_df = result_df.sort_index()
-  result_df.columns = [
-      'num_complete_trials',
-      'mean_success_rate',
-      'mean_episode_length',
-      'total_runtime_s',
-      'num_fail_trials',
-  ]
+  result_df.columns = list(_RESULT_COLUMNS)
+  return _summarize_results(result_df, print_summary)
+
+
+def _summarize_results(
+    result_df: pd.DataFrame, print_summary: bool
+) -> pd.DataFrame:
+  """Merges per-template results with task metadata and optionally prints it.
+
+  Args:
+    result_df: Results indexed by task template, with `_RESULT_COLUMNS`.
+    print_summary: Whether to print the dataframe with a summary row.
+
+  Returns:
+    The results merged with the task metadata.
+  """
   result_df['total_runtime_s'] = result_df['total_runtime_s'].map(
       lambda x: float('{:.1f}'.format(x))
   )
@@ -725,3 +1170,113 @@ def process_episodes(
     _log_and_print('\n\n%s', tags_df)
 
   return tagged_result_df
+
+
+def _is_missing(value: Any) -> bool:
+  """Returns whether a value counts as missing, matching `pd.isnull`."""
+  return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+@dataclasses.dataclass
+class _TemplateResults:
+  """Running totals for a single task template."""
+
+  num_complete_trials: int = 0
+  success_sum: float = 0.0
+  episode_length_sum: float = 0.0
+  num_episode_lengths: int = 0
+  total_runtime_s: float = 0.0
+  num_fail_trials: int = 0
+
+
+class EpisodeAggregator:
+  """Incrementally aggregates episode metadata, like `process_episodes`.
+
+  `process_episodes` rebuilds a dataframe from all episodes each time it is
+  called, so calling it after every episode is quadratic in the length of a run.
+  This class instead keeps running totals per task template, updated in O(1)
+  per episode, and only builds the dataframe when `render` is called.
+
+  agg = EpisodeAggregator()
+  for episode in episodes:
+    agg.add(episode)
+  agg.render(print_summary=True)  # Same table as process_episodes(episodes).
+  """
+
+  def __init__(self):
+    self._results: dict[str, _TemplateResults] = collections.defaultdict(
+        _TemplateResults
+    )
+    self._num_episodes = 0
+
+  @property
+  def num_episodes(self) -> int:
+    """Number of episodes added so far."""
+    return self._num_episodes
+
+  def add(self, episode: dict[str, Any]) -> None:
+    """Adds an episode's metadata to the running totals."""
+    self._num_episodes += 1
+    template = episode.get(constants.EpisodeConstants.TASK_TEMPLATE)
+    if _is_missing(template):
+      return
+    results = self._results[template]
+    is_successful = episode.get(constants.EpisodeConstants.IS_SUCCESSFUL)
+    if not _is_missing(is_successful):
+      results.num_complete_trials += 1
+      results.success_sum += float(is_successful)
+    episode_length = episode.get(constants.EpisodeConstants.EPISODE_LENGTH)
+    if not _is_missing(episode_length):
+      results.num_episode_lengths += 1
+      results.episode_length_sum += episode_length
+    run_time = episode.get(constants.EpisodeConstants.RUN_TIME)
+    if not _is_missing(run_time):
+      results.total_runtime_s += run_time
+    exception_info = episode.get(constants.EpisodeConstants.EXCEPTION_INFO)
+    if not _is_missing(exception_info):
+      results.num_fail_trials += 1
+
+  def render(self, print_summary: bool = False) -> pd.DataFrame:
+    """Builds the results dataframe; see `process_episodes` for its format.
+
+    Args:
+      print_summary: Whether to print the dataframe with a summary row.
+
+    Returns:
+      A dataframe aggregating results of run.
+    """
+    templates = sorted(self._results)
+    rows = [self._results[template] for template in templates]
+    result_df = pd.DataFrame(
+        {
+            'num_complete_trials': pd.Series(
+                [r.num_complete_trials for r in rows], dtype=np.int64
+            ),
+            'mean_success_rate': pd.Series(
+                [
+                    r.success_sum / r.num_complete_trials
+                    if r.num_complete_trials
+                    else np.nan
+                    for r in rows
+                ],
+                dtype=np.float64,
+            ),
+            'mean_episode_length': pd.Series(
+                [
+                    r.episode_length_sum / r.num_episode_lengths
+                    if r.num_episode_lengths
+                    else np.nan
+                    for r in rows
+                ],
+                dtype=np.float64,
+            ),
+            'total_runtime_s': pd.Series(
+                [r.total_runtime_s for r in rows], dtype=np.float64
+            ),
+            'num_fail_trials': pd.Series(
+                [r.num_fail_trials for r in rows], dtype=np.int64
+            ),
+        },
+    )
+    result_df.index = pd.Index(templates, name=_TASK_TEMPLATE_COLUMN)
+    return _summarize_results(result_df, print_summary)
@@ -15,6 +15,7 @@
 """Tests for suite utils."""
 
 import copy
+import tempfile
 import time
 from typing import Any
 from unittest import mock
@@ -28,9 +29,11 @@ from android_world import suite_utils
 from android_world.agents import base_agent
 from android_world.env import adb_utils
 from android_world.env import interface
+from android_world.task_evals.robustness_study import screen_variation
 from android_world.utils import test_utils
 import dm_env
 import numpy as np
+import pandas as pd
 
 
 class TestCreateSuite(parameterized.TestCase):
@@ -138,6 +141,75 @@ class TestSuite(absltest.TestCase):
     suite_utils.create_suite(self.testing_registry, n_task_combinations=2)
     mock_seed.assert_not_called()
 
+  def test_lazy_suite_matches_eager_suite(self):
+    eager = suite_utils.create_suite(
+        self.testing_registry, n_task_combinations=3, seed=self.seed
+    )
+    lazy = suite_utils.create_suite(
+        self.testing_registry, n_task_combinations=3, seed=self.seed, lazy=True
+    )
+
+    self.assertEqual(list(eager.keys()), list(lazy.keys()))
+    for name in eager:
+      self.assertIsInstance(lazy[name], suite_utils.LazyTaskInstances)
+      self.assertLen(lazy[name], 3)
+      self.assertEqual(
+          [instance.params for instance in eager[name]],
+          [instance.params for instance in lazy[name]],
+      )
+
+  def test_lazy_task_name_matches_eager_instance_name(self):
+    task_type = screen_variation.generate_screen_variation_wrapper(
+        test_utils.FakeCurrentStateEval,
+        screen_width=1080,
+        screen_height=2400,
+        screen_orientation='portrait',
+        params={},
+        screen_config_name='small',
+    )
+    eager = suite_utils.create_suite(
+        {'Task': task_type}, n_task_combinations=2, seed=self.seed
+    )
+    lazy = suite_utils.create_suite(
+        {'Task': task_type}, n_task_combinations=2, seed=self.seed, lazy=True
+    )
+
+    self.assertEqual('FakeCurrentStateEval_small', lazy['Task'].name)
+    self.assertEqual(
+        suite_utils._get_task_name(eager['Task']),
+        suite_utils._get_task_name(lazy['Task']),
+    )
+
+  def test_lazy_suite_does_not_instantiate_until_accessed(self):
+    with mock.patch.object(
+        suite_utils, '_instantiate_task', autospec=True
+    ) as mock_instantiate:
+      suite = suite_utils.create_suite(
+          self.testing_registry,
+          n_task_combinations=2,
+          seed=self.seed,
+          lazy=True,
+      )
+      mock_instantiate.assert_not_called()
+
+      _ = suite['Task1'][1]
+      mock_instantiate.assert_called_once_with(
+          test_utils.FakeCurrentStateEval,
+          seed=suite['Task1'].seeds[1],
+          env=None,
+      )
+
+  def test_create_suite_only_instantiates_filtered_tasks(self):
+    with mock.patch.object(
+        test_utils.FakeAdbEval, 'generate_random_params', autospec=True
+    ) as mock_generate:
+      suite = suite_utils.create_suite(
+          self.testing_registry, n_task_combinations=2, tasks=['Task1']
+      )
+
+    self.assertEqual(list(suite.keys()), ['Task1'])
+    mock_generate.assert_not_called()
+
   def test_return_all_when_tasks_none(self):
     suite = suite_utils.Suite(
         **{
@@ -278,6 +350,7 @@ class SuiteUtilsTest(parameterized.TestCase):
     self.assertEqual(result['is_successful'], 1)
     self.assertIn(result['goal'], 'ADB eval')
     mock_initialize_task.assert_called_once()
+    mock_env.invalidate_geometry.assert_called_once()
     if demo_mode:
       mock_send_android_intent.assert_has_calls([
           mock.call(
@@ -519,6 +592,56 @@ class RunTaskSuiteTest(absltest.TestCase):
         mock.call(mock.ANY, 'FakeAdbEval_0'),
     ])
 
+  @mock.patch.object(time, 'sleep', autospec=True)
+  @mock.patch.object(interface, 'AsyncAndroidEnv')
+  @mock.patch.object(adb_utils, 'send_android_intent')
+  @mock.patch.object(checkpointer, 'Checkpointer')
+  def test_resume_lazy_suite_builds_only_remaining_instances(
+      self,
+      mock_checkpointer,
+      unused_mock_send_android_intent,
+      mock_env,
+      unused_mock_sleep,
+  ):
+    mock_checkpointer.load.return_value = [{
+        'instance_id': 0,
+        'is_successful': 0.0,
+        'goal': 'Current state eval',
+        'task_template': 'FakeCurrentStateEval',
+        'episode_length': 1,
+        'run_time': 0,
+    }]
+    mock_run_e2e = mock.MagicMock(
+        return_value=episode_runner.EpisodeResult(True, {'step_number': [0]})
+    )
+    suite = suite_utils.Suite(
+        FakeCurrentStateEval=suite_utils.LazyTaskInstances(
+            test_utils.FakeCurrentStateEval, seeds=[1, 2]
+        )
+    )
+
+    with mock.patch.object(
+        suite_utils,
+        '_instantiate_task',
+        wraps=suite_utils._instantiate_task,
+    ) as mock_instantiate:
+      suite_utils._run_task_suite(
+          suite, mock_run_e2e, mock_env, mock_checkpointer
+      )
+
+    # The first instance is built once for the task name; of the instances
+    # that run, only the remaining one is built.
+    self.assertEqual(
+        [
+            mock.call(test_utils.FakeCurrentStateEval, seed=1, env=None),
+            mock.call(test_utils.FakeCurrentStateEval, seed=2, env=None),
+        ],
+        mock_instantiate.call_args_list,
+    )
+    mock_checkpointer.save_episodes.assert_called_once_with(
+        mock.ANY, 'FakeCurrentStateEval_1'
+    )
+
   @mock.patch.object(time, 'sleep', autospec=True)
   @mock.patch.object(interface, 'AsyncAndroidEnv')
   @mock.patch.object(adb_utils, 'send_android_intent')
@@ -712,5 +835,284 @@ class RunTaskSuiteTest(absltest.TestCase):
     self.assertLen(result2, 1)
 
 
+class EpisodeAggregatorTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.episodes = [
+        {
+            'task_template': 'ContactsAddContact',
+            'is_successful': 1.0,
+            'episode_length': 4,
+            'run_time': 10.25,
+            'exception_info': None,
+        },
+        {
+            'task_template': 'ContactsAddContact',
+            'is_successful': 0.0,
+            'episode_length': 6,
+            'run_time': 12.0,
+            'exception_info': None,
+        },
+        {
+            'task_template': 'ClockStopWatchRunning',
+            'is_successful': np.nan,
+            'episode_length': np.nan,
+            'run_time': 3.0,
+            'exception_info': 'Traceback...',
+        },
+        {
+            'task_template': 'ClockStopWatchRunning',
+            'is_successful': True,
+            'episode_length': 2,
+            'run_time': 5.0,
+            'exception_info': None,
+        },
+        {
+            'task_template': 'NotInTaskMetadata',
+            'is_successful': np.nan,
+            'episode_length': np.nan,
+            'run_time': 1.0,
+            'exception_info': 'Traceback...',
+        },
+    ]
+
+  def test_render_matches_process_episodes(self):
+    aggregator = suite_utils.EpisodeAggregator()
+    for episode in self.episodes:
+      aggregator.add(episode)
+
+    pd.testing.assert_frame_equal(
+        aggregator.render(),
+        suite_utils.process_episodes(self.episodes),
+        check_dtype=False,
+    )
+    self.assertEqual(aggregator.num_episodes, len(self.episodes))
+
+  def test_render_prints_summary(self):
+    aggregator = suite_utils.EpisodeAggregator()
+    for episode in self.episodes:
+      aggregator.add(episode)
+
+    with mock.patch.object(suite_utils, '_log_and_print') as mock_print:
+      aggregator.render(print_summary=True)
+
+    self.assertEqual(mock_print.call_count, 2)
+
+  @mock.patch.object(suite_utils.EpisodeAggregator, 'render')
+  def test_run_task_suite_summary_every_n(self, mock_render):
+    mock_run_e2e = mock.MagicMock(
+        return_value=episode_runner.EpisodeResult(True, {'step_number': [0]})
+    )
+    suite = suite_utils.Suite(
+        FakeCurrentStateEval=[
+            test_utils.FakeCurrentStateEval(
+                test_utils.FakeCurrentStateEval.generate_random_params()
+            )
+            for _ in range(5)
+        ]
+    )
+
+    suite_utils._run_task_suite(
+        suite, mock_run_e2e, mock.MagicMock(), summary_every_n=2
+    )
+
+    # After episodes 2 and 4, and once more at the end for episode 5.
+    self.assertEqual(mock_render.call_count, 3)
+
+  def test_run_task_suite_streams_steps(self):
+    temp_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(temp_dir.cleanup)
+    streaming = checkpointer.IncrementalCheckpointer(
+        temp_dir.name, stream_steps=True
+    )
+    streamed = []
+
+    def run_e2e(task, step_sink):
+      del task
+      step_sink({'step_number': 0})
+      streamed.append(streaming.load_steps('FakeCurrentStateEval_0'))
+      return episode_runner.EpisodeResult(True, {'step_number': [0]})
+
+    suite = suite_utils.Suite(
+        FakeCurrentStateEval=[
+            test_utils.FakeCurrentStateEval(
+                test_utils.FakeCurrentStateEval.generate_random_params()
+            )
+        ]
+    )
+    suite_utils._run_task_suite(suite, run_e2e, mock.MagicMock(), streaming)
+
+    self.assertEqual([{'step_number': [0]}], streamed)
+    # The saved episode replaces the step log.
+    self.assertEqual({}, streaming.load_steps('FakeCurrentStateEval_0'))
+    self.assertLen(streaming.load(), 1)
+
+  def test_run_task_suite_without_step_sink_does_not_stream(self):
+    temp_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(temp_dir.cleanup)
+    streaming = checkpointer.IncrementalCheckpointer(
+        temp_dir.name, stream_steps=True
+    )
+
+    def run_e2e(task):
+      del task
+      return episode_runner.EpisodeResult(True, {'step_number': [0]})
+
+    suite = suite_utils.Suite(
+        FakeCurrentStateEval=[
+            test_utils.FakeCurrentStateEval(
+                test_utils.FakeCurrentStateEval.generate_random_params()
+            )
+        ]
+    )
+    results = suite_utils._run_task_suite(
+        suite, run_e2e, mock.MagicMock(), streaming
+    )
+
+    self.assertIsNone(results[0]['exception_info'])
+
+  def test_rejected_episode_removes_step_log(self):
+    temp_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(temp_dir.cleanup)
+    streaming = checkpointer.IncrementalCheckpointer(
+        temp_dir.name, stream_steps=True
+    )
+
+    def run_e2e(task, step_sink):
+      del task
+      step_sink({'step_number': 0})
+      return episode_runner.EpisodeResult(True, {'step_number': [0]})
+
+    suite = suite_utils.Suite(
+        FakeCurrentStateEval=[
+            test_utils.FakeCurrentStateEval(
+                test_utils.FakeCurrentStateEval.generate_random_params()
+            )
+        ]
+    )
+    suite_utils._run_task_suite(
+        suite,
+        run_e2e,
+        mock.MagicMock(),
+        streaming,
+        check_episode_fn=lambda episode: False,
+    )
+
+    self.assertEqual({}, streaming.load_steps('FakeCurrentStateEval_0'))
+    self.assertEmpty(streaming.load())
+
+
+class RunTaskSuiteParallelTest(absltest.TestCase):
+
+  def _create_suite(self) -> suite_utils.Suite:
+    suite = suite_utils.Suite(
+        **{
+            'FakeCurrentStateEval': [
+                test_utils.FakeCurrentStateEval(
+                    test_utils.FakeCurrentStateEval.generate_random_params()
+                ),
+                test_utils.FakeCurrentStateEval(
+                    test_utils.FakeCurrentStateEval.generate_random_params()
+                ),
+            ],
+            'FakeAdbEval': [
+                test_utils.FakeAdbEval(
+                    test_utils.FakeAdbEval.generate_random_params()
+                )
+            ],
+        },
+    )
+    suite.suite_family = 'android'
+    return suite
+
+  @mock.patch.object(checkpointer, 'Checkpointer')
+  def test_run_task_suite_parallel(self, mock_checkpointer):
+    mock_checkpointer.load.return_value = []
+    envs = [mock.MagicMock(), mock.MagicMock()]
+    run_episode_fns = [
+        mock.MagicMock(
+            return_value=episode_runner.EpisodeResult(
+                True, {'step_number': [0]}
+            )
+        )
+        for _ in envs
+    ]
+
+    result = suite_utils._run_task_suite_parallel(
+        self._create_suite(),
+        run_episode_fns,
+        envs,
+        mock_checkpointer,
+        process_episodes_fn=mock.MagicMock(),
+    )
+
+    self.assertEqual(
+        [r['task_template'] for r in result],
+        ['FakeCurrentStateEval', 'FakeCurrentStateEval', 'FakeAdbEval'],
+    )
+    self.assertEqual([r['instance_id'] for r in result], [0, 1, 0])
+    self.assertEqual(sum(fn.call_count for fn in run_episode_fns), 3)
+    mock_checkpointer.load.assert_called_once()
+    mock_checkpointer.save_episodes.assert_has_calls(
+        [
+            mock.call(mock.ANY, 'FakeCurrentStateEval_0'),
+            mock.call(mock.ANY, 'FakeCurrentStateEval_1'),
+            mock.call(mock.ANY, 'FakeAdbEval_0'),
+        ],
+        any_order=True,
+    )
+
+  @mock.patch.object(checkpointer, 'Checkpointer')
+  def test_resume_from_middle(self, mock_checkpointer):
+    mock_checkpointer.load.return_value = [
+        {
+            'instance_id': 1,
+            'is_successful': 0.0,
+            'goal': 'Current state eval',
+            'task_template': 'FakeCurrentStateEval',
+            'episode_length': 1,
+            'run_time': 0,
+        },
+    ]
+    envs = [mock.MagicMock(), mock.MagicMock()]
+    run_episode_fns = [
+        mock.MagicMock(
+            return_value=episode_runner.EpisodeResult(
+                True, {'step_number': [0]}
+            )
+        )
+        for _ in envs
+    ]
+
+    result = suite_utils._run_task_suite_parallel(
+        self._create_suite(),
+        run_episode_fns,
+        envs,
+        mock_checkpointer,
+        process_episodes_fn=mock.MagicMock(),
+    )
+
+    self.assertEqual([r['is_successful'] for r in result], [1, 0, 1])
+    self.assertEqual(sum(fn.call_count for fn in run_episode_fns), 2)
+    self.assertCountEqual(
+        [c.args[1] for c in mock_checkpointer.save_episodes.call_args_list],
+        ['FakeCurrentStateEval_0', 'FakeAdbEval_0'],
+    )
+
+  def test_mismatched_envs_raises_value_error(self):
+    with self.assertRaises(ValueError):
+      suite_utils._run_task_suite_parallel(
+          self._create_suite(), [mock.MagicMock()], []
+      )
+
+  def test_run_parallel_requires_distinct_envs(self):
+    env = test_utils.FakeAsyncEnv()
+    agents = [mock.MagicMock(env=env), mock.MagicMock(env=env)]
+
+    with self.assertRaises(ValueError):
+      suite_utils.run_parallel(self._create_suite(), agents)
+
+
 if __name__ == '__main__':
   absltest.main()
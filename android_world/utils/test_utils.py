@@ -233,6 +233,14 @@ class FakeAsyncEnv(interface.AsyncAndroidEnv):
         ui_elements=[],
     )
 
+  def wait_for_transition(
+      self,
+      action: json_action.JSONAction | None = None,
+      timeout: float = 2.0,
+  ) -> interface.State:
+    del action, timeout
+    return self.get_state()
+
   def execute_action(self, action: json_action.JSONAction):
     del action
 
@@ -251,3 +259,11 @@ class FakeAsyncEnv(interface.AsyncAndroidEnv):
   @property
   def logical_screen_size(self) -> tuple[int, int]:
     return (100, 100)
+
+  @property
+  def geometry(self) -> adb_utils.DeviceGeometry:
+    return adb_utils.DeviceGeometry(
+        logical_screen_size=self.logical_screen_size,
+        orientation=0,
+        physical_frame_boundary=(0, 0, 100, 100),
+    )
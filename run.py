@@ -26,6 +26,7 @@ import os
 from absl import app
 from absl import flags
 from absl import logging
+from android_world import checkpoint_codecs
 from android_world import checkpointer as checkpointer_lib
 from android_world import registry
 from android_world import suite_utils
@@ -84,6 +85,48 @@ _DEVICE_CONSOLE_PORT = flags.DEFINE_integer(
     ' first connected device is port 5554, the second is 5556, and'
     ' so on.',
 )
+_DEVICE_CONSOLE_PORTS = flags.DEFINE_list(
+    'console_ports',
+    None,
+    'Console ports of several running Android devices, e.g.'
+    ' `5554,5556,5558`. If set, overrides --console_port and task instances'
+    ' are sharded across the devices, with one agent per device.',
+)
+_GRPC_PORTS = flags.DEFINE_list(
+    'grpc_ports',
+    None,
+    'gRPC ports of the devices in --console_ports, in the same order. If not'
+    ' set, the device with console port `p` is assumed to use gRPC port'
+    ' `8554 + (p - 5554)`.',
+)
+
+_ADB_CACHE_TTL_SEC = flags.DEFINE_float(
+    'adb_cache_ttl_sec',
+    0.0,
+    'If positive, responses to read-only adb calls are reused for this many'
+    ' seconds, until a call that may change the device is issued.',
+)
+
+_DIFF_FORESTS = flags.DEFINE_bool(
+    'diff_forests',
+    False,
+    'Whether to only convert the a11y nodes that changed since the previous'
+    ' observation, reusing the UI elements of the others.',
+)
+
+_PERSISTENT_ADB_SHELL = flags.DEFINE_bool(
+    'persistent_adb_shell',
+    False,
+    'Whether to run generic adb shell commands in one long-lived `adb shell`'
+    ' per device, instead of spawning an adb process for each.',
+)
+
+_PASTE_THRESHOLD = flags.DEFINE_integer(
+    'paste_threshold',
+    None,
+    'If set, texts of at least this many characters are pasted from the'
+    ' clipboard instead of typed word by word.',
+)
 
 _SUITE_FAMILY = flags.DEFINE_enum(
     'suite_family',
@@ -123,6 +166,24 @@ _CHECKPOINT_DIR = flags.DEFINE_string(
     ' the latest checkpoint. If the directory is empty or does not exist, a new'
     ' directory will be created.',
 )
+_SUMMARY_EVERY_N = flags.DEFINE_integer(
+    'summary_every_n',
+    1,
+    'Print the table of results every this many episodes.',
+)
+_STREAM_STEPS = flags.DEFINE_boolean(
+    'stream_steps',
+    True,
+    'Whether to append each step to the checkpoint directory as it completes,'
+    ' so the steps of an unfinished episode survive a crash.',
+)
+_CHECKPOINT_CODEC = flags.DEFINE_enum(
+    'checkpoint_codec',
+    'gzip',
+    list(checkpoint_codecs.CODECS),
+    'Compression for checkpointed episodes and step logs. zstd and lz4 need'
+    ' the optional zstandard and lz4 packages.',
+)
 _OUTPUT_PATH = flags.DEFINE_string(
     'output_path',
     os.path.expanduser('~/android_world/runs'),
@@ -201,13 +262,35 @@ def _get_agent(
   return agent
 
 
+def _get_device_ports() -> list[tuple[int, int]]:
+  """Returns the (console_port, grpc_port) of each device to run on."""
+  if not _DEVICE_CONSOLE_PORTS.value:
+    return [(_DEVICE_CONSOLE_PORT.value, 8554)]
+  console_ports = [int(port) for port in _DEVICE_CONSOLE_PORTS.value]
+  if _GRPC_PORTS.value:
+    grpc_ports = [int(port) for port in _GRPC_PORTS.value]
+    if len(grpc_ports) != len(console_ports):
+      raise ValueError('--grpc_ports must have one port per console port.')
+  else:
+    grpc_ports = [8554 + (port - 5554) for port in console_ports]
+  return list(zip(console_ports, grpc_ports))
+
+
 def _main() -> None:
   """Runs eval suite and gets rewards back."""
-  env = env_launcher.load_and_setup_env(
-      console_port=_DEVICE_CONSOLE_PORT.value,
-      emulator_setup=_EMULATOR_SETUP.value,
-      adb_path=_ADB_PATH.value,
-  )
+  envs = [
+      env_launcher.load_and_setup_env(
+          console_port=console_port,
+          emulator_setup=_EMULATOR_SETUP.value,
+          adb_path=_ADB_PATH.value,
+          grpc_port=grpc_port,
+          adb_cache_ttl_sec=_ADB_CACHE_TTL_SEC.value,
+          diff_forests=_DIFF_FORESTS.value,
+          persistent_adb_shell=_PERSISTENT_ADB_SHELL.value,
+          paste_threshold=_PASTE_THRESHOLD.value,
+      )
+      for console_port, grpc_port in _get_device_ports()
+  ]
 
   n_task_combinations = _N_TASK_COMBINATIONS.value
   task_registry = registry.TaskRegistry()
@@ -217,16 +300,19 @@ def _main() -> None:
       seed=_TASK_RANDOM_SEED.value,
       tasks=_TASKS.value,
       use_identical_params=_FIXED_TASK_SEED.value,
+      lazy=True,
   )
   suite.suite_family = _SUITE_FAMILY.value
 
-  agent = _get_agent(env, _SUITE_FAMILY.value)
+  agents = [_get_agent(env, _SUITE_FAMILY.value) for env in envs]
 
-  if _SUITE_FAMILY.value.startswith('miniwob'):
-    # MiniWoB pages change quickly, don't need to wait for screen to stabilize.
-    agent.transition_pause = _MINIWOB_TRANSITION_PAUSE
-  else:
-    agent.transition_pause = None
+  for agent in agents:
+    if _SUITE_FAMILY.value.startswith('miniwob'):
+      # MiniWoB pages change quickly, don't need to wait for screen to
+      # stabilize.
+      agent.transition_pause = _MINIWOB_TRANSITION_PAUSE
+    else:
+      agent.transition_pause = None
 
   if _CHECKPOINT_DIR.value:
     checkpoint_dir = _CHECKPOINT_DIR.value
@@ -237,17 +323,38 @@ def _main() -> None:
       f'Starting eval with agent {_AGENT_NAME.value} and writing to'
       f' {checkpoint_dir}'
   )
-  suite_utils.run(
-      suite,
-      agent,
-      checkpointer=checkpointer_lib.IncrementalCheckpointer(checkpoint_dir),
-      demo_mode=False,
+  checkpointer = checkpointer_lib.IncrementalCheckpointer(
+      checkpoint_dir,
+      stream_steps=_STREAM_STEPS.value,
+      codec=_CHECKPOINT_CODEC.value,
   )
+  if len(agents) > 1:
+    suite_utils.run_parallel(
+        suite,
+        agents,
+        checkpointer=checkpointer,
+        summary_every_n=_SUMMARY_EVERY_N.value,
+    )
+  else:
+    suite_utils.run(
+        suite,
+        agents[0],
+        checkpointer=checkpointer,
+        demo_mode=False,
+        summary_every_n=_SUMMARY_EVERY_N.value,
+    )
   print(
       f'Finished running agent {_AGENT_NAME.value} on {_SUITE_FAMILY.value}'
       f' family. Wrote to {checkpoint_dir}.'
   )
-  env.close()
+  for env in envs:
+    adb_cache = env.controller.adb_cache
+    if adb_cache is not None:
+      print(
+          f'adb cache: {adb_cache.hits} hits, {adb_cache.misses} misses,'
+          f' {adb_cache.invalidations} invalidations.'
+      )
+    env.close()
 
 
 def main(argv: Sequence[str]) -> None:
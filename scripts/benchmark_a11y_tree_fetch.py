@@ -0,0 +1,92 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures the per-observation cost of fetching the a11y tree.
+
+Uses a fake a11y-wrapped environment whose adb calls take `--adb_latency_ms`,
+and compares `android_world_controller.get_a11y_tree` with the previous
+behavior, which probed airplane mode over adb before every fetch. No device is
+needed. Run from the repository root:
+
+  python -m scripts.benchmark_a11y_tree_fetch
+"""
+
+import time
+
+from absl import app
+from absl import flags
+from android_env.proto import adb_pb2
+from android_env.wrappers import a11y_grpc_wrapper
+from android_world.env import adb_utils
+from android_world.env import android_world_controller
+
+_OBSERVATIONS = flags.DEFINE_integer(
+    'observations', 50, 'Number of a11y trees to fetch per variant.'
+)
+_ADB_LATENCY_MS = flags.DEFINE_float(
+    'adb_latency_ms',
+    40.0,
+    'Simulated round trip of one adb call; ~40ms is typical for `adb shell`.',
+)
+
+
+class _FakeA11yEnv(a11y_grpc_wrapper.A11yGrpcWrapper):
+  """A11y-wrapped environment with simulated adb latency and no device."""
+
+  def __init__(self, adb_latency_sec: float):  # pylint: disable=super-init-not-called
+    self._adb_latency_sec = adb_latency_sec
+    self.adb_calls = 0
+
+  def execute_adb_call(
+      self, adb_call: adb_pb2.AdbRequest
+  ) -> adb_pb2.AdbResponse:
+    del adb_call
+    self.adb_calls += 1
+    time.sleep(self._adb_latency_sec)
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    response.generic.output = b'0\n'
+    return response
+
+  def accumulate_new_extras(self):
+    return {'accessibility_tree': ['forest']}
+
+
+def _probe_then_fetch(env: _FakeA11yEnv):
+  """The previous behavior: check airplane mode before every fetch."""
+  adb_utils.retry(3)(adb_utils.check_airplane_mode)(env)
+  return android_world_controller.get_a11y_tree(env)
+
+
+def _measure(fetch, env: _FakeA11yEnv, observations: int) -> float:
+  start = time.perf_counter()
+  for _ in range(observations):
+    fetch(env)
+  return (time.perf_counter() - start) / observations
+
+
+def main(argv: list[str]) -> None:
+  del argv
+  latency = _ADB_LATENCY_MS.value / 1000
+  print(f'{"variant":<24} {"ms/observation":>15} {"adb calls":>10}')
+  for name, fetch in (
+      ('probe every fetch', _probe_then_fetch),
+      ('probe on failure only', android_world_controller.get_a11y_tree),
+  ):
+    env = _FakeA11yEnv(latency)
+    seconds = _measure(fetch, env, _OBSERVATIONS.value)
+    print(f'{name:<24} {seconds * 1000:>15.2f} {env.adb_calls:>10}')
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,90 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks running shell commands in a persistent session.
+
+Runs a batch of small commands, like those issued during task setup, once with
+a new process per command, as `AdbController` does, and once in an
+`adb_shell_session.ShellSession`. By default both run against a local `sh`, so
+only the cost of spawning processes is measured; with `--device`, they run
+against a connected device, which adds the adb handshake per command. Run from
+the repository root:
+
+  python -m scripts.benchmark_adb_shell_session --device=emulator-5554
+"""
+
+import subprocess
+import time
+from typing import Callable
+
+from absl import app
+from absl import flags
+from android_world.env import adb_shell_session
+
+_ADB_PATH = flags.DEFINE_string('adb_path', 'adb', 'The adb binary.')
+_DEVICE = flags.DEFINE_string(
+    'device', None, 'Serial of the device to run on; a local shell if unset.'
+)
+_REPEATS = flags.DEFINE_integer(
+    'repeats', 20, 'Times to run the batch of commands.'
+)
+
+# Available both on devices and on Linux hosts.
+_COMMANDS = (
+    'ls /',
+    'test -d /proc',
+    'cat /proc/uptime',
+    'echo 1 > /dev/null',
+    'id',
+)
+
+
+def _measure(run: Callable[[str], bytes], repeats: int) -> float:
+  """Returns the mean seconds per command."""
+  for command in _COMMANDS:
+    run(command)  # Warm up.
+  start = time.perf_counter()
+  for _ in range(repeats):
+    for command in _COMMANDS:
+      run(command)
+  return (time.perf_counter() - start) / (repeats * len(_COMMANDS))
+
+
+def main(argv: list[str]) -> None:
+  del argv
+  if _DEVICE.value:
+    shell_command = [_ADB_PATH.value, '-s', _DEVICE.value, 'shell']
+    spawn_command = shell_command
+  else:
+    shell_command = ['sh']
+    spawn_command = ['sh', '-c']
+
+  session = adb_shell_session.ShellSession(shell_command)
+  runners = {
+      'spawn': lambda command: subprocess.check_output(
+          spawn_command + [command], stderr=subprocess.STDOUT
+      ),
+      'session': lambda command: session.run(command)[1],
+  }
+  print(f'{"backend":<8} {"ms/command":>11} {"commands/s":>11}')
+  try:
+    for name, run in runners.items():
+      seconds = _measure(run, _REPEATS.value)
+      print(f'{name:<8} {seconds * 1000:>11.2f} {1 / seconds:>11.0f}')
+  finally:
+    session.close()
+
+
+if __name__ == '__main__':
+  app.run(main)
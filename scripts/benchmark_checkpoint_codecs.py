@@ -0,0 +1,110 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks the checkpoint codecs on saved episodes.
+
+Loads every `*.pkl.gz` task group under `--runs_dir` and, per codec, reports
+the throughput of `checkpoint_codecs.dump` and `load` in MB/s of pickled data,
+and the compression ratio. Run from the repository root:
+
+  python -m scripts.benchmark_checkpoint_codecs --runs_dir=runs
+"""
+
+import glob
+import io
+import os
+import pickle
+import time
+from typing import Any
+
+from absl import app
+from absl import flags
+from android_world import checkpoint_codecs
+from android_world import checkpointer
+
+_RUNS_DIR = flags.DEFINE_string(
+    'runs_dir', 'runs', 'Directory with run directories of episodes.'
+)
+_CODECS = flags.DEFINE_list(
+    'codecs', list(checkpoint_codecs.CODECS), 'Codecs to benchmark.'
+)
+_REPEATS = flags.DEFINE_integer(
+    'repeats', 3, 'Times to encode and decode each task group.'
+)
+
+_MB = 1024 * 1024
+
+
+def _load_task_groups(runs_dir: str) -> list[Any]:
+  filenames = sorted(
+      glob.glob(os.path.join(runs_dir, '**', '*.pkl.gz'), recursive=True)
+  )
+  return [checkpointer._unzip_and_read_pickle(f) for f in filenames]  # pylint: disable=protected-access
+
+
+def _benchmark(
+    codec: checkpoint_codecs.Codec, task_groups: list[Any], repeats: int
+) -> dict[str, float]:
+  """Returns the throughput and compression ratio of codec."""
+  raw_bytes = sum(len(pickle.dumps(group)) for group in task_groups)
+  compressed_bytes = 0
+  write_s = read_s = 0.0
+  for _ in range(repeats):
+    compressed_bytes = 0
+    for group in task_groups:
+      buffer = io.BytesIO()
+      start = time.perf_counter()
+      checkpoint_codecs.dump(group, buffer, codec)
+      write_s += time.perf_counter() - start
+      compressed_bytes += buffer.tell()
+
+      buffer.seek(0)
+      start = time.perf_counter()
+      checkpoint_codecs.load(buffer)
+      read_s += time.perf_counter() - start
+  return {
+      'write_mb_s': raw_bytes * repeats / _MB / write_s,
+      'read_mb_s': raw_bytes * repeats / _MB / read_s,
+      'ratio': raw_bytes / compressed_bytes,
+      'raw_mb': raw_bytes / _MB,
+      'compressed_mb': compressed_bytes / _MB,
+  }
+
+
+def main(argv: list[str]) -> None:
+  del argv
+  task_groups = _load_task_groups(_RUNS_DIR.value)
+  if not task_groups:
+    raise app.UsageError(f'No *.pkl.gz files found under {_RUNS_DIR.value}.')
+  print(f'{len(task_groups)} task groups from {_RUNS_DIR.value}')
+  print(
+      f'{"codec":<6} {"write MB/s":>11} {"read MB/s":>10} {"ratio":>6}'
+      f' {"raw MB":>8} {"stored MB":>10}'
+  )
+  for name in _CODECS.value:
+    codec = checkpoint_codecs.get_codec(name)
+    try:
+      result = _benchmark(codec, task_groups, _REPEATS.value)
+    except ImportError as e:
+      print(f'{name:<6} skipped: {e}')
+      continue
+    print(
+        f'{name:<6} {result["write_mb_s"]:>11.1f} {result["read_mb_s"]:>10.1f}'
+        f' {result["ratio"]:>6.2f} {result["raw_mb"]:>8.2f}'
+        f' {result["compressed_mb"]:>10.2f}'
+    )
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,84 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compares observing via a no-op step with `AndroidWorldController.observe`.
+
+Runs a real AndroidEnv on android_env's fake simulator, so no device is needed,
+and reports the latency and throughput of both paths. The fake simulator
+renders a random frame per screenshot, which is part of both measurements; the
+difference between the two is the cost of dispatching the no-op action. Run
+from the repository root:
+
+  python -m scripts.benchmark_observe
+"""
+
+import time
+from typing import Any, Callable
+
+from absl import app
+from absl import flags
+from absl import logging
+from android_env import loader
+from android_env.components import config_classes
+from android_world.env import android_world_controller
+from android_world.env import interface
+
+_OBSERVATIONS = flags.DEFINE_integer(
+    'observations', 100, 'Number of observations per path.'
+)
+_SCREEN_HEIGHT = flags.DEFINE_integer(
+    'screen_height', 2400, 'Height of the fake screen in pixels.'
+)
+_SCREEN_WIDTH = flags.DEFINE_integer(
+    'screen_width', 1080, 'Width of the fake screen in pixels.'
+)
+
+
+def _measure(observe: Callable[[], Any], observations: int) -> float:
+  observe()  # Warm up.
+  start = time.perf_counter()
+  for _ in range(observations):
+    observe()
+  return (time.perf_counter() - start) / observations
+
+
+def main(argv: list[str]) -> None:
+  del argv
+  logging.set_verbosity(logging.WARNING)
+  config = config_classes.AndroidEnvConfig(
+      task=config_classes.FilesystemTaskConfig(
+          path=android_world_controller._write_default_task_proto()  # pylint: disable=protected-access
+      ),
+      simulator=config_classes.FakeSimulatorConfig(
+          screen_dimensions=(_SCREEN_HEIGHT.value, _SCREEN_WIDTH.value)
+      ),
+  )
+  controller = android_world_controller.AndroidWorldController(
+      loader.load(config), a11y_method=android_world_controller.A11yMethod.NONE
+  )
+  controller.reset()
+  no_op_action = interface._get_no_op_action()  # pylint: disable=protected-access
+
+  print(f'{"path":<16} {"ms/observation":>15} {"observations/s":>15}')
+  for name, observe in (
+      ('no-op step', lambda: controller.step(dict(no_op_action))),
+      ('observe()', controller.observe),
+  ):
+    seconds = _measure(observe, _OBSERVATIONS.value)
+    print(f'{name:<16} {seconds * 1000:>15.2f} {1 / seconds:>15.1f}')
+  controller.close()
+
+
+if __name__ == '__main__':
+  app.run(main)
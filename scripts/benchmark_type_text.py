@@ -0,0 +1,102 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks the latency of `adb_utils.type_text` by text length.
+
+Types multi-paragraph texts of `--lengths` characters word by word, and by
+pasting them from the clipboard, into a fake env that answers each adb call
+after `--adb_call_latency_ms`, as a device would. Reports the adb calls made
+and the time taken, which includes the fixed waits for the clipper app. Run
+from the repository root:
+
+  python -m scripts.benchmark_type_text --adb_call_latency_ms=50
+"""
+
+import random
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+from android_env.proto import adb_pb2
+from android_world.env import adb_utils
+
+_LENGTHS = flags.DEFINE_list(
+    'lengths',
+    ['20', '100', '500', '2000'],
+    'Numbers of characters of the texts to type.',
+)
+_ADB_CALL_LATENCY_MS = flags.DEFINE_float(
+    'adb_call_latency_ms', 50.0, 'Time the fake env takes per adb call.'
+)
+
+_WORDS = (
+    'the', 'meeting', 'notes', 'for', 'Monday', 'groceries', 'call', 'Bob'
+)
+_WORDS_PER_PARAGRAPH = 15
+
+
+class _FakeEnv:
+  """Answers adb calls after a fixed latency, and counts them."""
+
+  def __init__(self, latency_sec: float):
+    self._latency_sec = latency_sec
+    self.calls = 0
+
+  def execute_adb_call(
+      self, adb_call: adb_pb2.AdbRequest
+  ) -> adb_pb2.AdbResponse:
+    self.calls += 1
+    time.sleep(self._latency_sec)
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    if 'clipper.set' in adb_call.generic.args:
+      response.generic.output = (
+          b'Broadcast completed: result=-1, data="Text set"\n'
+      )
+    return response
+
+
+def _make_text(length: int) -> str:
+  """Returns paragraphs of words, of about length characters."""
+  rng = random.Random(length)
+  words = []
+  size = 0
+  while size < length:
+    word = rng.choice(_WORDS)
+    if words and len(words) % _WORDS_PER_PARAGRAPH == 0:
+      word = '\n' + word
+    words.append(word)
+    size += len(word) + 1
+  return ' '.join(words)[:length]
+
+
+def main(argv: list[str]) -> None:
+  del argv
+  # type_text logs every word it types.
+  logging.set_verbosity(logging.WARNING)
+  latency_sec = _ADB_CALL_LATENCY_MS.value / 1000
+  modes = {'words': None, 'paste': 0}
+  print(f'{"chars":>6} {"mode":<6} {"adb calls":>9} {"seconds":>8}')
+  for length in map(int, _LENGTHS.value):
+    text = _make_text(length)
+    for mode, paste_threshold in modes.items():
+      env = _FakeEnv(latency_sec)
+      start = time.perf_counter()
+      adb_utils.type_text(text, env, paste_threshold=paste_threshold)
+      seconds = time.perf_counter() - start
+      print(f'{length:>6} {mode:<6} {env.calls:>9} {seconds:>8.2f}')
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,147 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks the memory and conversion cost of UI elements.
+
+Builds synthetic a11y forests of `--sizes` nodes and converts each with
+`representation_utils.forest_to_ui_elements`, both with the slotted
+`UIElement` and `BoundingBox` and with equivalent dataclasses without
+`__slots__`, as they were before. Reports the conversion throughput, the memory
+retained by the elements and their pickled size. Run from the repository root:
+
+  python -m scripts.benchmark_ui_elements
+"""
+
+import dataclasses
+import pickle
+import time
+import tracemalloc
+from typing import Any
+from unittest import mock
+
+from absl import app
+from absl import flags
+from android_env.proto.a11y import android_accessibility_forest_pb2
+from android_world.env import representation_utils
+
+_SIZES = flags.DEFINE_list(
+    'sizes', ['100', '500', '1000', '5000'], 'Numbers of nodes per forest.'
+)
+_REPEATS = flags.DEFINE_integer(
+    'repeats', 20, 'Times to convert each forest.'
+)
+
+_SCREEN_SIZE = (1080, 2400)
+
+
+def _without_slots(cls: type[Any]) -> type[Any]:
+  """Returns a dataclass with the fields of cls, but without `__slots__`."""
+  fields = []
+  for field in dataclasses.fields(cls):
+    if field.default is dataclasses.MISSING:
+      fields.append((field.name, field.type))
+    else:
+      fields.append(
+          (field.name, field.type, dataclasses.field(default=field.default))
+      )
+  without_slots = dataclasses.make_dataclass(cls.__name__, fields)
+  # Pickled by reference to the module, where it is patched in while in use.
+  without_slots.__module__ = cls.__module__
+  return without_slots
+
+
+def _make_forest(
+    num_nodes: int,
+) -> android_accessibility_forest_pb2.AndroidAccessibilityForest:
+  """Returns a forest with one window holding a binary tree of num_nodes."""
+  forest = android_accessibility_forest_pb2.AndroidAccessibilityForest()
+  tree = forest.windows.add().tree
+  for i in range(num_nodes):
+    node = tree.nodes.add()
+    node.unique_id = i
+    node.child_ids.extend(c for c in (2 * i + 1, 2 * i + 2) if c < num_nodes)
+    node.class_name = 'android.widget.TextView'
+    node.text = f'Item {i}'
+    node.package_name = 'com.example.app'
+    node.view_id_resource_name = f'com.example.app:id/item_{i}'
+    node.is_clickable = i % 3 == 0
+    node.is_enabled = True
+    node.is_visible_to_user = True
+    top = (i * 40) % _SCREEN_SIZE[1]
+    node.bounds_in_screen.left = 0
+    node.bounds_in_screen.right = _SCREEN_SIZE[0]
+    node.bounds_in_screen.top = top
+    node.bounds_in_screen.bottom = top + 40
+  return forest
+
+
+def _benchmark(
+    forest: android_accessibility_forest_pb2.AndroidAccessibilityForest,
+    repeats: int,
+) -> dict[str, float]:
+  """Returns the cost of converting forest to UI elements."""
+  convert = lambda: representation_utils.forest_to_ui_elements(
+      forest, screen_size=_SCREEN_SIZE
+  )
+  convert()  # Warm up.
+  start = time.perf_counter()
+  for _ in range(repeats):
+    convert()
+  seconds = (time.perf_counter() - start) / repeats
+
+  tracemalloc.start()
+  elements = convert()
+  retained_bytes, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return {
+      'ms': seconds * 1000,
+      'elements_per_s': len(elements) / seconds,
+      'bytes_per_element': retained_bytes / len(elements),
+      'pickle_kib': len(pickle.dumps(elements)) / 1024,
+  }
+
+
+def main(argv: list[str]) -> None:
+  del argv
+  layouts = {
+      'dict': (
+          _without_slots(representation_utils.UIElement),
+          _without_slots(representation_utils.BoundingBox),
+      ),
+      'slots': (
+          representation_utils.UIElement,
+          representation_utils.BoundingBox,
+      ),
+  }
+  print(
+      f'{"nodes":>6} {"layout":<6} {"ms":>8} {"elements/s":>11}'
+      f' {"B/element":>10} {"pickle KiB":>11}'
+  )
+  for size in map(int, _SIZES.value):
+    forest = _make_forest(size)
+    for name, (element_cls, bbox_cls) in layouts.items():
+      with mock.patch.object(
+          representation_utils, 'UIElement', element_cls
+      ), mock.patch.object(representation_utils, 'BoundingBox', bbox_cls):
+        result = _benchmark(forest, _REPEATS.value)
+      print(
+          f'{size:>6} {name:<6} {result["ms"]:>8.2f}'
+          f' {result["elements_per_s"]:>11.0f}'
+          f' {result["bytes_per_element"]:>10.0f}'
+          f' {result["pickle_kib"]:>11.1f}'
+      )
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,139 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks parsing uiautomator dumps into UI elements.
+
+Compares `representation_utils.xml_dump_to_ui_elements`, which converts nodes
+as they are parsed, with the previous converter, which first built a dict tree
+of the whole dump. Parses the XML files in `--xml_files`, e.g. dumps captured
+with `adb exec-out uiautomator dump /dev/tty`, or synthetic dumps of `--sizes`
+nodes if none are given. Run from the repository root:
+
+  python -m scripts.benchmark_uiautomator_parse --xml_files=dump.xml
+"""
+
+import random
+import time
+from typing import Any, Callable
+import xml.etree.ElementTree as ET
+
+from absl import app
+from absl import flags
+from android_world.env import representation_utils
+
+_XML_FILES = flags.DEFINE_list(
+    'xml_files', [], 'Captured uiautomator dumps to parse.'
+)
+_SIZES = flags.DEFINE_list(
+    'sizes',
+    ['100', '1000', '5000'],
+    'Numbers of nodes of the synthetic dumps, if no --xml_files are given.',
+)
+_REPEATS = flags.DEFINE_integer('repeats', 20, 'Times to parse each dump.')
+
+_MB = 1024 * 1024
+
+
+def _dict_tree_to_ui_elements(
+    xml_string: str,
+) -> list[representation_utils.UIElement]:
+  """The previous converter: builds a dict tree, then walks it."""
+
+  def parse_node(node: ET.Element) -> dict[str, Any]:
+    result = node.attrib
+    result['children'] = [parse_node(child) for child in node]
+    return result
+
+  ui_elements = []
+
+  def process_node(node: dict[str, Any], is_root: bool) -> None:
+    if not is_root:
+      # pylint: disable-next=protected-access
+      ui_elements.append(representation_utils._xml_node_to_ui_element(node))
+    for child in node.get('children', []):
+      process_node(child, is_root=False)
+
+  process_node(parse_node(ET.fromstring(xml_string)), is_root=True)
+  return ui_elements
+
+
+def _make_dump(num_nodes: int) -> str:
+  """Returns a dump of num_nodes nodes, nested like a typical app screen."""
+  rng = random.Random(num_nodes)
+  parts = ['<?xml version=\'1.0\' encoding=\'UTF-8\' standalone=\'yes\' ?>']
+  parts.append('<hierarchy rotation="0">')
+  open_nodes = 0
+  for i in range(num_nodes):
+    top = (i * 37) % 2400
+    parts.append(
+        f'<node index="{i}" text="Item {i}" resource-id="com.example:id/item"'
+        ' class="android.widget.TextView" package="com.example"'
+        f' content-desc="" checkable="false" checked="false"'
+        f' clickable="{"true" if i % 3 == 0 else "false"}" enabled="true"'
+        ' focusable="false" focused="false" scrollable="false"'
+        ' long-clickable="false" password="false" selected="false"'
+        f' bounds="[0,{top}][1080,{top + 37}]">'
+    )
+    open_nodes += 1
+    # Close a random number of nodes, keeping the tree a few levels deep.
+    for _ in range(rng.randint(0, min(open_nodes, 2))):
+      parts.append('</node>')
+      open_nodes -= 1
+  parts.extend(['</node>'] * open_nodes)
+  parts.append('</hierarchy>')
+  return ''.join(parts)
+
+
+def _measure(
+    parse: Callable[[str], Any], xml_string: str, repeats: int
+) -> float:
+  parse(xml_string)  # Warm up.
+  start = time.perf_counter()
+  for _ in range(repeats):
+    parse(xml_string)
+  return (time.perf_counter() - start) / repeats
+
+
+def main(argv: list[str]) -> None:
+  del argv
+  if _XML_FILES.value:
+    dumps = {}
+    for filename in _XML_FILES.value:
+      with open(filename, encoding='utf-8') as f:
+        dumps[filename] = f.read()
+  else:
+    dumps = {f'{n} nodes': _make_dump(int(n)) for n in _SIZES.value}
+
+  parsers = {
+      'dict tree': _dict_tree_to_ui_elements,
+      'iterparse': representation_utils.xml_dump_to_ui_elements,
+  }
+  print(
+      f'{"dump":<24} {"parser":<10} {"elements":>9} {"ms":>8} {"MB/s":>7}'
+      f' {"elements/s":>11}'
+  )
+  for name, xml_string in dumps.items():
+    num_elements = len(representation_utils.xml_dump_to_ui_elements(xml_string))
+    size_mb = len(xml_string.encode('utf-8')) / _MB
+    for parser_name, parse in parsers.items():
+      seconds = _measure(parse, xml_string, _REPEATS.value)
+      print(
+          f'{name[-24:]:<24} {parser_name:<10} {num_elements:>9}'
+          f' {seconds * 1000:>8.2f} {size_mb / seconds:>7.1f}'
+          f' {num_elements / seconds:>11.0f}'
+      )
+
+
+if __name__ == '__main__':
+  app.run(main)
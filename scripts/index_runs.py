@@ -0,0 +1,75 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Indexes the episodes of many runs and prints a leaderboard.
+
+Scans every run directory under `--runs_dir` into a `ResultsIndex` at
+`--index_dir`; files indexed by a previous invocation are only read again if
+they changed. Run from the repository root:
+
+  python -m scripts.index_runs --runs_dir=runs --index_dir=runs_index
+"""
+
+import time
+
+from absl import app
+from absl import flags
+from android_world import results_index
+import pandas as pd
+
+_RUNS_DIR = flags.DEFINE_list(
+    'runs_dir', ['runs'], 'Directories with run directories of episodes.'
+)
+_INDEX_DIR = flags.DEFINE_string(
+    'index_dir', 'runs_index', 'Directory holding the index.'
+)
+_BACKEND = flags.DEFINE_enum(
+    'backend',
+    'auto',
+    ['auto', 'parquet', 'sqlite'],
+    'Storage of the index; auto uses Parquet if pyarrow is installed.',
+)
+_GROUP_BY = flags.DEFINE_list(
+    'group_by', ['agent_name'], 'Columns the leaderboard is grouped by.'
+)
+_WORKERS = flags.DEFINE_integer(
+    'workers', 1, 'Number of processes reading new or changed files.'
+)
+
+
+def main(argv: list[str]) -> None:
+  del argv
+  index = results_index.ResultsIndex(_INDEX_DIR.value, backend=_BACKEND.value)
+  run_dirs = [
+      run_dir
+      for root in _RUNS_DIR.value
+      for run_dir in results_index.find_run_directories(root)
+  ]
+  start = time.perf_counter()
+  stats = index.scan(run_dirs, workers=_WORKERS.value)
+  print(
+      f'Scanned {stats.num_runs} runs in {time.perf_counter() - start:.2f}s'
+      f' ({index.backend}): {stats.num_files_ingested} files ingested,'
+      f' {stats.num_files_unchanged} unchanged,'
+      f' {stats.num_files_removed} removed;'
+      f' {stats.num_episodes_ingested} episodes ingested.'
+  )
+  with pd.option_context(
+      'display.max_rows', None, 'display.max_columns', None, 'display.width', 200
+  ):
+    print(index.leaderboard(by=_GROUP_BY.value))
+
+
+if __name__ == '__main__':
+  app.run(main)
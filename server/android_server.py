@@ -89,7 +89,7 @@ AndroidSuite = typing.Annotated[
 @app.post("/reset")
 async def reset(go_home: bool, app_android_env: AndroidEnv):
   """Resets the Android environment, optionally returning to the home screen."""
-  app_android_env.reset(go_home=go_home)
+  await app_android_env.areset(go_home=go_home)
   return {
       "status": "success",
       "message": f"Environment reset with go_home={go_home}.",
@@ -99,7 +99,7 @@ async def reset(go_home: bool, app_android_env: AndroidEnv):
 @app.get("/screenshot")
 async def get_screenshot(wait_to_stabilize: bool, app_android_env: AndroidEnv):
   """Captures and returns the current screenshot of the Android environment."""
-  state = app_android_env.get_state(wait_to_stabilize=wait_to_stabilize)
+  state = await app_android_env.aget_state(wait_to_stabilize=wait_to_stabilize)
   return {"pixels": state.pixels.tolist()}
 
 
@@ -109,7 +109,7 @@ async def execute_action(
 ):
   """Executes a given JSON-formatted action in the Android environment."""
   action = json_action.JSONAction(**action_dict)
-  app_android_env.execute_action(action)
+  await app_android_env.aexecute_action(action)
   return {"status": "success", "message": f"Action {action} executed."}
 
 
@@ -165,7 +165,9 @@ async def initialize_task(
     app_suite: AndroidSuite,
 ):
   """Initializes a specific task in the Android environment."""
-  app_suite[task_type][task_idx].initialize_task(app_android_env)
+  await app_android_env.run_blocking(
+      app_suite[task_type][task_idx].initialize_task, app_android_env
+  )
   return {
       "status": "success",
       "message": f"Task {task_type} {task_idx} initialized.",
@@ -180,7 +182,9 @@ async def tear_down_task(
     app_suite: AndroidSuite,
 ):
   """Tears down a specific task in the Android environment."""
-  app_suite[task_type][task_idx].tear_down(app_android_env)
+  await app_android_env.run_blocking(
+      app_suite[task_type][task_idx].tear_down, app_android_env
+  )
   return {
       "status": "success",
       "message": f"Task {task_type} {task_idx} torn down.",
@@ -195,9 +199,10 @@ async def get_task_score(
     app_suite: AndroidSuite,
 ):
   """Gets the success status (score) of a specific task."""
-  return {
-      "score": app_suite[task_type][task_idx].is_successful(app_android_env)
-  }
+  score = await app_android_env.run_blocking(
+      app_suite[task_type][task_idx].is_successful, app_android_env
+  )
+  return {"score": score}
 
 
 @task_router.get("/goal")
@@ -217,7 +222,7 @@ async def get_task_template(
 @app.post("/close")
 async def close(app_android_env: AndroidEnv):
   """Closes the Android environment."""
-  app_android_env.close()
+  await app_android_env.run_blocking(app_android_env.close)
   return {"status": "success"}
 
 